@@ -4,6 +4,7 @@ from langchain_text_splitters import CharacterTextSplitter
 import langchain_text_splitters as t_splitters
 from dotenv import load_dotenv
 import os
+from typing import Optional
 
 
 @dataclass_json
@@ -42,6 +43,68 @@ class LLMConfigs:
     text_splitter: t_splitters = None
     use_dynamic_prompt_recognizer: bool = True
 
+    # Per-role chat models (utils.get_llm(role)): overrides of temperature, max_tokens and deployment.
+    # Every role model shares one keep-alive connection pool.
+    llm_roles: dict = {
+        "default": {},
+        "research": {"temperature": 0.8},  # higher temp for exploration
+        "writing": {"temperature": 0},  # lower temp for focused writing
+    }
+    llm_timeout: float = 60.0
+    llm_max_retries: int = 2
+    llm_max_connections: int = 100
+    llm_max_keepalive_connections: int = 20
+    llm_keepalive_expiry: float = 30.0
+    # LLM gateway in the shared pool (llm_gateway.py), per deployment: AIMD concurrency limit driven by 429s
+    # and latency, retries honoring Retry-After, and a circuit breaker. It replaces the SDK retries.
+    use_llm_gateway: bool = True
+    llm_gateway_initial_concurrency: int = 8
+    llm_gateway_min_concurrency: int = 1
+    llm_gateway_max_concurrency: int = 64
+    llm_gateway_latency_target_seconds: Optional[float] = 60.0  # slower responses decrease the limit
+    llm_gateway_max_retries: int = 5
+    llm_gateway_backoff_base_seconds: float = 0.5
+    llm_gateway_backoff_max_seconds: float = 30.0
+    llm_gateway_queue_timeout_seconds: Optional[float] = 120.0
+    llm_gateway_breaker_failures: int = 5
+    llm_gateway_breaker_reset_seconds: float = 30.0
+    # Hedged requests of the call sites opted in with llm_hedging.with_hedging: once a call is slower than the
+    # site's llm_hedge_percentile latency, a duplicate request is sent and the first response wins. Each call
+    # earns llm_hedge_budget hedges (0.05 = at most ~5% extra requests)
+    use_llm_hedging: bool = True
+    llm_hedge_percentile: float = 0.95
+    llm_hedge_budget: float = 0.05
+    llm_hedge_min_samples: int = 20  # latencies needed before a site is hedged
+    llm_hedge_window: int = 200
+    # Model router (llm_router.routed_llm): call site -> role and candidate deployments, cheapest first
+    # (default: llm_deployment alone). Each call goes to the cheapest deployment whose observed latency
+    # (+ error rate * penalty) is within the tolerance of the best one, and falls back to the next deployments
+    # on errors. List only provisioned deployments, e.g. "deployments": ["gpt-4o-mini", "gpt-app"]
+    use_llm_router: bool = True
+    llm_routes: dict = {
+        "summarize": {"role": "default"},
+        "route": {"role": "default"},
+        "plan": {"role": "research"},
+        "write": {"role": "writing"},
+        "refactor": {"role": "default"},
+    }
+    llm_router_latency_tolerance: float = 0.25
+    llm_router_error_penalty_seconds: float = 30.0
+    llm_router_explore: float = 0.05  # share of calls sent to another candidate to keep its latency current
+    llm_router_ewma_alpha: float = 0.2
+    # Exact-match response cache of every LLM call (SqliteLLMCache): 'read_write', 'replay' (a miss
+    # raises instead of calling the model, for CI) or 'off'
+    llm_cache_mode: str = os.getenv("AGENT_LAB_LLM_CACHE_MODE", "read_write")
+    llm_cache_path: str = os.getenv("AGENT_LAB_LLM_CACHE_DB", os.path.join(".cache", "agent_lab", "llm_cache.sqlite"))
+    llm_cache_max_entries: int = 100_000
+    # Semantic response cache of near-duplicate prompts, one vector index per call site (SemanticLLMCache):
+    # a prompt whose embedding has a cosine similarity >= threshold with a cached one reuses its response
+    semantic_cache_dir: str = os.getenv("AGENT_LAB_SEMANTIC_CACHE_DIR", os.path.join(".cache", "agent_lab", "semantic"))
+    semantic_cache_threshold: float = 0.95
+    semantic_cache_thresholds: dict = {"summaries": 0.985}  # per call site overrides
+    semantic_cache_max_entries: int = 10_000
+    semantic_cache_embed_max_chars: int = 24_000
+
 
 class DatabaseConfigs:
     storage_type: str = 'blob'
@@ -68,6 +131,78 @@ class WikiConfigs:
     personal_access_token: str = os.getenv("AZURE_DEVOPS_PAT")
 
 
+class ToolsConfigs:
+    # Shared HTTP connection pool used by the page fetching tools
+    http_timeout: float = 10.0
+    http_max_connections: int = 20
+    http_max_keepalive_connections: int = 10
+    # Max pages fetched and summarized at the same time by batch_fetch_and_summarize
+    fetch_max_concurrency: int = 5
+
+    # Root folder of the on-disk caches used by the tools
+    cache_dir: str = os.getenv("AGENT_LAB_CACHE_DIR", os.path.join(".cache", "agent_lab"))
+    # Page fetch cache: entries younger than http_cache_fresh_seconds skip the network, older ones
+    # are revalidated with a conditional GET (ETag / Last-Modified)
+    use_http_cache: bool = True
+    http_cache_max_bytes: int = 256 * 1024 * 1024
+    http_cache_fresh_seconds: int = 15 * 60
+    # LLM page summaries keyed by (text hash, max_length, deployment, prompt version)
+    use_summary_cache: bool = True
+    summary_cache_ttl_seconds: int = 7 * 24 * 60 * 60
+    summary_cache_max_entries: int = 50_000
+    # Also reuse the summary of near-identical page text (semantic cache scope "summaries"); off by default
+    # because two similar pages can still differ in the facts a summary should keep
+    use_semantic_summary_cache: bool = False
+
+    # How page text is summarized: 'truncate' (first max_length * 10 characters, one LLM call) or
+    # 'map_reduce' (token-bounded chunks summarized in parallel, then merged by one more call)
+    summarize_mode: str = 'truncate'
+    map_reduce_chunk_tokens: int = 2000
+    map_reduce_max_chunks: int = 8
+    map_reduce_max_total_tokens: int = 16000
+    map_reduce_max_concurrency: int = 8
+    token_encoding: str = 'o200k_base'
+
+    # web_search results keyed by the normalized query (case, whitespace and stop words ignored)
+    use_search_cache: bool = True
+    search_cache_ttl_seconds: int = 60 * 60
+    search_cache_max_entries: int = 1024
+    search_timeout: float = 10.0
+
+
+class MemoryConfigs:
+    # Message window of long threads: once the messages exceed max_tokens, the oldest ones are folded
+    # into a rolling summary until the recent messages fit in target_tokens
+    window_max_tokens: int = 8000
+    window_target_tokens: int = 4000
+    window_summary_max_tokens: int = 500
+    token_encoding: str = 'o200k_base'
+
+
+class CheckpointConfigs:
+    # Durable graph checkpoints (SqliteCheckpointSaver)
+    sqlite_path: str = os.getenv("AGENT_LAB_CHECKPOINT_DB", os.path.join(".cache", "agent_lab", "checkpoints.sqlite"))
+    # Serialized values at least this large are zlib-compressed
+    compress_min_bytes: int = 512
+    # Growing channels (messages, results) store only what each step appended, with a full snapshot
+    # every snapshot_every versions of a channel (1 = always store full values)
+    snapshot_every: int = 20
+    # Retention (CheckpointCompactor): None disables a limit
+    keep_last_checkpoints: Optional[int] = 20  # per thread, older checkpoints are deleted
+    thread_ttl_seconds: Optional[float] = 30 * 24 * 3600  # threads idle for longer are deleted
+    max_threads: Optional[int] = 10_000  # least recently updated threads above the cap are deleted
+    max_bytes: Optional[int] = 1_000_000_000
+    compaction_interval_seconds: float = 600
+    # Memoized node results (SqliteNodeCache), so a rerun of a failed graph resumes at the failed node
+    node_cache_path: str = os.getenv("AGENT_LAB_NODE_CACHE_DB", os.path.join(".cache", "agent_lab", "node_cache.sqlite"))
+    node_cache_ttl_seconds: Optional[int] = 7 * 24 * 3600
+
+
+class NodeConfigs:
+    # validated_command_node validates the Command.update of 1 in N calls (1 = every call)
+    validation_sample_every: int = 1
+
+
 @dataclass_json
 @dataclass(frozen=True)
 class Cfg:
@@ -76,3 +211,7 @@ class Cfg:
     flask_app_configs: FlaskAppConfigs = FlaskAppConfigs()
     prompt_configs: PromptConfigs = PromptConfigs()
     wiki_configs: WikiConfigs = WikiConfigs()
+    tools_configs: ToolsConfigs = ToolsConfigs()
+    memory_configs: MemoryConfigs = MemoryConfigs()
+    checkpoint_configs: CheckpointConfigs = CheckpointConfigs()
+    node_configs: NodeConfigs = NodeConfigs()
@@ -1,10 +1,158 @@
+"""
+Agent and compiled-graph factory.
+
+Building a ReAct agent (prompt template + `create_react_agent` + compile) or compiling a StateGraph takes
+milliseconds to tens of milliseconds, and services that build them per request pay it every time.
+`AgentRegistry` builds each agent / graph once per process and hands the same compiled object to every
+caller. Compiled graphs are immutable and safe to share between threads, as long as the state their nodes
+close over is per run (e.g. tool call trackers count inside `helpers.tracked_run()`):
+  - agents are keyed by (model class and configuration, tool set, sha256 of the system prompt)
+  - graphs are keyed by name, e.g. with the `registered_graph` decorator on a build function
+Concurrent requests for the same key wait for a single build, and every build is timed (`stats`,
+`build_times`).
+"""
+import functools
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from langchain_core.caches import BaseCache
 from langchain_core.prompts import ChatPromptTemplate
 from langgraph.prebuilt import create_react_agent
 
+logger = logging.getLogger(__name__)
+
+
+def model_key(model) -> Hashable:
+    """Models of the same class, configuration (deployment, temperature, ...) and response cache share their agents."""
+    params = getattr(model, "_identifying_params", None)
+    config = json.dumps(params, sort_keys=True, default=str) if params is not None else id(model)
+    cache = getattr(model, "cache", None)
+    return type(model).__module__, type(model).__qualname__, config, id(cache) if isinstance(cache, BaseCache) else cache
+
+
+def tools_key(tool_list) -> Hashable:
+    # By identity: tracker-wrapped tools share the name of the tool they wrap. A cached agent keeps
+    # its tools alive, so their ids cannot be reused while the entry exists.
+    return tuple((getattr(t, "name", None), id(t)) for t in tool_list)
+
+
+class AgentRegistry:
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        # hits: served from the registry, coalesced: waited on an identical in-flight build
+        self.stats: Dict[str, Any] = {"hits": 0, "coalesced": 0, "builds": 0, "build_seconds": 0.0}
+        # label -> seconds of its last build
+        self.build_times: Dict[str, float] = {}
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._inflight: Dict[Hashable, Future] = {}
+
+    def get_or_build(self, key: Hashable, build: Callable[[], Any], label: Optional[str] = None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return self._entries[key]
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+            else:
+                self.stats["coalesced"] += 1
+
+        if not owner:
+            return future.result()
+
+        start = time.perf_counter()
+        try:
+            value = build()
+        except BaseException as e:
+            # Failed builds are not cached; waiting callers get the same error
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+        elapsed = time.perf_counter() - start
+
+        label = label or str(key)
+        with self._lock:
+            self._entries[key] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            del self._inflight[key]
+            self.stats["builds"] += 1
+            self.stats["build_seconds"] += elapsed
+            self.build_times[label] = elapsed
+        logger.info("Built %s in %.1f ms", label, elapsed * 1e3)
+        future.set_result(value)
+        return value
+
+    def agent(self, model, tool_list, system_prompt: str):
+        prompt_hash = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+        key = ("agent", model_key(model), tools_key(tool_list), prompt_hash)
+        config_hash = hashlib.sha256(repr(key[1]).encode("utf-8")).hexdigest()
+        label = (f"agent[{type(model).__name__}:{config_hash[:8]}, {[getattr(t, 'name', t) for t in tool_list]}, "
+                 f"prompt:{prompt_hash[:8]}]")
+        return self.get_or_build(key, lambda: build_agent(model, tool_list, system_prompt), label)
+
+    def graph(self, name: str, build: Callable[[], Any]):
+        return self.get_or_build(("graph", name), build, name)
 
-def make_agent(model, tool_list, system_prompt: str):
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_registry: Optional[AgentRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_agent_registry() -> AgentRegistry:
+    """Return the process-wide agent registry."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = AgentRegistry()
+        return _registry
+
+
+def build_agent(model, tool_list, system_prompt: str):
     prompt = ChatPromptTemplate.from_messages([
         ("system", system_prompt),
         ("placeholder", "{messages}"),
     ])
     return create_react_agent(model=model, tools=tool_list, prompt=prompt)
+
+
+def make_agent(model, tool_list, system_prompt: str, cache: bool = True):
+    """
+    ReAct agent with `system_prompt`, shared through the agent registry.
+
+    Use cache=False for agents over short-lived tools (e.g. per-branch tool trackers), which would
+    never be reused.
+    """
+    if not cache:
+        return build_agent(model, tool_list, system_prompt)
+    return get_agent_registry().agent(model, tool_list, system_prompt)
+
+
+def registered_graph(build: Callable[[], Any]) -> Callable[[], Any]:
+    """Decorator: the graph returned by `build` is built once per process and shared."""
+    name = f"{build.__module__}.{build.__qualname__}"
+
+    @functools.wraps(build)
+    def wrapper():
+        return get_agent_registry().graph(name, build)
+
+    return wrapper
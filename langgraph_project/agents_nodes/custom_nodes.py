@@ -1,41 +1,44 @@
+import functools
 import json
+import threading
+import time
 
 from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
 from langgraph.graph import END
 
 import langgraph_project.multi_agents.AgentState as States
+import langgraph_project.multi_agents.helpers as ut
 from typing import (
-    Any, Dict, Type, Union, Callable, TypeVar
+    Annotated, Any, Dict, Optional, Type, Union, Callable, TypeVar, get_origin, get_type_hints
 )
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 from langgraph.types import Command
 
+from conf.configs import Cfg
+
 
 def make_research_node(search_tool, summarize_tool, research_agent):
+    """
+    `summarize_tool` can track either a single-URL summarizer (safe_fetch_and_summarize) or
+    batch_fetch_and_summarize, which summarizes all the URLs of one agent step concurrently.
+    """
     @validated_command_node(States.MultiState)  # TEST
     def research_node(state):
         """
         Executes research using search and summarization tools, ensuring minimum results.
         """
-        # Reset trackers
-        for tracker in (search_tool, summarize_tool):
-            tracker.call_count = 0
-
-        # Invoke agent for research
-        res = research_agent.invoke(state)
-        search_tool.assert_counts()
-        summarize_tool.assert_counts()
+        # The agent and its trackers are shared by concurrent runs: count the calls of this run only
+        with ut.tracked_run():
+            # Invoke agent for research
+            res = research_agent.invoke(state)
+            search_tool.assert_counts()
+            summarize_tool.assert_counts()
 
         # Extract summaries
-        research_summaries = [
-            msg.content
-            for msg in res["messages"]
-            # Note: It is important to match the name
-            if isinstance(msg, ToolMessage) and msg.name == 'safe_fetch_and_summarize'
-        ]
+        research_summaries = ut.tool_results(res["messages"], summarize_tool.name)
 
-        # Update state with results
-        new_messages = state["messages"] + [
+        # Update state with results (only the new messages; the reducer appends them)
+        new_messages = [
             AIMessage(content="Research complete.", name="research_node")
         ]
         update = {
@@ -61,7 +64,12 @@ def make_research_node(search_tool, summarize_tool, research_agent):
     return research_node
 
 
-def make_writing_node(writing_agent, article_tool):
+def make_writing_node(writing_agent, article_tool, direct: bool = False):
+    """
+    With `direct`, the node calls `article_tool` itself with the topic and summaries of the state: the
+    article tokens then start at once, instead of after the agent has written a whole completion that
+    repeats every summary as tool arguments (use it when streaming the article).
+    """
     def writing_node(state):
         """
         Generates the final article based on research summaries.
@@ -73,22 +81,25 @@ def make_writing_node(writing_agent, article_tool):
         if len(summaries) < 2:
             raise ValueError("Insufficient research summaries to proceed to writing stage.")
 
-        # Construct prompt for article generation
-        payload = json.dumps({"topic": state.get("topic"), "summaries": summaries})
-        human_msg = HumanMessage(content=f"Write an article with this data: {payload}")
+        if direct:
+            article = article_tool.invoke({"topic": state.get("topic"), "research_summaries": summaries})
+        else:
+            # Construct prompt for article generation
+            payload = json.dumps({"topic": state.get("topic"), "summaries": summaries})
+            human_msg = HumanMessage(content=f"Write an article with this data: {payload}")
 
-        response = writing_agent.invoke({"messages": state["messages"] + [human_msg]})
+            response = writing_agent.invoke({"messages": state["messages"] + [human_msg]})
 
-        # Find generated article
-        article = next(
-            (msg.content for msg in response["messages"]
-             if isinstance(msg, ToolMessage) and msg.name == article_tool.name),
-            None
-        )
+            # Find generated article
+            article = next(
+                (msg.content for msg in response["messages"]
+                 if isinstance(msg, ToolMessage) and msg.name == article_tool.name),
+                None
+            )
         if not article:
             raise RuntimeError("generate_article tool did not return a result.")
 
-        final_msgs = state["messages"] + [AIMessage(content="Article drafted.", name="writing_node")]
+        final_msgs = [AIMessage(content="Article drafted.", name="writing_node")]
         print("DEBUG: 2. writing_node: final article text form writing node", article)
 
         return Command(update={"article": article, "messages": final_msgs}, goto=END)
@@ -97,22 +108,35 @@ def make_writing_node(writing_agent, article_tool):
 
 
 def validated_node(fn: Callable[[States.RefactorState], Dict[str, Any]]) -> Callable[
-    [Union[States.RefactorState, Dict[str, Any]]], Dict[str, Any]]:
-    def wrapper(raw_state: Union[States.RefactorState, Dict[str, Any]]) -> Dict[str, Any]:
-        # Normalize to dict
-        state_data = raw_state.model_dump() if isinstance(raw_state, BaseModel) else raw_state
-        # Validate incoming state
-        state = States.RefactorState(**state_data)
-        # Run node logic
-        updates = fn(state)
-        # Merge and re-validate full state
-        merged = state.copy(update=updates)
-        merged = States.RefactorState(**merged.model_dump())
-        # Return only changed fields
+    [Union[States.RefactorState, Dict[str, Any]]], Union[Dict[str, Any], Command]]:
+    """
+    Validates a RefactorState node incrementally: only the fields in the node's update are validated
+    (with their field validators) and only the fields that actually changed are returned.
+
+    The state is not dumped or rebuilt: LangGraph already passes a validated RefactorState, and the
+    update is validated against a shallow copy of it, so large fields (source files) are never copied.
+    """
+    validator = States.RefactorState.__pydantic_validator__
+
+    @functools.wraps(fn)
+    def wrapper(raw_state: Union[States.RefactorState, Dict[str, Any]]) -> Union[Dict[str, Any], Command]:
+        state = raw_state if isinstance(raw_state, States.RefactorState) else \
+            States.RefactorState.model_validate(raw_state)
+        result = fn(state)
+        updates = result.update if isinstance(result, Command) else result
+        if not updates:
+            return result
+
+        # Validate the dirty fields only (raises pydantic.ValidationError like the full model would)
+        scratch = state.model_copy()
         diffs = {}
-        for k, v in merged.model_dump().items():
-            if state_data.get(k) != v:
-                diffs[k] = v
+        for k, v in dict(updates).items():
+            validator.validate_assignment(scratch, k, v)
+            new, old = getattr(scratch, k), getattr(state, k)
+            if new is not old and new != old:
+                diffs[k] = new
+        if isinstance(result, Command):
+            return Command(graph=result.graph, update=diffs, resume=result.resume, goto=result.goto)
         return diffs
 
     return wrapper
@@ -121,53 +145,89 @@ def validated_node(fn: Callable[[States.RefactorState], Dict[str, Any]]) -> Call
 StateModel = TypeVar("StateModel", bound=Union[BaseModel, dict])
 
 
+def _update_validators(state_cls) -> Dict[str, Callable[[Any, Any], None]]:
+    """
+    Per-field validators of `state_cls`, resolved once: validator(state, value) raises if `value` is not
+    a valid update of the field. Fields with a reducer (Annotated[..., reducer]) receive deltas in the
+    reducer's own formats and are left to the reducer.
+    """
+    if isinstance(state_cls, type) and issubclass(state_cls, BaseModel):
+        model_validator = state_cls.__pydantic_validator__
+
+        def make(field):
+            def validate(state, value):
+                # Shallow copy: runs the field's validators without copying the other fields
+                model_validator.validate_assignment(state.model_copy(), field, value)
+            return validate
+
+        return {field: make(field) for field in state_cls.model_fields}
+
+    def make_adapter(hint):
+        adapter = TypeAdapter(hint)
+        return lambda state, value: adapter.validate_python(value)
+
+    validators = {}
+    for field, hint in get_type_hints(state_cls, include_extras=True).items():
+        is_reducer = get_origin(hint) is Annotated and any(callable(m) for m in hint.__metadata__)
+        validators[field] = (lambda state, value: None) if is_reducer else make_adapter(hint)
+    return validators
+
+
 def validated_command_node(
-        state_cls: Type[StateModel]
+        state_cls: Type[StateModel], sample_every: Optional[int] = None
 ) -> Callable[[Callable[[StateModel], Command]], Callable[[Union[StateModel, Dict[str, Any]]], Command]]:
     """
-    Wraps a node fn(state)->Command so that:
-      - If state_cls is a Pydantic model, we run runtime validation on both incoming state
-        and on the .update dict inside the Command.
-      - If state_cls is a TypedDict (i.e. subclass of dict), we skip validation entirely.
+    Wraps a node fn(state)->Command so that the keys of Command.update are validated against the
+    fields of state_cls (Pydantic model or TypedDict): unknown keys and invalid values raise.
+
+    The validation strategy is resolved once, at decoration time, and only the updated fields are
+    validated; the incoming state is not revalidated. With sample_every=N (default:
+    NodeConfigs.validation_sample_every) only 1 in N calls is validated. Counters are exposed on the
+    wrapped node as `validation_stats`.
     """
+    is_model = isinstance(state_cls, type) and issubclass(state_cls, BaseModel)
+    validators = _update_validators(state_cls)
+    every = max(sample_every or Cfg().node_configs.validation_sample_every, 1)
 
     def decorator(
             fn: Callable[[StateModel], Command]
     ) -> Callable[[Union[StateModel, Dict[str, Any]]], Command]:
+        stats = {"calls": 0, "validated": 0, "validation_seconds": 0.0}
+        lock = threading.Lock()
 
+        @functools.wraps(fn)
         def wrapper(
                 raw_state: Union[StateModel, Dict[str, Any]]
         ) -> Command:
-            # 1) Normalize to a plain dict
-            if isinstance(raw_state, BaseModel):
-                state_data = raw_state.model_dump()
-            else:
-                state_data = raw_state  # already a mapping
-
-            # 2) Validate incoming if it's a Pydantic class
-            if issubclass(state_cls, BaseModel):
-                state: StateModel = state_cls(**state_data)  # type: ignore
-            else:
-                # TypedDicts are just dict subclasses at runtime
-                state = state_data  # type: ignore
-
-            # 3) Run node logic; must return a Command
+            # Pydantic nodes expect a model; LangGraph already passes one for Pydantic state graphs
+            state = state_cls.model_validate(raw_state) if is_model and not isinstance(raw_state, state_cls) \
+                else raw_state
+
             result = fn(state)
             if not isinstance(result, Command):
                 raise TypeError(
                     f"{fn.__name__} must return a Command, got {type(result)}"
                 )
 
-            # 4) Validate only the .update payload if using Pydantic
-            if issubclass(state_cls, BaseModel):
-                updates = result.update or {}
-                merged = state.copy(update=updates)  # type: ignore
-                # This will raise if any validator fails
-                state_cls(**merged.model_dump())  # type: ignore
+            with lock:
+                sampled = stats["calls"] % every == 0
+                stats["calls"] += 1
+            if sampled and result.update:
+                start = time.perf_counter()
+                try:
+                    for k, v in dict(result.update).items():
+                        if k not in validators:
+                            raise ValueError(
+                                f"{fn.__name__} updated unknown state field {k!r} of {state_cls.__name__}")
+                        validators[k](state, v)
+                finally:
+                    with lock:
+                        stats["validated"] += 1
+                        stats["validation_seconds"] += time.perf_counter() - start
 
-            # 5) Return the (validated) Command
             return result
 
+        wrapper.validation_stats = stats
         return wrapper
 
     return decorator
@@ -0,0 +1,151 @@
+"""
+Exact-match LLM response cache with record / replay.
+
+Every model built by `utils.get_llm_instance` gets this cache (LangChain looks it up before calling the
+model), so all LLM calls of the project, summaries, articles, supervisors, refactoring, are memoized in
+SQLite. The key is a sha256 of:
+  - the model configuration, the call parameters and the bound tool schemas (LangChain's `llm_string`)
+  - the normalized messages: type, name, content and tool calls, without message or tool call ids, which
+    change on every run
+The least recently used entries are evicted above `max_entries`.
+
+Modes (`LLMConfigs.llm_cache_mode`, env AGENT_LAB_LLM_CACHE_MODE):
+  - 'read_write': hits are served from the cache, misses call the model and are recorded
+  - 'replay':     hits are served from the cache, a miss raises LLMCacheMissError instead of calling
+                  the model (deterministic CI runs that never reach Azure)
+  - 'off':        no cache
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from conf.configs import Cfg
+
+MODES = ("off", "read_write", "replay")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key         TEXT PRIMARY KEY,
+    type        TEXT NOT NULL,
+    value       BLOB NOT NULL,
+    created_at  REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache (accessed_at);
+"""
+
+
+class LLMCacheMissError(RuntimeError):
+    """Raised in replay mode for a call that was never recorded."""
+
+
+def _normalize_message(message: Any) -> Any:
+    if not isinstance(message, dict) or "kwargs" not in message:
+        return message
+    kwargs = message["kwargs"]
+    return {"type": kwargs.get("type"), "name": kwargs.get("name"), "content": kwargs.get("content"),
+            "tool_calls": [{"name": c.get("name"), "args": c.get("args")} for c in kwargs.get("tool_calls", [])]}
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Chat prompts are serialized message lists; text prompts are kept as they are."""
+    try:
+        messages = json.loads(prompt)
+    except ValueError:
+        return prompt
+    if not isinstance(messages, list):
+        return prompt
+    return json.dumps([_normalize_message(m) for m in messages], sort_keys=True, default=str)
+
+
+class SqliteLLMCache(BaseCache):
+    def __init__(self, path: str, max_entries: int = 100_000, mode: str = "read_write"):
+        if mode not in MODES:
+            raise ValueError(f"Unknown LLM cache mode {mode!r}, expected one of {MODES}")
+        self.path = path
+        self.max_entries = max_entries
+        self.mode = mode
+        self.serde = JsonPlusSerializer()
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "evicted": 0}
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    @staticmethod
+    def make_key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}|{normalize_prompt(prompt)}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = self.make_key(prompt, llm_string)
+        with self._lock:
+            row = self._db.execute("SELECT type, value FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+            else:
+                self._db.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (time.time(), key))
+                self._db.commit()
+                self.stats["hits"] += 1
+        if row is None:
+            if self.mode == "replay":
+                raise LLMCacheMissError(f"LLM call not recorded in {self.path} (key {key[:12]}); "
+                                        "rerun with llm_cache_mode='read_write' to record it")
+            return None
+        return self.serde.loads_typed((row[0], row[1]))
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        if self.mode == "replay":
+            return
+        type_, blob = self.serde.dumps_typed(list(return_val))
+        now = time.time()
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?, ?)",
+                             (self.make_key(prompt, llm_string), type_, blob, now, now))
+            overflow = self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                cur = self._db.execute(
+                    "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY accessed_at LIMIT ?)",
+                    (overflow,),
+                )
+                self.stats["evicted"] += cur.rowcount
+            self._db.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+    def __bool__(self) -> bool:
+        # LangChain skips the cache if `model.cache` is falsy, which __len__ would make an empty cache
+        return True
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM llm_cache")
+            self._db.commit()
+
+
+_llm_cache: Optional[SqliteLLMCache] = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[SqliteLLMCache]:
+    """Process-wide LLM cache configured by `LLMConfigs`, or None when llm_cache_mode is 'off'."""
+    global _llm_cache
+    configs = Cfg().llm_configs
+    if configs.llm_cache_mode == "off":
+        return None
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = SqliteLLMCache(configs.llm_cache_path, max_entries=configs.llm_cache_max_entries,
+                                        mode=configs.llm_cache_mode)
+        return _llm_cache
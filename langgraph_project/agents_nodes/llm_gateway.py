@@ -0,0 +1,420 @@
+"""
+Process-wide gateway for Azure OpenAI calls.
+
+Every LLM client of `utils.get_llm_instance` sends its requests over the shared connection pool, and the
+gateway sits in that pool's transport, so it sees every call of every graph run in the process. It keeps
+the request rate at what the deployment accepts, instead of alternating between idle and bursts of 429s:
+  - AIMD concurrency limit per deployment: +1 in-flight request per window of successes, halved on a
+    429 / 503 / timeout or a response slower than `latency_target_seconds`. Requests above the limit wait
+    in a queue (`queue_depth`) rather than hitting the deployment.
+  - Retries of 429, 408 and 5xx responses, timeouts and connection errors, after the `Retry-After` /
+    `retry-after-ms` delay of the response if it has one, else exponential backoff with full jitter
+  - Circuit breaker per deployment: after `breaker_failures` consecutive failures (5xx, timeouts,
+    connection errors) requests fail fast with CircuitOpenError for `breaker_reset_seconds`, then one probe
+    request decides whether it closes again
+
+`get_llm_gateway().metrics()` reports, per deployment, the limit, in-flight and queued requests, breaker
+state and counters.
+"""
+import asyncio
+import logging
+import random
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from conf.configs import Cfg
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+# Signals that the deployment is saturated: the concurrency limit is decreased
+OVERLOAD_STATUSES = {429, 503}
+_DEPLOYMENT = re.compile(r"/deployments/([^/]+)/")
+
+
+class CircuitOpenError(httpx.TransportError):
+    """The deployment failed repeatedly; requests are rejected until the breaker resets."""
+
+
+def deployment_of(request: httpx.Request) -> str:
+    match = _DEPLOYMENT.search(request.url.path)
+    return match.group(1) if match else request.url.host
+
+
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """Delay asked by the server: Azure sends `retry-after-ms`, and `Retry-After` in seconds."""
+    for header, scale in (("retry-after-ms", 1e-3), ("retry-after", 1.0)):
+        value = response.headers.get(header)
+        if value is not None:
+            try:
+                return max(0.0, float(value) * scale)
+            except ValueError:  # an HTTP date: use backoff instead
+                return None
+    return None
+
+
+class AIMDLimiter:
+    def __init__(self, initial: int, min_limit: int = 1, max_limit: int = 64, decrease_factor: float = 0.5,
+                 cooldown_seconds: float = 1.0, clock: Callable[[], float] = time.monotonic):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.cooldown_seconds = cooldown_seconds
+        self.in_flight = 0
+        self.queue_depth = 0
+        self._clock = clock
+        self._last_decrease = float("-inf")
+        self._cond = threading.Condition()
+        self._async_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    def try_acquire(self) -> bool:
+        with self._cond:
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return True
+            return False
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        with self._cond:
+            self.queue_depth += 1
+            try:
+                if not self._cond.wait_for(lambda: self.in_flight < int(self.limit), timeout):
+                    return False
+                self.in_flight += 1
+                return True
+            finally:
+                self.queue_depth -= 1
+
+    async def acquire_async(self, timeout: Optional[float] = None) -> bool:
+        """`acquire` for coroutines: waits on the event loop, and a cancelled wait never holds a slot."""
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while True:
+            with self._cond:
+                if self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return True
+                waiter = (loop, loop.create_future())
+                self._async_waiters.append(waiter)
+                self.queue_depth += 1
+            try:
+                remaining = None if deadline is None else deadline - loop.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                await asyncio.wait_for(waiter[1], remaining)
+            except asyncio.TimeoutError:
+                return False
+            finally:
+                with self._cond:
+                    self.queue_depth -= 1
+                    if waiter in self._async_waiters:
+                        self._async_waiters.remove(waiter)
+
+    def _notify(self) -> None:
+        """Called holding the condition: wake a thread and every coroutine waiting for a slot (they retry)."""
+        self._cond.notify()
+        for loop, future in self._async_waiters:
+            try:
+                loop.call_soon_threadsafe(lambda f=future: f.done() or f.set_result(None))
+            except RuntimeError:  # the loop is closed
+                pass
+        self._async_waiters.clear()
+
+    def release(self) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            self._notify()
+
+    def on_success(self) -> None:
+        with self._cond:
+            # Additive increase: about +1 per `limit` successful requests
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self._notify()
+
+    def on_overload(self) -> bool:
+        """Multiplicative decrease, at most once per cooldown (one burst of 429s is one signal)."""
+        with self._cond:
+            now = self._clock()
+            if now - self._last_decrease < self.cooldown_seconds:
+                return False
+            self._last_decrease = now
+            self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+            return True
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self._clock = clock
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> Optional[str]:
+        """'request', 'probe' (the single request let through by a half open breaker) or None (rejected)."""
+        with self._lock:
+            if self.state == "closed":
+                return "request"
+            if self.state == "open" and self._clock() - self._opened_at >= self.reset_seconds:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._probing:
+                self._probing = True
+                return "probe"
+            return None
+
+    def abort_probe(self) -> None:
+        """The probe ended without an outcome (cancelled, or an unexpected error): let the next request probe."""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state, self.failures, self._probing = "closed", 0, False
+
+    def record_failure(self) -> bool:
+        """True if this failure opened the breaker."""
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                opened = self.state != "open"
+                self.state, self._opened_at = "open", self._clock()
+                return opened
+            return False
+
+
+class _Deployment:
+    def __init__(self, gateway: "LLMGateway"):
+        self.limiter = AIMDLimiter(gateway.initial_concurrency, gateway.min_concurrency, gateway.max_concurrency,
+                                   clock=gateway.clock)
+        self.breaker = CircuitBreaker(gateway.breaker_failures, gateway.breaker_reset_seconds, clock=gateway.clock)
+        self.counters = {"requests": 0, "succeeded": 0, "retries": 0, "throttled": 0, "failed": 0,
+                         "rejected": 0, "queue_timeouts": 0}
+        self._lock = threading.Lock()
+
+    def count(self, counter: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[counter] += n
+
+
+class LLMGateway:
+    def __init__(self, initial_concurrency: int = 8, min_concurrency: int = 1, max_concurrency: int = 64,
+                 latency_target_seconds: Optional[float] = 30.0, max_retries: int = 5,
+                 backoff_base_seconds: float = 0.5, backoff_max_seconds: float = 30.0,
+                 queue_timeout_seconds: Optional[float] = 120.0, breaker_failures: int = 5,
+                 breaker_reset_seconds: float = 30.0, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep, rng: Optional[random.Random] = None):
+        self.initial_concurrency = initial_concurrency
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.latency_target_seconds = latency_target_seconds
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.breaker_failures = breaker_failures
+        self.breaker_reset_seconds = breaker_reset_seconds
+        self.clock = clock
+        self.sleep = sleep
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._deployments: Dict[str, _Deployment] = {}
+
+    @classmethod
+    def from_configs(cls) -> "LLMGateway":
+        c = Cfg().llm_configs
+        return cls(
+            initial_concurrency=c.llm_gateway_initial_concurrency,
+            min_concurrency=c.llm_gateway_min_concurrency,
+            max_concurrency=c.llm_gateway_max_concurrency,
+            latency_target_seconds=c.llm_gateway_latency_target_seconds,
+            max_retries=c.llm_gateway_max_retries,
+            backoff_base_seconds=c.llm_gateway_backoff_base_seconds,
+            backoff_max_seconds=c.llm_gateway_backoff_max_seconds,
+            queue_timeout_seconds=c.llm_gateway_queue_timeout_seconds,
+            breaker_failures=c.llm_gateway_breaker_failures,
+            breaker_reset_seconds=c.llm_gateway_breaker_reset_seconds,
+        )
+
+    def deployment(self, name: str) -> _Deployment:
+        with self._lock:
+            if name not in self._deployments:
+                self._deployments[name] = _Deployment(self)
+            return self._deployments[name]
+
+    def metrics(self) -> Dict[str, dict]:
+        with self._lock:
+            deployments = dict(self._deployments)
+        return {name: {"limit": d.limiter.limit, "in_flight": d.limiter.in_flight,
+                       "queue_depth": d.limiter.queue_depth, "breaker": d.breaker.state, **dict(d.counters)}
+                for name, d in deployments.items()}
+
+    # ---- one attempt: admission, then the outcome ----
+
+    def _admit(self, name: str, d: _Deployment) -> bool:
+        """
+        Called holding a concurrency slot, which is released if the breaker rejects the request.
+        True if the request is the probe of a half open breaker.
+        """
+        admission = d.breaker.allow()
+        if admission is None:
+            d.limiter.release()
+            d.count("rejected")
+            raise CircuitOpenError(f"Circuit open for deployment {name!r}")
+        return admission == "probe"
+
+    def _queue_timeout(self, name: str, d: _Deployment):
+        d.count("queue_timeouts")
+        return httpx.PoolTimeout(f"Waited more than {self.queue_timeout_seconds}s for a slot of {name!r}")
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        retry_after = retry_after_seconds(response) if response is not None else None
+        if retry_after is not None:
+            # A little jitter, so that clients told the same delay do not come back together
+            return min(retry_after, self.backoff_max_seconds) * (1 + 0.1 * self._rng.random())
+        return self._rng.uniform(0, min(self.backoff_max_seconds, self.backoff_base_seconds * 2 ** attempt))
+
+    def _outcome(self, name: str, d: _Deployment, latency: float, response: Optional[httpx.Response],
+                 error: Optional[Exception]) -> bool:
+        """Update the limiter, breaker and counters; True if the attempt should be retried."""
+        status = response.status_code if response is not None else None
+        overloaded = status in OVERLOAD_STATUSES or isinstance(error, httpx.TimeoutException)
+        failed = error is not None or (status is not None and status >= 500)
+
+        if overloaded:
+            if status == 429:
+                d.count("throttled")
+            if d.limiter.on_overload():
+                logger.info("LLM gateway %s: overloaded (%s), concurrency limit -> %d",
+                            name, status or type(error).__name__, int(d.limiter.limit))
+        elif self.latency_target_seconds is not None and latency > self.latency_target_seconds:
+            d.limiter.on_overload()
+        elif not failed:
+            d.limiter.on_success()
+
+        if failed:
+            if d.breaker.record_failure():
+                logger.warning("LLM gateway %s: circuit opened after %d failures", name, d.breaker.failures)
+        else:  # the deployment answered (a 429 or 400 too): it is up
+            if d.breaker.state != "closed":
+                logger.info("LLM gateway %s: circuit closed", name)
+            d.breaker.record_success()
+
+        return status in RETRY_STATUSES or isinstance(error, (httpx.TimeoutException, httpx.NetworkError))
+
+    def _finish(self, d: _Deployment, response: Optional[httpx.Response], error: Optional[Exception]):
+        if error is not None:
+            d.count("failed")
+            raise error
+        d.count("succeeded" if response.status_code < 400 else "failed")
+        return response
+
+    # ---- sync ----
+
+    def send(self, request: httpx.Request, send: Callable[[httpx.Request], httpx.Response]) -> httpx.Response:
+        name = deployment_of(request)
+        d = self.deployment(name)
+        d.count("requests")
+        request.read()  # the body is sent again on retries
+        for attempt in range(self.max_retries + 1):
+            if not d.limiter.acquire(self.queue_timeout_seconds):
+                raise self._queue_timeout(name, d)
+            probe, done = self._admit(name, d), False
+            response, error, start = None, None, self.clock()
+            try:
+                try:
+                    response = send(request)
+                except httpx.TransportError as e:
+                    error = e
+                finally:
+                    d.limiter.release()
+                retry = self._outcome(name, d, self.clock() - start, response, error)
+                done = True
+            finally:
+                if probe and not done:
+                    d.breaker.abort_probe()
+            if not retry or attempt == self.max_retries:
+                return self._finish(d, response, error)
+            d.count("retries")
+            delay = self._backoff(attempt, response)
+            if response is not None:
+                response.close()
+            self.sleep(delay)
+
+    # ---- async ----
+
+    async def asend(self, request: httpx.Request, send) -> httpx.Response:
+        name = deployment_of(request)
+        d = self.deployment(name)
+        d.count("requests")
+        await request.aread()
+        for attempt in range(self.max_retries + 1):
+            if not await d.limiter.acquire_async(self.queue_timeout_seconds):
+                raise self._queue_timeout(name, d)
+            probe, done = self._admit(name, d), False
+            response, error, start = None, None, self.clock()
+            try:
+                try:
+                    response = await send(request)
+                except httpx.TransportError as e:
+                    error = e
+                finally:
+                    d.limiter.release()
+                retry = self._outcome(name, d, self.clock() - start, response, error)
+                done = True
+            finally:
+                if probe and not done:  # e.g. a cancelled hedge
+                    d.breaker.abort_probe()
+            if not retry or attempt == self.max_retries:
+                return self._finish(d, response, error)
+            d.count("retries")
+            delay = self._backoff(attempt, response)
+            if response is not None:
+                await response.aclose()
+            await asyncio.sleep(delay)
+
+
+class GatewayTransport(httpx.BaseTransport):
+    def __init__(self, transport: httpx.BaseTransport, gateway: LLMGateway):
+        self.transport = transport
+        self.gateway = gateway
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        return self.gateway.send(request, self.transport.handle_request)
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class AsyncGatewayTransport(httpx.AsyncBaseTransport):
+    def __init__(self, transport: httpx.AsyncBaseTransport, gateway: LLMGateway):
+        self.transport = transport
+        self.gateway = gateway
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self.gateway.asend(request, self.transport.handle_async_request)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+_gateway: Optional[LLMGateway] = None
+_gateway_lock = threading.Lock()
+
+
+def get_llm_gateway() -> LLMGateway:
+    """Return the process-wide LLM gateway configured by `LLMConfigs`."""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway.from_configs()
+        return _gateway
@@ -0,0 +1,196 @@
+"""
+Hedged LLM requests for short calls on the critical path.
+
+Routing (supervisor_node), sub-goal planning and query planning are short calls that every run waits on,
+and their p99 comes from the occasional slow response of the provider. A call site that opts in with
+`with_hedging(model, site)` gets a duplicate request once its call is slower than the site's
+`percentile` latency; the first response wins and the other one is dropped:
+  - the hedge delay is the `percentile` of the site's last `window` latencies (no hedging before
+    `min_samples` calls)
+  - hedges are capped by a budget: each call earns `budget` hedges (e.g. 0.05 = at most ~5% extra
+    requests), so a provider that is slow for everyone does not get twice the traffic
+  - `hedge_stats()` reports, per site, calls, hedged calls, how often the hedge won and how often the
+    budget stopped a hedge
+
+The call site travels as a request header set by `with_hedging`, which `HedgingTransport` (in the shared
+LLM connection pool, in front of the LLM gateway) removes before sending.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Optional
+
+import httpx
+
+from conf.configs import Cfg
+
+CALL_SITE_HEADER = "x-agent-lab-call-site"
+
+
+_hedged_models: Dict[tuple, tuple] = {}
+_hedged_lock = threading.Lock()
+
+
+def with_hedging(model, site: str):
+    """Copy of the chat model `model` whose requests are hedged with the policy of `site` (one copy per model and site)."""
+    with _hedged_lock:
+        if (id(model), site) not in _hedged_models:
+            headers = {**model.model_kwargs.get("extra_headers", {}), CALL_SITE_HEADER: site}
+            hedged = model.model_copy(update={"model_kwargs": {**model.model_kwargs, "extra_headers": headers}})
+            _hedged_models[id(model), site] = (model, hedged)  # keeps `model` alive, so its id is not reused
+        return _hedged_models[id(model), site][1]
+
+
+class HedgePolicy:
+    def __init__(self, percentile: float = 0.95, budget: float = 0.05, min_samples: int = 20, window: int = 200,
+                 max_budget: float = 5.0):
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.max_budget = max_budget
+        self.stats: Dict[str, int] = {"calls": 0, "hedged": 0, "hedge_wins": 0, "budget_exhausted": 0}
+        self._latencies = deque(maxlen=window)
+        self._tokens = 0.0
+        self._lock = threading.Lock()
+
+    def start(self) -> Optional[float]:
+        """Count a call; return the delay after which to hedge it (None: not enough samples yet)."""
+        with self._lock:
+            self.stats["calls"] += 1
+            self._tokens = min(self.max_budget, self._tokens + self.budget)
+            if len(self._latencies) < self.min_samples:
+                return None
+            latencies = sorted(self._latencies)
+            return latencies[int(self.percentile * (len(latencies) - 1))]
+
+    def try_hedge(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                self.stats["budget_exhausted"] += 1
+                return False
+            self._tokens -= 1
+            self.stats["hedged"] += 1
+            return True
+
+    def record(self, latency: float, hedge_won: bool = False) -> None:
+        with self._lock:
+            self._latencies.append(latency)
+            self.stats["hedge_wins"] += hedge_won
+
+
+_policies: Dict[str, HedgePolicy] = {}
+_policies_lock = threading.Lock()
+
+
+def get_hedge_policy(site: str) -> HedgePolicy:
+    with _policies_lock:
+        if site not in _policies:
+            c = Cfg().llm_configs
+            _policies[site] = HedgePolicy(c.llm_hedge_percentile, c.llm_hedge_budget, c.llm_hedge_min_samples,
+                                          c.llm_hedge_window)
+        return _policies[site]
+
+
+def hedge_stats() -> Dict[str, dict]:
+    with _policies_lock:
+        return {site: dict(policy.stats) for site, policy in _policies.items()}
+
+
+def _copy(request: httpx.Request) -> httpx.Request:
+    return httpx.Request(request.method, request.url, headers=request.headers, content=request.content,
+                         extensions=request.extensions)
+
+
+class HedgingTransport(httpx.BaseTransport):
+    """
+    Warmed-up calls of a hedged site run on `max_workers` threads (the primary request and its hedge);
+    size it for the concurrency the LLM gateway allows, so that calls do not queue for a thread.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, enabled: bool = True, max_workers: int = 128):
+        self.transport = transport
+        self.enabled = enabled
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="llm-hedge")
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        site = request.headers.pop(CALL_SITE_HEADER, None)
+        if site is None or not self.enabled:
+            return self.transport.handle_request(request)
+        policy = get_hedge_policy(site)
+        delay = policy.start()
+        # Latencies are those seen by the caller: from the start of the primary request, hedge delay included
+        start = time.monotonic()
+        if delay is None:
+            response = self.transport.handle_request(request)
+            policy.record(time.monotonic() - start)
+            return response
+
+        request.read()
+        primary = self._executor.submit(self.transport.handle_request, request)
+        if wait([primary], timeout=delay).done or not policy.try_hedge():
+            response = primary.result()
+            policy.record(time.monotonic() - start)
+            return response
+
+        hedge = self._executor.submit(self.transport.handle_request, _copy(request))
+        pending, error = {primary, hedge}, None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = error or future.exception()
+                    continue
+                policy.record(time.monotonic() - start, hedge_won=future is hedge)
+                for loser in pending:  # a sync request cannot be cancelled: close its response when it arrives
+                    loser.add_done_callback(lambda f: f.exception() is None and f.result().close())
+                return future.result()
+        raise error
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+        self.transport.close()
+
+
+class AsyncHedgingTransport(httpx.AsyncBaseTransport):
+    def __init__(self, transport: httpx.AsyncBaseTransport, enabled: bool = True):
+        self.transport = transport
+        self.enabled = enabled
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        site = request.headers.pop(CALL_SITE_HEADER, None)
+        if site is None or not self.enabled:
+            return await self.transport.handle_async_request(request)
+        policy = get_hedge_policy(site)
+        delay = policy.start()
+        start = time.monotonic()
+        if delay is None:
+            response = await self.transport.handle_async_request(request)
+            policy.record(time.monotonic() - start)
+            return response
+
+        await request.aread()
+        primary = asyncio.ensure_future(self.transport.handle_async_request(request))
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done or not policy.try_hedge():
+            response = await primary
+            policy.record(time.monotonic() - start)
+            return response
+
+        hedge = asyncio.ensure_future(self.transport.handle_async_request(_copy(request)))
+        pending, error = {primary, hedge}, None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    error = error or task.exception()
+                    continue
+                policy.record(time.monotonic() - start, hedge_won=task is hedge)
+                for loser in pending:
+                    loser.cancel()
+                return task.result()
+        raise error
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
@@ -0,0 +1,263 @@
+"""
+Latency-aware model routing per call site.
+
+`LLMConfigs.llm_routes` maps each call site (summarize, route, plan, write, refactor) to a role and to its
+candidate deployments, cheapest first (default: `LLMConfigs.llm_deployment` alone). `routed_llm(site)` is a
+chat model that, on every call:
+  - ranks the candidates by observed latency plus a penalty for their error rate (moving averages per
+    site and deployment, so a deployment is judged on the kind of calls it is compared on)
+  - prefers the cheapest candidate whose score is within `latency_tolerance` of the best one, and now and
+    then (`explore`) tries another one so that the scores of the others stay current
+  - falls back to the next candidate when a call fails (a stream falls back only before its first chunk)
+
+Candidates never observed are tried first, in the configured order; candidates that have only failed so far
+come after every candidate with a measured latency. `get_llm_router().metrics()` reports the scores, calls
+and errors per site and deployment.
+
+A routed model is a regular chat model: it can be cached, hedged (`llm_hedging.with_hedging`) and given to
+`make_agent`, and graphs that build their models once still route every call.
+"""
+import math
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from pydantic import ConfigDict, Field
+
+from conf.configs import Cfg
+
+
+class _Stats:
+    def __init__(self):
+        self.latency: Optional[float] = None  # moving average, seconds
+        self.error_rate = 0.0
+        self.calls = 0
+        self.errors = 0
+
+
+class LLMRouter:
+    def __init__(self, routes: Dict[str, dict], explore: float = 0.05, latency_tolerance: float = 0.25,
+                 error_penalty_seconds: float = 30.0, alpha: float = 0.2, rng: Optional[random.Random] = None,
+                 default_deployment: Optional[str] = None):
+        self.routes = routes
+        self.default_deployment = default_deployment
+        self.explore = explore
+        self.latency_tolerance = latency_tolerance
+        self.error_penalty_seconds = error_penalty_seconds
+        self.alpha = alpha
+        self._rng = rng or random.Random()
+        self._stats: Dict[Tuple[str, str], _Stats] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_configs(cls) -> "LLMRouter":
+        c = Cfg().llm_configs
+        return cls(c.llm_routes, explore=c.llm_router_explore, latency_tolerance=c.llm_router_latency_tolerance,
+                   error_penalty_seconds=c.llm_router_error_penalty_seconds, alpha=c.llm_router_ewma_alpha,
+                   default_deployment=c.llm_deployment)
+
+    def route(self, site: str) -> dict:
+        if site not in self.routes:
+            raise ValueError(f"Unknown LLM call site {site!r}, expected one of {sorted(self.routes)}")
+        route = self.routes[site]
+        if not route.get("deployments"):
+            if self.default_deployment is None:
+                raise ValueError(f"LLM call site {site!r} has no deployments and there is no default deployment")
+            route = {**route, "deployments": [self.default_deployment]}
+        return route
+
+    def _score(self, stats: _Stats) -> float:
+        if stats.latency is None:  # only failures so far: behind every deployment that has answered
+            return math.inf
+        return stats.latency + stats.error_rate * self.error_penalty_seconds
+
+    def rank(self, site: str) -> List[str]:
+        """Deployments of `site` in the order they should be tried."""
+        deployments = list(self.route(site)["deployments"])
+        with self._lock:
+            stats = {d: self._stats.get((site, d)) for d in deployments}
+            unobserved = [d for d in deployments if stats[d] is None]
+            observed = sorted((d for d in deployments if d not in unobserved), key=lambda d: self._score(stats[d]))
+            if observed:
+                best = self._score(stats[observed[0]])
+                # The cheapest (first configured) deployment that is about as good as the best one
+                preferred = next(d for d in deployments if d in observed
+                                 and self._score(stats[d]) <= best * (1 + self.latency_tolerance))
+                observed.remove(preferred)
+                observed.insert(0, preferred)
+                if len(observed) > 1 and self._rng.random() < self.explore:
+                    observed.insert(0, observed.pop(self._rng.randrange(1, len(observed))))
+        return unobserved + observed
+
+    def record(self, site: str, deployment: str, latency: Optional[float], ok: bool) -> None:
+        with self._lock:
+            stats = self._stats.setdefault((site, deployment), _Stats())
+            stats.calls += 1
+            stats.errors += not ok
+            stats.error_rate += self.alpha * ((not ok) - stats.error_rate)
+            if ok:
+                stats.latency = latency if stats.latency is None else stats.latency + self.alpha * (latency - stats.latency)
+
+    def metrics(self) -> Dict[str, Dict[str, dict]]:
+        with self._lock:
+            metrics: Dict[str, Dict[str, dict]] = {}
+            for (site, deployment), s in self._stats.items():
+                metrics.setdefault(site, {})[deployment] = {
+                    "latency": s.latency, "error_rate": s.error_rate, "calls": s.calls, "errors": s.errors,
+                    "score": self._score(s)}
+            return metrics
+
+    def model(self, site: str, load: Optional[Callable[[str, str], BaseChatModel]] = None,
+              **kwargs: Any) -> "RoutedChatModel":
+        """Chat model routing the calls of `site`; `load(role, deployment)` builds a candidate (default: utils.get_llm)."""
+        route = self.route(site)
+        return RoutedChatModel(site=site, role=route.get("role", "default"),
+                               deployments=tuple(route["deployments"]), router=self, load=load, **kwargs)
+
+
+class RoutedChatModel(BaseChatModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    site: str
+    role: str = "default"
+    deployments: Tuple[str, ...] = ()
+    model_kwargs: Dict[str, Any] = Field(default_factory=dict)  # passed to every candidate (e.g. extra_headers)
+    router: Any = Field(default=None, exclude=True)
+    load: Any = Field(default=None, exclude=True)
+
+    @property
+    def _llm_type(self) -> str:
+        return "routed-chat"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"site": self.site, "role": self.role, "deployments": list(self.deployments),
+                "model_kwargs": self.model_kwargs}
+
+    @property
+    def deployment_name(self) -> str:
+        return "|".join(self.deployments)
+
+    def _candidate(self, deployment: str) -> BaseChatModel:
+        if self.load is not None:
+            return self.load(self.role, deployment)
+        from utils import get_llm
+
+        return get_llm(self.role, deployment)
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        # The candidates share the request format of their provider, so any of them formats the tools
+        bound = self._candidate(self.deployments[0]).bind_tools(tools, **kwargs)
+        return self.bind(**bound.kwargs)
+
+    def _attempts(self) -> Iterator[Tuple[str, BaseChatModel]]:
+        for deployment in self.router.rank(self.site):
+            yield deployment, self._candidate(deployment)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None,
+                  **kwargs: Any) -> ChatResult:
+        error = None
+        for deployment, model in self._attempts():
+            start = time.monotonic()
+            try:
+                result = model._generate(messages, stop=stop, run_manager=run_manager, **self.model_kwargs, **kwargs)
+            except Exception as e:
+                self.router.record(self.site, deployment, None, ok=False)
+                error = error or e
+                continue
+            self.router.record(self.site, deployment, time.monotonic() - start, ok=True)
+            return result
+        raise error
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None,
+                         **kwargs: Any) -> ChatResult:
+        error = None
+        for deployment, model in self._attempts():
+            start = time.monotonic()
+            try:
+                result = await model._agenerate(messages, stop=stop, run_manager=run_manager, **self.model_kwargs,
+                                                **kwargs)
+            except Exception as e:
+                self.router.record(self.site, deployment, None, ok=False)
+                error = error or e
+                continue
+            self.router.record(self.site, deployment, time.monotonic() - start, ok=True)
+            return result
+        raise error
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None,
+                **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        error = None
+        for deployment, model in self._attempts():
+            start, started = time.monotonic(), False
+            try:
+                for chunk in model._stream(messages, stop=stop, run_manager=run_manager, **self.model_kwargs, **kwargs):
+                    started = True
+                    yield chunk
+            except Exception as e:
+                self.router.record(self.site, deployment, None, ok=False)
+                if started:
+                    raise
+                error = error or e
+                continue
+            self.router.record(self.site, deployment, time.monotonic() - start, ok=True)
+            return
+        raise error
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None,
+                       **kwargs: Any):
+        error = None
+        for deployment, model in self._attempts():
+            start, started = time.monotonic(), False
+            try:
+                async for chunk in model._astream(messages, stop=stop, run_manager=run_manager, **self.model_kwargs,
+                                                  **kwargs):
+                    started = True
+                    yield chunk
+            except Exception as e:
+                self.router.record(self.site, deployment, None, ok=False)
+                if started:
+                    raise
+                error = error or e
+                continue
+            self.router.record(self.site, deployment, time.monotonic() - start, ok=True)
+            return
+        raise error
+
+
+_router: Optional[LLMRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_llm_router() -> LLMRouter:
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = LLMRouter.from_configs()
+        return _router
+
+
+_routed: Dict[str, BaseChatModel] = {}
+
+
+def routed_llm(site: str) -> BaseChatModel:
+    """
+    The shared chat model of the call site `site` (see LLMConfigs.llm_routes).
+
+    With the router off (LLMConfigs.use_llm_router), the role model of the site on its default deployment.
+    """
+    from utils import get_llm
+    from langgraph_project.agents_nodes.llm_cache import get_llm_cache
+
+    c = Cfg().llm_configs
+    if not c.use_llm_router:
+        return get_llm(get_llm_router().route(site).get("role", "default"))
+    router = get_llm_router()
+    with _router_lock:
+        if site not in _routed:
+            _routed[site] = router.model(site, cache=get_llm_cache())
+        return _routed[site]
@@ -0,0 +1,158 @@
+"""
+Token-budgeted message window for long threads.
+
+Under a checkpointer every message of a thread is kept forever and re-sent to the LLM on every turn.
+`MessageWindow` is a graph stage that, once a thread's messages exceed `max_tokens`, keeps the most
+recent messages that fit in `target_tokens` and folds the older ones into a single rolling summary
+message at the top of the thread. Token counts are cached per message, and every turn reports how
+many prompt tokens the window saved compared to sending the full history.
+
+Attach it in front of the node that calls the LLM:
+
+    window = MessageWindow(llm)
+    attach_message_window(graph_builder, window, before="chatbot")
+"""
+import json
+import logging
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from langchain_core.messages import AnyMessage, HumanMessage, RemoveMessage, SystemMessage, ToolMessage
+from langgraph.graph import StateGraph
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
+
+from conf.configs import Cfg
+from langgraph_project.tools.summarization import token_counter
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_ID = "message_window_summary"
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+# Rough per-message overhead of the chat format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_TEMPLATE = (
+    "You maintain a running summary of a conversation between a user and an AI assistant.\n"
+    "Current summary:\n{summary}\n\n"
+    "New messages to fold into the summary:\n{messages}\n\n"
+    "Write the updated summary (max {max_length} tokens). Keep facts, decisions, open questions and "
+    "tool results that later turns may need. Return only the summary."
+)
+
+
+def _message_text(m: AnyMessage) -> str:
+    content = m.content if isinstance(m.content, str) else json.dumps(m.content)
+    tool_calls = getattr(m, "tool_calls", None)
+    if tool_calls:
+        content += " " + json.dumps([{"name": c["name"], "args": c["args"]} for c in tool_calls])
+    return content
+
+
+class MessageWindow:
+    def __init__(
+            self,
+            llm,
+            max_tokens: Optional[int] = None,
+            target_tokens: Optional[int] = None,
+            summary_max_tokens: Optional[int] = None,
+            length_function: Optional[Callable[[str], int]] = None,
+            cache_size: int = 10_000,
+    ):
+        configs = Cfg().memory_configs
+        self.llm = llm
+        self.max_tokens = max_tokens or configs.window_max_tokens
+        self.target_tokens = min(target_tokens or configs.window_target_tokens, self.max_tokens)
+        self.summary_max_tokens = summary_max_tokens or configs.window_summary_max_tokens
+        self.length_function = length_function or token_counter(configs.token_encoding)
+        self.cache_size = cache_size
+        # Per turn: tokens of the full history, of the window actually kept, and the difference
+        self.turn_stats: Deque[Dict[str, int]] = deque(maxlen=1000)
+        self._counts: "OrderedDict[Tuple[str, int], int]" = OrderedDict()
+
+    # ---------------
+    # TOKEN COUNTING
+    # ---------------
+    def count(self, m: AnyMessage) -> int:
+        text = _message_text(m)
+        key = (m.id, len(text))
+        if m.id is not None and key in self._counts:
+            self._counts.move_to_end(key)
+            return self._counts[key]
+        n = self.length_function(text) + MESSAGE_OVERHEAD_TOKENS
+        if m.id is not None:
+            self._counts[key] = n
+            if len(self._counts) > self.cache_size:
+                self._counts.popitem(last=False)
+        return n
+
+    # -------
+    # WINDOW
+    # -------
+    def _split(self, messages: List[AnyMessage], counts: List[int]) -> int:
+        """Index of the first message kept: the most recent messages that fit in target_tokens."""
+        start, kept = len(messages), 0
+        while start > 0 and kept + counts[start - 1] <= self.target_tokens:
+            start -= 1
+            kept += counts[start]
+        start = min(start, len(messages) - 1)  # always keep the last message
+        # Never separate tool results from the AI message that requested them
+        while start > 0 and isinstance(messages[start], ToolMessage):
+            start -= 1
+        return start
+
+    def _summarize(self, summary: str, old: List[AnyMessage]) -> str:
+        rendered = "\n".join(f"{m.name or m.type}: {_message_text(m)}" for m in old)
+        prompt = SUMMARY_TEMPLATE.format(
+            summary=summary or "(empty)", messages=rendered, max_length=self.summary_max_tokens
+        )
+        return self.llm.invoke([HumanMessage(content=prompt)]).content
+
+    def __call__(self, state) -> Dict[str, List[AnyMessage]]:
+        messages = list(state.get("messages", []))
+        summary_msg = messages[0] if messages and messages[0].id == SUMMARY_ID else None
+        if summary_msg is not None:
+            messages = messages[1:]
+        folded = summary_msg.additional_kwargs.get("folded_tokens", 0) if summary_msg else 0
+
+        counts = [self.count(m) for m in messages]
+        window_tokens = sum(counts) + (self.count(summary_msg) if summary_msg else 0)
+        update: Dict[str, List[AnyMessage]] = {}
+
+        if window_tokens > self.max_tokens:
+            start = self._split(messages, counts)
+            if start > 0:
+                previous = summary_msg.content[len(SUMMARY_PREFIX):] if summary_msg else ""
+                folded += sum(counts[:start])
+                summary_msg = SystemMessage(
+                    content=SUMMARY_PREFIX + self._summarize(previous, messages[:start]),
+                    id=SUMMARY_ID,
+                    additional_kwargs={"folded_tokens": folded},
+                )
+                kept = messages[start:]
+                update["messages"] = [RemoveMessage(id=REMOVE_ALL_MESSAGES), summary_msg] + kept
+                window_tokens = self.count(summary_msg) + sum(counts[start:])
+                logger.info("Message window: folded %d messages into the summary", start)
+
+        full_tokens = window_tokens - (self.count(summary_msg) if summary_msg else 0) + folded
+        stats = {"full_tokens": full_tokens, "window_tokens": window_tokens,
+                 "tokens_saved": full_tokens - window_tokens}
+        self.turn_stats.append(stats)
+        logger.info("Message window: %(window_tokens)d prompt tokens instead of %(full_tokens)d "
+                    "(%(tokens_saved)d saved)", stats)
+        return update
+
+
+def attach_message_window(
+        builder: StateGraph, window: MessageWindow, before: str, name: str = "message_window"
+) -> None:
+    """
+    Insert `window` as a node in front of `before`: plain edges into `before` are redirected through it.
+
+    Conditional edges and Command(goto=...) that target `before` are not redirected; point them at `name`.
+    """
+    builder.add_node(name, window)
+    for start, end in list(builder.edges):
+        if end == before:
+            builder.edges.remove((start, end))
+            builder.edges.add((start, name))
+    builder.add_edge(name, before)
@@ -0,0 +1,153 @@
+"""
+Durable node memoization for resumable graph runs.
+
+LangGraph can skip a node whose input was seen before (`add_node(..., cache_policy=CachePolicy(key_func))`
+plus `compile(cache=...)`): the node's writes, including `Command(goto=...)` and `Send`s, are replayed
+instead of running it. This module makes that usable across reruns and processes:
+  - `SqliteNodeCache`: a LangGraph `BaseCache` stored in SQLite (the bundled one only lives in RAM)
+  - `state_cache_key(*fields)`: a key over the fields a node actually reads. Messages are hashed by
+    role and content, not by id, so a rerun of the same topic (new message ids) hits the cache.
+
+Only nodes that succeed are cached, so after a failure in `writing_node` a rerun replays the planning and
+research nodes and resumes at the failed step:
+
+    builder.add_node("research_node", research_node, cache_policy=node_cache_policy("topic", "messages"))
+    graph = builder.compile(cache=get_node_cache())
+
+Invalidation: `graph.clear_cache(["research_node"])` for some nodes, `graph.clear_cache()` for all, a
+`ttl_seconds`, or a new `version` in the node's key function after changing its prompt or logic.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Mapping, Optional, Sequence
+
+from langchain_core.messages import BaseMessage
+from langgraph.cache.base import BaseCache, FullKey, Namespace
+from langgraph.types import CachePolicy
+from pydantic import BaseModel
+
+from conf.configs import Cfg
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS node_cache (
+    ns         TEXT NOT NULL,     -- ("__pregel_ns_writes", node identifier, node name) joined with "|"
+    key        TEXT NOT NULL,
+    type       TEXT NOT NULL,
+    value      BLOB NOT NULL,
+    created_at REAL NOT NULL,
+    expiry     REAL,              -- NULL: never expires
+    PRIMARY KEY (ns, key)
+) WITHOUT ROWID;
+"""
+
+
+def _canonical(value: Any) -> Any:
+    """JSON-able form of a state value that ignores message ids (they change on every run)."""
+    if isinstance(value, BaseMessage):
+        return {"type": value.type, "name": value.name, "content": value.content,
+                "tool_calls": [{"name": c["name"], "args": c["args"]} for c in getattr(value, "tool_calls", [])]}
+    if isinstance(value, BaseModel):
+        return _canonical(value.model_dump())
+    if isinstance(value, Mapping):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    return value
+
+
+def state_cache_key(*fields: str, version: Any = 1) -> Callable[[Any], str]:
+    """Key function over `fields` of the node input (all fields if none are given)."""
+
+    def key_func(state) -> str:
+        data = state.model_dump() if isinstance(state, BaseModel) else dict(state)
+        selected = {f: data.get(f) for f in fields} if fields else data
+        payload = json.dumps([version, _canonical(selected)], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    return key_func
+
+
+def node_cache_policy(*fields: str, version: Any = 1, ttl_seconds: Optional[int] = None) -> CachePolicy:
+    ttl = ttl_seconds if ttl_seconds is not None else Cfg().checkpoint_configs.node_cache_ttl_seconds
+    return CachePolicy(key_func=state_cache_key(*fields, version=version), ttl=ttl)
+
+
+class SqliteNodeCache(BaseCache):
+    def __init__(self, path: str, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "expired": 0}
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    @staticmethod
+    def _ns(ns: Namespace) -> str:
+        return "|".join(ns)
+
+    def get(self, keys: Sequence[FullKey]) -> Dict[FullKey, Any]:
+        now = time.time()
+        values = {}
+        with self._lock:
+            for ns, key in keys:
+                row = self._db.execute("SELECT type, value, expiry FROM node_cache WHERE ns = ? AND key = ?",
+                                       (self._ns(ns), key)).fetchone()
+                if row is None:
+                    self.stats["misses"] += 1
+                elif row[2] is not None and row[2] <= now:
+                    self._db.execute("DELETE FROM node_cache WHERE ns = ? AND key = ?", (self._ns(ns), key))
+                    self._db.commit()
+                    self.stats["expired"] += 1
+                    self.stats["misses"] += 1
+                else:
+                    self.stats["hits"] += 1
+                    values[(ns, key)] = self.serde.loads_typed((row[0], row[1]))
+        return values
+
+    def set(self, pairs: Mapping[FullKey, tuple]) -> None:
+        now = time.time()
+        rows = []
+        for (ns, key), (value, ttl) in pairs.items():
+            type_, blob = self.serde.dumps_typed(value)
+            rows.append((self._ns(ns), key, type_, blob, now, now + ttl if ttl is not None else None))
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO node_cache VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._db.commit()
+
+    def clear(self, namespaces: Optional[Sequence[Namespace]] = None) -> None:
+        with self._lock:
+            if namespaces is None:
+                self._db.execute("DELETE FROM node_cache")
+            else:
+                self._db.executemany("DELETE FROM node_cache WHERE ns = ?", [(self._ns(ns),) for ns in namespaces])
+            self._db.commit()
+
+    async def aget(self, keys: Sequence[FullKey]) -> Dict[FullKey, Any]:
+        return await asyncio.to_thread(self.get, keys)
+
+    async def aset(self, pairs: Mapping[FullKey, tuple]) -> None:
+        await asyncio.to_thread(self.set, pairs)
+
+    async def aclear(self, namespaces: Optional[Sequence[Namespace]] = None) -> None:
+        await asyncio.to_thread(self.clear, namespaces)
+
+
+_node_cache: Optional[SqliteNodeCache] = None
+_node_cache_lock = threading.Lock()
+
+
+def get_node_cache() -> SqliteNodeCache:
+    """Process-wide node cache at `CheckpointConfigs.node_cache_path`."""
+    global _node_cache
+    with _node_cache_lock:
+        if _node_cache is None:
+            _node_cache = SqliteNodeCache(Cfg().checkpoint_configs.node_cache_path)
+        return _node_cache
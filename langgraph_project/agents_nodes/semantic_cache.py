@@ -0,0 +1,290 @@
+"""
+Semantic LLM response cache for near-duplicate prompts.
+
+The exact-match cache (llm_cache.py) misses when a user rephrases a request. At call sites whose answers
+only depend on the intent of the prompt (supervisor routing, planning), `SemanticLLMCache` serves the
+response of a previous prompt whose embedding is close enough instead:
+  - the normalized prompt (message types and contents, no ids) is embedded and looked up in a local
+    float32 vector index, a memory-mapped NumPy file (`<scope>.npy`), by cosine similarity
+  - a hit needs the same model configuration, params and tools (LangChain's `llm_string`) and a similarity
+    of at least `threshold`
+  - entries (response, prompt, last access) live in SQLite (`<scope>.sqlite`); above `max_entries`, the
+    least recently used slot of the index is reused
+
+Each call site has its own scope, so a routing answer is never served to a planner:
+
+    model = semantic_llm("supervisor")
+    result = model.invoke(messages)
+    if answer_is_unusable(result):
+        get_semantic_cache("supervisor").report_false_hit(result)
+
+Hits carry `response_metadata["semantic_cache"]` (scope, entry id, similarity); `report_false_hit` drops
+the entry and counts it in the false-hit telemetry. One process writes a scope directory at a time.
+
+`semantic_llm` chains the semantic cache behind the exact-match cache of the model (`ChainedLLMCache`):
+exact hits come first, every response is recorded in both, and in replay mode a prompt found in neither
+still raises LLMCacheMissError instead of calling the model.
+"""
+import functools
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from conf.configs import Cfg
+from langgraph_project.agents_nodes.llm_cache import LLMCacheMissError, normalize_prompt
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    slot        INTEGER PRIMARY KEY,  -- row of the vector index
+    id          TEXT NOT NULL,
+    llm_hash    TEXT NOT NULL,        -- sha256 of the llm_string: only the same model / params / tools match
+    prompt      TEXT NOT NULL,
+    type        TEXT NOT NULL,
+    value       BLOB NOT NULL,
+    created_at  REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    hits        INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_entries_llm ON entries (llm_hash);
+CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed_at);
+"""
+
+
+def prompt_text(prompt: str) -> str:
+    """The text that is embedded: one "<type>: <content>" line per message."""
+    normalized = normalize_prompt(prompt)
+    try:
+        messages = json.loads(normalized)
+    except ValueError:
+        return prompt
+    if not isinstance(messages, list):
+        return prompt
+    return "\n".join(f"{m.get('type')}: {m.get('content')}" if isinstance(m, dict) else str(m) for m in messages)
+
+
+class SemanticLLMCache(BaseCache):
+    def __init__(self, directory: str, scope: str, embed: Callable[[List[str]], Sequence[Sequence[float]]],
+                 threshold: float = 0.95, max_entries: int = 10_000, embed_max_chars: int = 24_000):
+        self.directory = directory
+        self.scope = scope
+        self.embed = embed
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.embed_max_chars = embed_max_chars
+        self.serde = JsonPlusSerializer()
+        # false_hits: hits reported as wrong by the call site; similarity_sum / hits is the mean hit similarity
+        self.stats: Dict[str, float] = {"lookups": 0, "hits": 0, "misses": 0, "false_hits": 0, "evicted": 0,
+                                        "similarity_sum": 0.0}
+
+        os.makedirs(directory, exist_ok=True)
+        self._vectors_path = os.path.join(directory, f"{scope}.npy")
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(directory, f"{scope}.sqlite"), timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        self._vectors: Optional[np.memmap] = None
+        if os.path.exists(self._vectors_path):
+            self._vectors = np.load(self._vectors_path, mmap_mode="r+")
+        used = {r[0] for r in self._db.execute("SELECT slot FROM entries")}
+        self._next_slot = max(used) + 1 if used else 0
+        self._free = sorted(set(range(self._next_slot)) - used, reverse=True)
+        # Embeddings of recent misses, reused when the model's response is stored
+        self._pending: Dict[str, np.ndarray] = {}
+
+    @property
+    def hit_rate(self) -> float:
+        return self.stats["hits"] / self.stats["lookups"] if self.stats["lookups"] else 0.0
+
+    @property
+    def false_hit_rate(self) -> float:
+        return self.stats["false_hits"] / self.stats["hits"] if self.stats["hits"] else 0.0
+
+    def _embed(self, prompt: str) -> np.ndarray:
+        text = prompt_text(prompt)[:self.embed_max_chars]
+        vector = np.asarray(self.embed([text])[0], dtype=np.float32)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        query = self._embed(prompt)
+        llm_hash = hashlib.sha256(llm_string.encode("utf-8")).hexdigest()
+        with self._lock:
+            self.stats["lookups"] += 1
+            slots = [r[0] for r in self._db.execute("SELECT slot FROM entries WHERE llm_hash = ?", (llm_hash,))]
+            best, similarity = None, -1.0
+            if slots and self._vectors is not None and self._vectors.shape[1] == query.shape[0]:
+                similarities = self._vectors[slots] @ query
+                i = int(np.argmax(similarities))
+                best, similarity = slots[i], float(similarities[i])
+            if best is None or similarity < self.threshold:
+                self.stats["misses"] += 1
+                if len(self._pending) >= 1024:
+                    self._pending.pop(next(iter(self._pending)))
+                self._pending[self._pending_key(prompt, llm_hash)] = query
+                return None
+
+            entry_id, type_, value = self._db.execute(
+                "SELECT id, type, value FROM entries WHERE slot = ?", (best,)).fetchone()
+            self._db.execute("UPDATE entries SET accessed_at = ?, hits = hits + 1 WHERE slot = ?", (time.time(), best))
+            self._db.commit()
+            self.stats["hits"] += 1
+            self.stats["similarity_sum"] += similarity
+
+        generations = self.serde.loads_typed((type_, value))
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            if message is not None:
+                message.response_metadata["semantic_cache"] = {"scope": self.scope, "id": entry_id,
+                                                               "similarity": similarity}
+        return generations
+
+    @staticmethod
+    def _pending_key(prompt: str, llm_hash: str) -> str:
+        return hashlib.sha256(f"{llm_hash}|{prompt}".encode("utf-8")).hexdigest()
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        llm_hash = hashlib.sha256(llm_string.encode("utf-8")).hexdigest()
+        with self._lock:
+            vector = self._pending.pop(self._pending_key(prompt, llm_hash), None)
+        if vector is None:
+            vector = self._embed(prompt)
+        type_, blob = self.serde.dumps_typed(list(return_val))
+        now = time.time()
+
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.lib.format.open_memmap(self._vectors_path, mode="w+", dtype=np.float32,
+                                                          shape=(self.max_entries, vector.shape[0]))
+            if self._vectors.shape[1] != vector.shape[0]:
+                logger.warning("Semantic cache %s: index of dimension %d, embedding of dimension %d (new "
+                               "embeddings model?); clear() it to cache again", self.scope,
+                               self._vectors.shape[1], vector.shape[0])
+                return
+            slot = self._allocate_slot()
+            self._vectors[slot] = vector
+            self._vectors.flush()
+            self._db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)",
+                             (slot, uuid.uuid4().hex, llm_hash, prompt_text(prompt), type_, blob, now, now))
+            self._db.commit()
+
+    def _allocate_slot(self) -> int:
+        if self._free:
+            return self._free.pop()
+        if self._next_slot < min(self.max_entries, self._vectors.shape[0]):
+            self._next_slot += 1
+            return self._next_slot - 1
+        slot = self._db.execute("SELECT slot FROM entries ORDER BY accessed_at LIMIT 1").fetchone()[0]
+        self._db.execute("DELETE FROM entries WHERE slot = ?", (slot,))
+        self.stats["evicted"] += 1
+        return slot
+
+    def report_false_hit(self, result) -> bool:
+        """Drop the entry that answered `result` (an AIMessage or generation); False if it was not a hit."""
+        message = getattr(result, "message", result)
+        hit = getattr(message, "response_metadata", {}).get("semantic_cache")
+        if not hit or hit["scope"] != self.scope:
+            return False
+        with self._lock:
+            row = self._db.execute("SELECT slot FROM entries WHERE id = ?", (hit["id"],)).fetchone()
+            if row is not None:
+                self._db.execute("DELETE FROM entries WHERE slot = ?", row)
+                self._db.commit()
+                self._free.append(row[0])
+            self.stats["false_hits"] += 1
+        logger.warning("Semantic cache %s: false hit at similarity %.3f", self.scope, hit["similarity"])
+        return True
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def __bool__(self) -> bool:
+        # LangChain skips the cache if `model.cache` is falsy, which __len__ would make an empty cache
+        return True
+
+    def clear(self, **kwargs) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM entries")
+            self._db.commit()
+            self._next_slot, self._free = 0, []
+            if self._vectors is not None:
+                del self._vectors
+                self._vectors = None
+                os.remove(self._vectors_path)
+
+
+_semantic_caches: Dict[str, SemanticLLMCache] = {}
+_semantic_caches_lock = threading.Lock()
+
+
+class ChainedLLMCache(BaseCache):
+    """The exact-match cache `exact` (its replay mode included), then the semantic cache `semantic`."""
+
+    def __init__(self, exact: BaseCache, semantic: SemanticLLMCache):
+        self.exact = exact
+        self.semantic = semantic
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        try:
+            hit = self.exact.lookup(prompt, llm_string)
+        except LLMCacheMissError:  # replay: a recorded near-duplicate is still a replayed answer
+            hit = self.semantic.lookup(prompt, llm_string)
+            if hit is None:
+                raise
+            return hit
+        return hit if hit is not None else self.semantic.lookup(prompt, llm_string)
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        self.exact.update(prompt, llm_string, return_val)
+        self.semantic.update(prompt, llm_string, return_val)
+
+    def __bool__(self) -> bool:
+        return True
+
+    def clear(self, **kwargs: Any) -> None:
+        self.exact.clear(**kwargs)
+        self.semantic.clear(**kwargs)
+
+
+def get_semantic_cache(scope: str) -> SemanticLLMCache:
+    """Process-wide semantic cache of the call site `scope`, configured by `LLMConfigs`."""
+    with _semantic_caches_lock:
+        if scope not in _semantic_caches:
+            from utils import get_embeddings
+
+            configs = Cfg().llm_configs
+            _semantic_caches[scope] = SemanticLLMCache(
+                configs.semantic_cache_dir, scope,
+                embed=lambda texts: get_embeddings().embed_documents(texts),
+                threshold=configs.semantic_cache_thresholds.get(scope, configs.semantic_cache_threshold),
+                max_entries=configs.semantic_cache_max_entries,
+                embed_max_chars=configs.semantic_cache_embed_max_chars,
+            )
+        return _semantic_caches[scope]
+
+
+@functools.lru_cache(maxsize=None)
+def semantic_llm(scope: str, role: str = "default", site: Optional[str] = None):
+    """
+    `get_llm(role)`, or the routed model of the call site `site`, whose responses are also served from the
+    semantic cache of `scope` (after its exact-match cache).
+    """
+    from utils import get_llm
+    from langgraph_project.agents_nodes.llm_router import routed_llm
+
+    model = routed_llm(site) if site is not None else get_llm(role)
+    cache = get_semantic_cache(scope)
+    if isinstance(model.cache, BaseCache):
+        cache = ChainedLLMCache(model.cache, cache)
+    return model.model_copy(update={"cache": cache})
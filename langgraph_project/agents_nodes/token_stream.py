@@ -0,0 +1,102 @@
+"""
+Token streaming of generated text through graph custom stream events.
+
+`generate_article` (tools.py) streams the article from the LLM and emits each token as a custom event
+`{"article_token": token}`, so callers no longer see nothing until the whole article is written. The final
+state still holds the complete article. When streaming, the writing nodes call `generate_article` directly
+(`make_writing_node(..., direct=True)`): through the writing agent, the first token would only come after
+the agent's own completion, which repeats every summary as tool arguments.
+
+Run a graph with `stream_to_sink(graph, inputs, sink)` to write the tokens as they arrive to a file, a
+socket (`sock.makefile("w")`) or any callable; it returns the final state:
+
+    with open("article.md", "w") as f:
+        state = stream_to_sink(graph, {"topic": "..."}, f)
+
+Outside of a graph run nothing is emitted.
+"""
+import time
+from typing import Any, Callable, Dict, IO, Optional, Union
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables.config import ensure_config, merge_configs
+
+ARTICLE_TOKEN = "article_token"
+
+Sink = Union[IO[str], Callable[[str], Any]]
+
+
+def get_token_writer(event: str = ARTICLE_TOKEN) -> Optional[Callable[[str], None]]:
+    """Writer emitting `{event: token}` custom events of the running graph (a no-op outside of a graph run, None outside of any run)."""
+    from langgraph.config import get_stream_writer
+
+    try:
+        writer = get_stream_writer()
+    except RuntimeError:
+        return None
+    return lambda token: writer({event: token})
+
+
+class TokenStreamHandler(BaseCallbackHandler):
+    """Callback handler passing every new LLM token to `write` (and counting them)."""
+
+    def __init__(self, write: Callable[[str], None]):
+        self.write = write
+        self.tokens = 0
+
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        if token:
+            self.tokens += 1
+            self.write(token)
+
+
+def with_callback(handler: BaseCallbackHandler) -> RunnableConfig:
+    """Config of the current run (tracing, graph streaming) with `handler` added to its callbacks."""
+    return merge_configs(ensure_config(), {"callbacks": [handler]})
+
+
+def _sink_writer(sink: Sink) -> Callable[[str], None]:
+    if not hasattr(sink, "write"):
+        return sink
+
+    def write(token: str) -> None:
+        sink.write(token)
+        if hasattr(sink, "flush"):
+            sink.flush()
+
+    return write
+
+
+def stream_to_sink(graph, inputs, sink: Sink, config: Optional[dict] = None, event: str = ARTICLE_TOKEN,
+                   stats: Optional[Dict[str, float]] = None) -> Optional[dict]:
+    """
+    Run `graph` and write the `event` tokens to `sink` as they arrive; returns the final state.
+
+    `stats`, if given, receives the time to first token and the number of tokens.
+    """
+    write, state, start = _sink_writer(sink), None, time.monotonic()
+    for mode, chunk in graph.stream(inputs, config, stream_mode=["custom", "values"]):
+        if mode == "values":
+            state = chunk
+        elif isinstance(chunk, dict) and event in chunk:
+            if stats is not None:
+                stats.setdefault("first_token_seconds", time.monotonic() - start)
+                stats["tokens"] = stats.get("tokens", 0) + 1
+            write(chunk[event])
+    return state
+
+
+async def astream_to_sink(graph, inputs, sink: Sink, config: Optional[dict] = None, event: str = ARTICLE_TOKEN,
+                          stats: Optional[Dict[str, float]] = None) -> Optional[dict]:
+    """Async `stream_to_sink` (`sink` is still written synchronously)."""
+    write, state, start = _sink_writer(sink), None, time.monotonic()
+    async for mode, chunk in graph.astream(inputs, config, stream_mode=["custom", "values"]):
+        if mode == "values":
+            state = chunk
+        elif isinstance(chunk, dict) and event in chunk:
+            if stats is not None:
+                stats.setdefault("first_token_seconds", time.monotonic() - start)
+                stats["tokens"] = stats.get("tokens", 0) + 1
+            write(chunk[event])
+    return state
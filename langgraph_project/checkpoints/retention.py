@@ -0,0 +1,223 @@
+"""
+Checkpoint retention for long-running servers.
+
+A checkpointer keeps every checkpoint of every thread forever, so a chat service that runs for weeks grows
+without bound (in RAM for MemorySaver, on disk for SqliteCheckpointSaver). A `RetentionPolicy` bounds it:
+  - keep_last:   only the newest N checkpoints of a thread are kept (the thread still resumes from the latest)
+  - ttl_seconds: threads not updated for longer are deleted
+  - max_threads / max_bytes: above the cap, the least recently updated threads are deleted
+
+`CheckpointCompactor` applies the policy periodically in a daemon thread and keeps cumulative metrics.
+`get_compactor(saver)` starts one per checkpointer, and they are stopped at exit:
+
+    compactor = get_compactor(get_sqlite_checkpointer())
+
+The compactor thread deletes from the checkpointer while graph runs write to it, so an in-memory
+checkpointer must be a `LockedMemorySaver` (InMemorySaver has no lock of its own).
+"""
+import atexit
+import logging
+import threading
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional
+
+from langgraph.checkpoint.memory import InMemorySaver
+
+from conf.configs import Cfg
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    keep_last: Optional[int] = None
+    ttl_seconds: Optional[float] = None
+    max_threads: Optional[int] = None
+    max_bytes: Optional[int] = None
+
+    @classmethod
+    def from_configs(cls) -> "RetentionPolicy":
+        configs = Cfg().checkpoint_configs
+        return cls(
+            keep_last=configs.keep_last_checkpoints,
+            ttl_seconds=configs.thread_ttl_seconds,
+            max_threads=configs.max_threads,
+            max_bytes=configs.max_bytes,
+        )
+
+
+class LockedMemorySaver(InMemorySaver):
+    """InMemorySaver whose reads and writes hold `lock`, so a CheckpointCompactor can prune it while graphs run."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lock = threading.RLock()
+
+    def get_tuple(self, config):
+        with self.lock:
+            return super().get_tuple(config)
+
+    def list(self, config, **kwargs):
+        with self.lock:
+            items = list(super().list(config, **kwargs))
+        yield from items
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        with self.lock:
+            return super().put(config, checkpoint, metadata, new_versions)
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        with self.lock:
+            return super().put_writes(config, writes, task_id, task_path)
+
+    def delete_thread(self, thread_id):
+        with self.lock:
+            return super().delete_thread(thread_id)
+
+
+def prune_memory_saver(saver: InMemorySaver, policy: RetentionPolicy, now: Optional[float] = None) -> Dict[str, int]:
+    """
+    Same as `SqliteCheckpointSaver.prune`, for a MemorySaver (bytes are those of the serialized values).
+
+    A plain InMemorySaver must not be written to while it is pruned; a LockedMemorySaver is locked for the run.
+    """
+    with getattr(saver, "lock", nullcontext()):
+        return _prune_memory_saver(saver, policy, time.time() if now is None else now)
+
+
+def _prune_memory_saver(saver: InMemorySaver, policy: RetentionPolicy, now: float) -> Dict[str, int]:
+    stats = {"checkpoints": 0, "blobs": 0, "writes": 0, "threads": 0, "bytes_reclaimed": 0}
+
+    threads = []
+    for thread_id, namespaces in list(saver.storage.items()):
+        updated_at = 0.0
+        for checkpoint_ns, checkpoints in list(namespaces.items()):
+            if not checkpoints:
+                continue
+            if policy.keep_last is not None and len(checkpoints) > policy.keep_last:
+                _trim_memory_thread(saver, thread_id, checkpoint_ns, policy.keep_last, stats)
+            latest = saver.serde.loads_typed(checkpoints[max(checkpoints)][0])
+            updated_at = max(updated_at, datetime.fromisoformat(latest["ts"]).timestamp())
+        size = sum(len(c[1]) + len(m[1]) for ns in namespaces.values() for c, m, _ in ns.values())
+        size += sum(len(v[1]) for k, v in saver.blobs.items() if k[0] == thread_id)
+        threads.append((updated_at, thread_id, size))
+
+    kept_threads, kept_bytes = 0, 0
+    for updated_at, thread_id, size in sorted(threads, reverse=True):
+        if _evict(policy, now, updated_at, size, kept_threads, kept_bytes):
+            stats["checkpoints"] += sum(len(ns) for ns in saver.storage[thread_id].values())
+            saver.delete_thread(thread_id)
+            stats["threads"] += 1
+            stats["bytes_reclaimed"] += size
+        else:
+            kept_threads += 1
+            kept_bytes += size
+    return stats
+
+
+def _evict(policy: RetentionPolicy, now: float, updated_at: float, size: int, kept_threads: int,
+           kept_bytes: int) -> bool:
+    """Threads are visited most recently updated first; True if this one is past the TTL or the caps."""
+    return (
+            (policy.ttl_seconds is not None and now - updated_at > policy.ttl_seconds)
+            or (policy.max_threads is not None and kept_threads >= policy.max_threads)
+            or (policy.max_bytes is not None and kept_threads > 0 and kept_bytes + size > policy.max_bytes)
+    )
+
+
+def _trim_memory_thread(saver: InMemorySaver, thread_id: str, checkpoint_ns: str, keep_last: int,
+                        stats: Dict[str, int]) -> None:
+    checkpoints = saver.storage[thread_id][checkpoint_ns]
+    ids = sorted(checkpoints, reverse=True)
+    kept = ids[:keep_last]
+    # The parent's writes of a kept checkpoint hold its pending sends
+    keep_writes = set(kept) | {checkpoints[c][2] for c in kept if checkpoints[c][2]}
+    live = set()
+    for checkpoint_id in kept:
+        live.update(saver.serde.loads_typed(checkpoints[checkpoint_id][0])["channel_versions"].items())
+
+    for checkpoint_id in ids[keep_last:]:
+        checkpoint, metadata, _ = checkpoints.pop(checkpoint_id)
+        stats["checkpoints"] += 1
+        stats["bytes_reclaimed"] += len(checkpoint[1]) + len(metadata[1])
+    for key in [k for k in saver.blobs if k[:2] == (thread_id, checkpoint_ns) and k[2:] not in live]:
+        stats["blobs"] += 1
+        stats["bytes_reclaimed"] += len(saver.blobs.pop(key)[1])
+    for key in [k for k in saver.writes if k[:2] == (thread_id, checkpoint_ns) and k[2] not in keep_writes]:
+        writes = saver.writes.pop(key)
+        stats["writes"] += len(writes)
+        stats["bytes_reclaimed"] += sum(len(w[2][1]) for w in writes.values())
+
+
+class CheckpointCompactor:
+    """Applies a RetentionPolicy to a checkpointer every `interval_seconds` in a daemon thread."""
+
+    def __init__(self, saver, policy: Optional[RetentionPolicy] = None, interval_seconds: Optional[float] = None):
+        self.saver = saver
+        self.policy = policy or RetentionPolicy.from_configs()
+        self.interval_seconds = interval_seconds or Cfg().checkpoint_configs.compaction_interval_seconds
+        # Cumulative since start: runs, and what they deleted
+        self.stats = {"runs": 0, "checkpoints": 0, "blobs": 0, "writes": 0, "threads": 0, "bytes_reclaimed": 0}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> Dict[str, int]:
+        if hasattr(self.saver, "prune"):
+            stats = self.saver.prune(self.policy)
+            if stats["bytes_reclaimed"]:
+                self.saver.vacuum()
+        else:
+            stats = prune_memory_saver(self.saver, self.policy)
+        self.stats["runs"] += 1
+        for k, v in stats.items():
+            self.stats[k] += v
+        logger.info("Checkpoint compaction: %(checkpoints)d checkpoints, %(blobs)d blobs, %(writes)d writes and "
+                    "%(threads)d threads deleted, %(bytes_reclaimed)d bytes reclaimed", stats)
+        return stats
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.run_once()
+            except Exception:  # a failed run must not stop the compactor of a long-running server
+                logger.exception("Checkpoint compaction failed")
+
+    def start(self) -> "CheckpointCompactor":
+        if isinstance(self.saver, InMemorySaver) and not isinstance(self.saver, LockedMemorySaver):
+            raise TypeError("InMemorySaver cannot be compacted in the background: use LockedMemorySaver, "
+                            "or call prune_memory_saver between runs")
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="checkpoint-compactor", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+_compactors: Dict[int, CheckpointCompactor] = {}
+_compactors_lock = threading.Lock()
+
+
+def get_compactor(saver) -> CheckpointCompactor:
+    """The started compactor of `saver` (one per checkpointer, stopped at exit)."""
+    with _compactors_lock:
+        if id(saver) not in _compactors:
+            _compactors[id(saver)] = CheckpointCompactor(saver).start()  # keeps `saver` alive, so its id is not reused
+        return _compactors[id(saver)]
+
+
+@atexit.register
+def stop_compactors() -> None:
+    with _compactors_lock:
+        compactors = list(_compactors.values())
+        _compactors.clear()
+    for compactor in compactors:
+        compactor.stop()
@@ -0,0 +1,648 @@
+"""
+Durable SQLite checkpointer for LangGraph graphs.
+
+`SqliteCheckpointSaver` is a drop-in replacement for `MemorySaver` in `graph.compile(checkpointer=...)`:
+thread state survives restarts and does not live in the process' RAM.
+
+- SQLite in WAL mode (`synchronous=NORMAL`: a commit does not wait for fsync, readers never block writers)
+- Channel values are stored once per channel version (like `MemorySaver`), so a checkpoint only writes
+  the channels that changed in its super-step; the checkpoint and all its channel blobs go in one
+  transaction, and the pending writes of a task go in one `executemany` batch
+- Values are serialized with LangGraph's msgpack serializer and zlib-compressed above `compress_min_bytes`
+- Channels that only grow (message lists, research results, strings) are delta-encoded: a new version
+  stores only what was appended to the previous version of the channel, with a full snapshot every
+  `snapshot_every` versions. Reads walk back to the nearest snapshot (or a cached version) and
+  re-apply the deltas, so storage and write time grow linearly with the number of steps instead of
+  quadratically
+- Every table is keyed by `thread_id` first, so loading or listing a thread is an index range scan
+- `prune(policy)` enforces a `RetentionPolicy` (see `retention.py`): last N checkpoints per thread,
+  thread TTL and an LRU cap on threads / bytes, keeping every blob a remaining checkpoint needs
+"""
+import asyncio
+import copy
+import os
+import random
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.serde.types import TASKS, ChannelProtocol
+
+from conf.configs import Cfg
+from langgraph_project.checkpoints.retention import RetentionPolicy, _evict
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id            TEXT NOT NULL,
+    checkpoint_ns        TEXT NOT NULL DEFAULT '',
+    checkpoint_id        TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type                 TEXT NOT NULL,
+    checkpoint           BLOB NOT NULL,
+    metadata             BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS blobs (
+    thread_id     TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    channel       TEXT NOT NULL,
+    version       TEXT NOT NULL,
+    type          TEXT NOT NULL,
+    blob          BLOB,
+    base_version  TEXT,              -- delta rows: the version this delta applies to
+    depth         INTEGER NOT NULL DEFAULT 0,  -- deltas since the last full snapshot
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id     TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id       TEXT NOT NULL,
+    idx           INTEGER NOT NULL,
+    channel       TEXT NOT NULL,
+    type          TEXT NOT NULL,
+    blob          BLOB,
+    task_path     TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS threads (
+    thread_id  TEXT PRIMARY KEY,
+    updated_at REAL NOT NULL,         -- time of the last checkpoint (TTL / LRU eviction)
+    bytes      INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_threads_updated ON threads (updated_at);
+"""
+
+_THREAD_BYTES = """
+SELECT COALESCE((SELECT SUM(LENGTH(checkpoint) + LENGTH(metadata)) FROM checkpoints WHERE thread_id = :t), 0)
+     + COALESCE((SELECT SUM(COALESCE(LENGTH(blob), 0)) FROM blobs WHERE thread_id = :t), 0)
+     + COALESCE((SELECT SUM(COALESCE(LENGTH(blob), 0)) FROM writes WHERE thread_id = :t), 0)
+"""
+
+# Primary keys and stored size of the rows, to count only what an INSERT OR REPLACE adds to a thread
+_BLOBS_KEY = ("thread_id", "checkpoint_ns", "channel", "version")
+_CHECKPOINTS_KEY = ("thread_id", "checkpoint_ns", "checkpoint_id")
+_WRITES_KEY = ("thread_id", "checkpoint_ns", "checkpoint_id", "task_id", "idx")
+_BLOB_SIZE = "COALESCE(LENGTH(blob), 0)"
+_CHECKPOINT_SIZE = "LENGTH(checkpoint) + LENGTH(metadata)"
+
+_COMPRESSED = "+zlib"
+_DELTA = "delta:"  # type of delta rows: "delta:<list|str>:<serializer type of the appended part>"
+_MISSING = object()
+
+
+def _appended(old: Any, new: Any) -> Optional[Tuple[str, Any]]:
+    """What `new` appends to `old`, if `new` is `old` plus something at the end."""
+    if isinstance(old, list) and isinstance(new, list) and len(new) >= len(old):
+        if all(a is b or a == b for a, b in zip(old, new)):
+            return "list", list(new[len(old):])
+    elif isinstance(old, str) and isinstance(new, str) and old and new.startswith(old):
+        return "str", new[len(old):]
+    return None
+
+
+class CompactSerializer(SerializerProtocol):
+    """LangGraph's msgpack serializer, with zlib compression of payloads above `compress_min_bytes`."""
+
+    def __init__(self, compress_min_bytes: int = 512, serde: Optional[SerializerProtocol] = None):
+        self.compress_min_bytes = compress_min_bytes
+        self.serde = serde or JsonPlusSerializer()
+
+    def dumps(self, obj: Any) -> bytes:
+        return self.serde.dumps(obj)
+
+    def loads(self, data: bytes) -> Any:
+        return self.serde.loads(data)
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        type_, data = self.serde.dumps_typed(obj)
+        if len(data) >= self.compress_min_bytes:
+            compressed = zlib.compress(data, 1)
+            if len(compressed) < len(data):
+                return type_ + _COMPRESSED, compressed
+        return type_, data
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_.endswith(_COMPRESSED):
+            type_, payload = type_[:-len(_COMPRESSED)], zlib.decompress(payload)
+        return self.serde.loads_typed((type_, payload))
+
+
+class SqliteCheckpointSaver(BaseCheckpointSaver[str]):
+    def __init__(
+            self,
+            path: str,
+            compress_min_bytes: int = 512,
+            snapshot_every: int = 20,
+            cache_entries: int = 1024,
+            serde: Optional[SerializerProtocol] = None,
+    ):
+        super().__init__(serde=CompactSerializer(compress_min_bytes, serde))
+        self.path = path
+        # Full snapshot of a channel after this many deltas (1 disables delta encoding)
+        self.snapshot_every = max(1, snapshot_every)
+        self.cache_entries = cache_entries
+        # Both caches hold private copies: nodes may change the channel values they were given in place
+        # (thread_id, checkpoint_ns, channel) -> (version, value, depth) of the last version written
+        self._last_written: "OrderedDict[Tuple[str, str, str], Tuple[str, Any, int]]" = OrderedDict()
+        # (thread_id, checkpoint_ns, channel, version) -> reconstructed value
+        self._read_cache: "OrderedDict[Tuple[str, str, str, str], Any]" = OrderedDict()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        # Lets compaction hand freed pages back to the file system (only applies to new databases)
+        self.conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        had_threads = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'threads'").fetchone()
+        self.conn.executescript(_SCHEMA)
+        if not had_threads:  # databases created before retention: index the existing threads
+            for (thread_id,) in self.conn.execute("SELECT DISTINCT thread_id FROM checkpoints").fetchall():
+                self.conn.execute("INSERT INTO threads VALUES (?, ?, 0)", (thread_id, time.time()))
+                self.conn.execute("UPDATE threads SET bytes = (" + _THREAD_BYTES + ") WHERE thread_id = :t",
+                                  {"t": thread_id})
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(blobs)")}
+        if "base_version" not in columns:  # databases created before delta encoding
+            self.conn.execute("ALTER TABLE blobs ADD COLUMN base_version TEXT")
+            self.conn.execute("ALTER TABLE blobs ADD COLUMN depth INTEGER NOT NULL DEFAULT 0")
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
+
+    def __enter__(self) -> "SqliteCheckpointSaver":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run the statements of the block in one BEGIN ... COMMIT."""
+        with self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    # -------
+    # WRITE
+    # -------
+    def put(
+            self,
+            config: RunnableConfig,
+            checkpoint: Checkpoint,
+            metadata: CheckpointMetadata,
+            new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        c = checkpoint.copy()
+        c.pop("pending_sends", None)  # rebuilt from the parent's TASKS writes on read
+        values: Dict[str, Any] = c.pop("channel_values")
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+
+        with self.lock:
+            blob_rows = [
+                (thread_id, checkpoint_ns, channel, str(version),
+                 *self._encode((thread_id, checkpoint_ns, channel), str(version), values.get(channel, _MISSING)))
+                for channel, version in new_versions.items()
+            ]
+        type_, checkpoint_blob = self.serde.dumps_typed(c)
+        metadata_blob = self.serde.dumps(get_checkpoint_metadata(config, metadata))
+
+        size = len(checkpoint_blob) + len(metadata_blob) + sum(len(r[5] or b"") for r in blob_rows)
+
+        with self._transaction() as conn:
+            checkpoint_key = (thread_id, checkpoint_ns, checkpoint["id"])
+            size -= sum(self._stored_sizes(conn, "blobs", _BLOBS_KEY, _BLOB_SIZE, [r[:4] for r in blob_rows]).values())
+            size -= sum(self._stored_sizes(conn, "checkpoints", _CHECKPOINTS_KEY, _CHECKPOINT_SIZE,
+                                           [checkpoint_key]).values())
+            if blob_rows:
+                conn.executemany("INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?, ?, ?)", blob_rows)
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                 type_, checkpoint_blob, metadata_blob),
+            )
+            self._touch_thread(conn, thread_id, size)
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+            self,
+            config: RunnableConfig,
+            writes: Sequence[Tuple[str, Any]],
+            task_id: str,
+            task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = [
+            (thread_id, checkpoint_ns, checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, idx), channel,
+             *self.serde.dumps_typed(value), task_path)
+            for idx, (channel, value) in enumerate(writes)
+        ]
+        # Regular writes are only recorded once per task; special writes (errors, interrupts) are replaced
+        verb = "INSERT OR REPLACE" if all(channel in WRITES_IDX_MAP for channel, _ in writes) else "INSERT OR IGNORE"
+        with self._transaction() as conn:
+            stored = self._stored_sizes(conn, "writes", _WRITES_KEY, _BLOB_SIZE, [r[:5] for r in rows])
+            if verb == "INSERT OR REPLACE":
+                size = sum(len(r[7] or b"") for r in rows) - sum(stored.values())
+            else:
+                size = sum(len(r[7] or b"") for r in rows if r[:5] not in stored)
+            conn.executemany(f"{verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self._touch_thread(conn, thread_id, size)
+
+    @staticmethod
+    def _stored_sizes(conn: sqlite3.Connection, table: str, key_columns: Tuple[str, ...], size: str,
+                      keys: List[tuple]) -> Dict[tuple, int]:
+        """Stored size of the rows of `table` that already exist under `keys`."""
+        where = " AND ".join(f"{column} = ?" for column in key_columns)
+        sizes = {}
+        for key in keys:
+            row = conn.execute(f"SELECT {size} FROM {table} WHERE {where}", key).fetchone()
+            if row is not None:
+                sizes[key] = row[0]
+        return sizes
+
+    @staticmethod
+    def _touch_thread(conn: sqlite3.Connection, thread_id: str, size: int) -> None:
+        conn.execute(
+            "INSERT INTO threads VALUES (?, ?, ?) "
+            "ON CONFLICT (thread_id) DO UPDATE SET updated_at = excluded.updated_at, bytes = bytes + excluded.bytes",
+            (thread_id, time.time(), size),
+        )
+
+    def _encode(self, key: Tuple[str, str, str], version: str, value: Any) -> Tuple[str, Optional[bytes], Optional[str], int]:
+        """(type, blob, base_version, depth) of a channel version: a delta when possible, else a snapshot."""
+        if value is _MISSING:
+            self._last_written.pop(key, None)
+            return "empty", None, None, 0
+        last = self._last_written.get(key)
+        encoded = None
+        if last is not None and last[2] + 1 < self.snapshot_every:
+            base_version, base_value, base_depth = last
+            if (appended := _appended(base_value, value)) is not None:
+                kind, part = appended
+                type_, blob = self.serde.dumps_typed(part)
+                encoded = (f"{_DELTA}{kind}:{type_}", blob, base_version, base_depth + 1)
+        if encoded is None:
+            encoded = (*self.serde.dumps_typed(value), None, 0)
+        # The graph keeps using `value` after this checkpoint: the next delta must be computed against the
+        # value as it was written, not as a node may have changed it since
+        value = copy.deepcopy(value)
+        self._last_written[key] = (version, value, encoded[3])
+        self._last_written.move_to_end(key)
+        if len(self._last_written) > self.cache_entries:
+            self._last_written.popitem(last=False)
+        # The next step of the thread resumes from this version: no need to rebuild it from the deltas
+        self._cache_read((*key, version), value)
+        return encoded
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._transaction() as conn:
+            for table in ("checkpoints", "blobs", "writes", "threads"):
+                conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+            self._forget(thread_id)
+
+    def _forget(self, thread_id: str) -> None:
+        for cache in (self._last_written, self._read_cache):
+            for key in [k for k in cache if k[0] == thread_id]:
+                del cache[key]
+
+    # ----------
+    # RETENTION
+    # ----------
+    def prune(self, policy: RetentionPolicy, now: Optional[float] = None) -> Dict[str, int]:
+        """
+        Apply `policy` and return what was deleted:
+        {"checkpoints", "blobs", "writes", "threads", "bytes_reclaimed"}.
+        """
+        now = time.time() if now is None else now
+        stats = {"checkpoints": 0, "blobs": 0, "writes": 0, "threads": 0, "bytes_reclaimed": 0}
+        with self._transaction() as conn:
+            # 1) Old checkpoints of every thread
+            if policy.keep_last is not None:
+                for thread_id, checkpoint_ns in conn.execute(
+                        "SELECT thread_id, checkpoint_ns FROM checkpoints GROUP BY thread_id, checkpoint_ns "
+                        "HAVING COUNT(*) > ?", (policy.keep_last,)).fetchall():
+                    self._trim_thread(conn, thread_id, checkpoint_ns, policy.keep_last, stats)
+                    conn.execute("UPDATE threads SET bytes = (" + _THREAD_BYTES + ") WHERE thread_id = :t",
+                                 {"t": thread_id})
+
+            # 2) Whole threads: expired ones, then the least recently updated ones above the caps
+            evict = []
+            kept_threads, kept_bytes = 0, 0
+            for thread_id, updated_at, size in conn.execute(
+                    "SELECT thread_id, updated_at, bytes FROM threads ORDER BY updated_at DESC").fetchall():
+                if _evict(policy, now, updated_at, size, kept_threads, kept_bytes):
+                    evict.append((thread_id, size))
+                else:
+                    kept_threads += 1
+                    kept_bytes += size
+            for thread_id, size in evict:
+                for table in ("checkpoints", "blobs", "writes"):
+                    stats[table] += conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,)).rowcount
+                conn.execute("DELETE FROM threads WHERE thread_id = ?", (thread_id,))
+                self._forget(thread_id)
+                stats["threads"] += 1
+                stats["bytes_reclaimed"] += size
+        return stats
+
+    def _trim_thread(self, conn: sqlite3.Connection, thread_id: str, checkpoint_ns: str, keep_last: int,
+                     stats: Dict[str, int]) -> None:
+        """Delete all but the `keep_last` newest checkpoints, and every blob and write only they needed."""
+        rows = conn.execute(
+            "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, LENGTH(checkpoint) + LENGTH(metadata) "
+            "FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? ORDER BY checkpoint_id DESC",
+            (thread_id, checkpoint_ns),
+        ).fetchall()
+        kept, dropped = rows[:keep_last], rows[keep_last:]
+        # The parent's writes of a kept checkpoint hold its pending sends
+        keep_writes = {r[0] for r in kept} | {r[1] for r in kept if r[1]}
+
+        live = set()
+        for _, _, type_, blob, _ in kept:
+            checkpoint = self.serde.loads_typed((type_, blob))
+            live.update((channel, str(version)) for channel, version in checkpoint["channel_versions"].items())
+        blobs = {
+            (channel, version): (base, size)
+            for channel, version, base, size in conn.execute(
+                "SELECT channel, version, base_version, COALESCE(LENGTH(blob), 0) FROM blobs "
+                "WHERE thread_id = ? AND checkpoint_ns = ?", (thread_id, checkpoint_ns))
+        }
+        # Deltas need their whole chain down to the snapshot
+        for channel, version in list(live):
+            base = blobs.get((channel, version), (None, 0))[0]
+            while base is not None and (channel, base) not in live:
+                live.add((channel, base))
+                base = blobs.get((channel, base), (None, 0))[0]
+        dead_blobs = [key for key in blobs if key not in live]
+
+        dead_writes = conn.execute(
+            "SELECT checkpoint_id, COUNT(*), SUM(COALESCE(LENGTH(blob), 0)) FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? GROUP BY checkpoint_id", (thread_id, checkpoint_ns),
+        ).fetchall()
+        dead_writes = [w for w in dead_writes if w[0] not in keep_writes]
+
+        conn.executemany(
+            "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+            [(thread_id, checkpoint_ns, r[0]) for r in dropped],
+        )
+        conn.executemany(
+            "DELETE FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+            [(thread_id, checkpoint_ns, *key) for key in dead_blobs],
+        )
+        conn.executemany(
+            "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+            [(thread_id, checkpoint_ns, w[0]) for w in dead_writes],
+        )
+        stats["checkpoints"] += len(dropped)
+        stats["blobs"] += len(dead_blobs)
+        stats["writes"] += sum(w[1] for w in dead_writes)
+        stats["bytes_reclaimed"] += (sum(r[4] for r in dropped) + sum(blobs[key][1] for key in dead_blobs)
+                                     + sum(w[2] for w in dead_writes))
+
+    def vacuum(self) -> None:
+        """Return free pages to the file system and truncate the WAL."""
+        with self.lock:
+            self.conn.execute("PRAGMA incremental_vacuum")
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    # ------
+    # READ
+    # ------
+    def _load_value(self, thread_id: str, checkpoint_ns: str, channel: str, version: str) -> Any:
+        """Value of a channel version: walk back to a snapshot or cached version, then re-apply the deltas."""
+        deltas = []
+        key = (thread_id, checkpoint_ns, channel, version)
+        while True:
+            if key in self._read_cache:
+                value = self._read_cache[key]
+                self._read_cache.move_to_end(key)
+                break
+            row = self.conn.execute(
+                "SELECT type, blob, base_version FROM blobs "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                key,
+            ).fetchone()
+            if row is None or row[0] == "empty":
+                return _MISSING
+            type_, blob, base_version = row
+            if not type_.startswith(_DELTA):
+                value = self.serde.loads_typed((type_, blob))
+                break
+            deltas.append((type_, blob))
+            key = (thread_id, checkpoint_ns, channel, base_version)
+        for type_, blob in reversed(deltas):
+            kind, part_type = type_[len(_DELTA):].split(":", 1)
+            part = self.serde.loads_typed((part_type, blob))
+            value = value + part if kind == "str" else list(value) + part
+        self._cache_read((thread_id, checkpoint_ns, channel, version), value)
+        # Callers get their own copy: cached values are shared between checkpoints and a graph resumed
+        # from this one may change its values in place
+        return copy.deepcopy(value)
+
+    def _cache_read(self, key: Tuple[str, str, str, str], value: Any) -> None:
+        self._read_cache[key] = value
+        self._read_cache.move_to_end(key)
+        if len(self._read_cache) > self.cache_entries:
+            self._read_cache.popitem(last=False)
+
+    def _load_blobs(self, thread_id: str, checkpoint_ns: str, versions: ChannelVersions) -> Dict[str, Any]:
+        values = {}
+        for channel, version in versions.items():
+            value = self._load_value(thread_id, checkpoint_ns, channel, str(version))
+            if value is not _MISSING:
+                values[channel] = value
+        return values
+
+    def _load_writes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> List[tuple]:
+        return self.conn.execute(
+            "SELECT task_id, channel, type, blob, task_path, idx FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+
+    def _make_tuple(self, row: tuple, metadata: Optional[CheckpointMetadata] = None) -> CheckpointTuple:
+        thread_id, checkpoint_ns, checkpoint_id, parent_id, type_, checkpoint_blob, metadata_blob = row
+        checkpoint: Checkpoint = self.serde.loads_typed((type_, checkpoint_blob))
+        sends = []
+        if parent_id:
+            sends = sorted(
+                (w for w in self._load_writes(thread_id, checkpoint_ns, parent_id) if w[1] == TASKS),
+                key=lambda w: (w[4], w[0], w[5]),
+            )
+        writes = self._load_writes(thread_id, checkpoint_ns, checkpoint_id)
+        return CheckpointTuple(
+            config={"configurable": {
+                "thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id,
+            }},
+            checkpoint={
+                **checkpoint,
+                "channel_values": self._load_blobs(thread_id, checkpoint_ns, checkpoint["channel_versions"]),
+                "pending_sends": [self.serde.loads_typed((w[2], w[3])) for w in sends],
+            },
+            metadata=metadata if metadata is not None else self.serde.loads(metadata_blob),
+            parent_config=(
+                {"configurable": {
+                    "thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent_id,
+                }}
+                if parent_id else None
+            ),
+            pending_writes=[(w[0], w[1], self.serde.loads_typed((w[2], w[3]))) for w in writes],
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        columns = "thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata"
+        with self.lock:
+            if checkpoint_id := get_checkpoint_id(config):
+                row = self.conn.execute(
+                    f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                ).fetchone()
+            else:
+                row = self.conn.execute(
+                    f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                    "ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, checkpoint_ns),
+                ).fetchone()
+            return self._make_tuple(row) if row is not None else None
+
+    def list(
+            self,
+            config: Optional[RunnableConfig],
+            *,
+            filter: Optional[Dict[str, Any]] = None,
+            before: Optional[RunnableConfig] = None,
+            limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        where, params = [], []
+        if config is not None:
+            where.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                where.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                where.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before is not None and (before_id := get_checkpoint_id(before)):
+            where.append("checkpoint_id < ?")
+            params.append(before_id)
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata "
+            f"FROM checkpoints {'WHERE ' + ' AND '.join(where) if where else ''} "
+            "ORDER BY thread_id, checkpoint_ns, checkpoint_id DESC"
+        )
+        with self.lock:
+            rows = self.conn.execute(query, params).fetchall()
+        for row in rows:
+            if limit is not None and limit <= 0:
+                break
+            metadata = self.serde.loads(row[6])
+            if filter and not all(metadata.get(k) == v for k, v in filter.items()):
+                continue
+            if limit is not None:
+                limit -= 1
+            with self.lock:
+                item = self._make_tuple(row, metadata)
+            yield item
+
+    # -------
+    # ASYNC
+    # -------
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+            self,
+            config: Optional[RunnableConfig],
+            *,
+            filter: Optional[Dict[str, Any]] = None,
+            before: Optional[RunnableConfig] = None,
+            limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(
+            self,
+            config: RunnableConfig,
+            checkpoint: Checkpoint,
+            metadata: CheckpointMetadata,
+            new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+            self,
+            config: RunnableConfig,
+            writes: Sequence[Tuple[str, Any]],
+            task_id: str,
+            task_path: str = "",
+    ) -> None:
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        return await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def get_next_version(self, current: Optional[str], channel: ChannelProtocol) -> str:
+        # Same version format as MemorySaver: zero-padded counter (sortable) + random suffix
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+
+_checkpointers: Dict[str, SqliteCheckpointSaver] = {}
+_checkpointers_lock = threading.Lock()
+
+
+def get_sqlite_checkpointer(path: Optional[str] = None) -> SqliteCheckpointSaver:
+    """The process-wide checkpointer at `path` (default: `CheckpointConfigs.sqlite_path`), one connection per path."""
+    configs = Cfg().checkpoint_configs
+    path = path or configs.sqlite_path
+    with _checkpointers_lock:
+        if path not in _checkpointers:
+            _checkpointers[path] = SqliteCheckpointSaver(
+                path,
+                compress_min_bytes=configs.compress_min_bytes,
+                snapshot_every=configs.snapshot_every,
+            )
+        return _checkpointers[path]
@@ -0,0 +1,99 @@
+"""
+CHECKPOINTER BENCHMARK
+
+Write and resume latency of MemorySaver vs SqliteCheckpointSaver with many threads:
+  - write: one graph turn (2 super-steps, a user and an AI message) on a new thread
+  - resume: graph.get_state() of a random thread, after reopening the database for SQLite
+  - long thread: write time and disk usage of one thread with many turns, with full snapshots
+    (snapshot_every=1) vs delta-encoded channels
+
+Run: python -m langgraph_project.experiments.bench_checkpointer [n_threads]
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, START, StateGraph
+
+from langgraph_project.checkpoints.sqlite_saver import SqliteCheckpointSaver
+from langgraph_project.multi_agents.AgentState import State
+
+N_THREADS = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+N_RESUMES = 1_000
+LONG_THREAD_TURNS = 500
+REPLY = "LangGraph persists the state of every thread after each super-step. " * 20
+
+
+def build_graph(checkpointer):
+    builder = StateGraph(State)
+    builder.add_node("chatbot", lambda state: {"messages": [AIMessage(content=REPLY)]})
+    builder.add_edge(START, "chatbot")
+    builder.add_edge("chatbot", END)
+    return builder.compile(checkpointer=checkpointer)
+
+
+def percentiles(samples):
+    q = statistics.quantiles(samples, n=100)
+    return f"p50 {q[49] * 1e3:6.2f} ms | p99 {q[98] * 1e3:6.2f} ms"
+
+
+def bench_writes(graph):
+    samples = []
+    for i in range(N_THREADS):
+        config = {"configurable": {"thread_id": f"thread-{i}"}}
+        start = time.perf_counter()
+        graph.invoke({"messages": [HumanMessage(content=f"question {i}")]}, config)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_resumes(graph):
+    samples = []
+    for i in random.sample(range(N_THREADS), min(N_RESUMES, N_THREADS)):
+        start = time.perf_counter()
+        state = graph.get_state({"configurable": {"thread_id": f"thread-{i}"}})
+        samples.append(time.perf_counter() - start)
+        assert len(state.values["messages"]) == 2
+    return samples
+
+
+def bench_long_thread(snapshot_every: int):
+    path = os.path.join(tempfile.mkdtemp(), "long.sqlite")
+    with SqliteCheckpointSaver(path, snapshot_every=snapshot_every) as saver:
+        graph = build_graph(saver)
+        config = {"configurable": {"thread_id": "long"}}
+        samples = []
+        for i in range(LONG_THREAD_TURNS):
+            start = time.perf_counter()
+            graph.invoke({"messages": [HumanMessage(content=f"question {i}")]}, config)
+            samples.append(time.perf_counter() - start)
+        stored = saver.conn.execute("SELECT SUM(LENGTH(blob)) FROM blobs").fetchone()[0]
+    first, last = statistics.mean(samples[:50]), statistics.mean(samples[-50:])
+    return f"first 50 turns {first * 1e3:6.2f} ms | last 50 turns {last * 1e3:6.2f} ms | {stored / 1e6:6.1f} MB"
+
+
+def main():
+    print(f"{N_THREADS} threads")
+    memory_graph = build_graph(MemorySaver())
+    print(f"MemorySaver write:  {percentiles(bench_writes(memory_graph))}")
+    print(f"MemorySaver resume: {percentiles(bench_resumes(memory_graph))}")
+
+    path = os.path.join(tempfile.mkdtemp(), "checkpoints.sqlite")
+    with SqliteCheckpointSaver(path) as saver:
+        print(f"SQLite write:       {percentiles(bench_writes(build_graph(saver)))}")
+    with SqliteCheckpointSaver(path) as saver:  # resume after a "restart"
+        print(f"SQLite resume:      {percentiles(bench_resumes(build_graph(saver)))}")
+    print(f"SQLite file size:   {os.path.getsize(path) / 1e6:.1f} MB")
+
+    print(f"\nOne thread, {LONG_THREAD_TURNS} turns")
+    print(f"Full snapshots: {bench_long_thread(snapshot_every=1)}")
+    print(f"Delta-encoded:  {bench_long_thread(snapshot_every=20)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+IMPORT-TIME BENCHMARK
+
+Cold-start cost of importing each package of the project, measured with `python -X importtime` in a fresh
+interpreter per module (so nothing is shared between measurements):
+  - cumulative: import time of the module including everything it imports
+  - wall: time of the whole interpreter run (startup + import + exit)
+  - heaviest: the slowest first-level dependencies of the module
+and the time `pytest --collect-only` takes to collect the test suite.
+
+Importing a module must not build LLM clients, tools or graphs; modules that fail to import here
+(e.g. because they need credentials at import time) are reported as errors.
+
+Run: python -m langgraph_project.experiments.bench_import_time [--json results.json]
+"""
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MODULES = [
+    "conf.configs",
+    "utils",
+    "langgraph_project.multi_agents.AgentState",
+    "langgraph_project.multi_agents.helpers",
+    "langgraph_project.tools.tools",
+    "langgraph_project.agents_nodes.custom_nodes",
+    "langgraph_project.agents_nodes.message_window",
+    "langgraph_project.agents_nodes.node_cache",
+    "langgraph_project.checkpoints.sqlite_saver",
+    "langgraph_project.langgraph_basics",
+    "langgraph_project.single_agent",
+    "langgraph_project.multi_agents.multi_agents_base",
+    "langgraph_project.multi_agents.multi_agents_example",
+    "langgraph_project.multi_agents.article_researcher.researchers_agent_base",
+    "langgraph_project.multi_agents.article_researcher.researchers_custom_tools",
+    "langgraph_project.multi_agents.article_researcher.researchers_dynamic_tool_reg",
+    "langgraph_project.multi_agents.article_researcher.researchers_sub_goals",
+    "langgraph_project.multi_agents.refactoring_agent.refact_agent_base",
+]
+# "import time: self [us] | cumulative | imported package", nesting shown by the indentation of the name
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)$")
+
+
+def import_time(module: str) -> dict:
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=ROOT, capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        return {"module": module, "error": proc.stderr.strip().splitlines()[-1]}
+
+    entries = [(int(m[2]), len(m[3]), m[4]) for m in map(_LINE.match, proc.stderr.splitlines()) if m]
+    i = max(i for i, (_, _, name) in enumerate(entries) if name == module)
+    cumulative, depth, _ = entries[i]
+    # Children are printed before their parent, indented two more spaces
+    children = []
+    for us, d, name in reversed(entries[:i]):
+        if d <= depth:
+            break
+        if d == depth + 2:
+            children.append((us, name))
+    return {"module": module, "cumulative_ms": cumulative / 1e3, "wall_ms": wall * 1e3,
+            "heaviest": [f"{name} {us / 1e3:.0f} ms" for us, name in sorted(children, reverse=True)[:3]]}
+
+
+def collection_time() -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-m", "pytest", "--collect-only", "-q"], cwd=ROOT, capture_output=True)
+    return time.perf_counter() - start
+
+
+def main():
+    results = []
+    print(f"{'module':<80} | {'cumulative':>10} | {'wall':>8} | heaviest imports")
+    for module in MODULES:
+        r = import_time(module)
+        results.append(r)
+        if "error" in r:
+            print(f"{module:<80} | ERROR: {r['error']}")
+        else:
+            print(f"{module:<80} | {r['cumulative_ms']:>7.0f} ms | {r['wall_ms']:>5.0f} ms | {', '.join(r['heaviest'])}")
+
+    collect = collection_time()
+    print(f"\npytest --collect-only: {collect:.2f} s")
+
+    if "--json" in sys.argv:
+        with open(sys.argv[sys.argv.index("--json") + 1], "w") as f:
+            json.dump({"modules": results, "pytest_collect_s": collect}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
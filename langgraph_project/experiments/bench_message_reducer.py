@@ -0,0 +1,47 @@
+"""
+MESSAGE REDUCER MICRO-BENCHMARK
+
+Per-step cost of merging a node's update into a growing message history:
+  - full:  node returns state["messages"] + [new_msg] through add_messages (the old pattern)
+  - delta: node returns [new_msg] through add_messages
+  - indexed: node returns [new_msg] through append_messages (MultiState/MultiState2/State)
+
+Run: python -m langgraph_project.experiments.bench_message_reducer
+"""
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph.message import add_messages
+
+from langgraph_project.multi_agents.AgentState import append_messages
+
+HISTORY_SIZES = [100, 1_000, 5_000, 10_000]
+STEPS = 50
+
+
+def make_history(n: int):
+    return add_messages([], [HumanMessage(content=f"message {i}") if i % 2 else AIMessage(content=f"message {i}")
+                             for i in range(n)])
+
+
+def per_step_us(reducer, history, full_update: bool) -> float:
+    state = reducer([], history)
+    start = time.perf_counter()
+    for i in range(STEPS):
+        new_msg = AIMessage(content=f"step {i}", name="node")
+        state = reducer(state, state + [new_msg] if full_update else [new_msg])
+    return (time.perf_counter() - start) / STEPS * 1e6
+
+
+def main():
+    print(f"{'history':>8} | {'full (us)':>10} | {'delta (us)':>10} | {'indexed (us)':>12}")
+    for n in HISTORY_SIZES:
+        history = make_history(n)
+        full = per_step_us(add_messages, history, full_update=True)
+        delta = per_step_us(add_messages, history, full_update=False)
+        indexed = per_step_us(append_messages, history, full_update=False)
+        print(f"{n:>8} | {full:>10.0f} | {delta:>10.0f} | {indexed:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+VALIDATED NODE MICRO-BENCHMARK
+
+Per-call overhead of the validation wrapper of RefactorState nodes (the node itself returns a small
+update), for growing source files in the state:
+  - legacy:      model_dump + RefactorState(**) + copy(update) + model_dump + RefactorState(**) + full diff
+  - incremental: validated_node (validates and diffs only the updated fields)
+
+Run: python -m langgraph_project.experiments.bench_validated_node
+"""
+import time
+
+from langgraph_project.agents_nodes.custom_nodes import validated_node
+from langgraph_project.multi_agents.AgentState import RefactorState
+
+FILE_SIZES = [1_000, 100_000, 1_000_000, 5_000_000]
+CALLS = 200
+
+
+def legacy_validated_node(fn):
+    """validated_node before incremental validation."""
+    def wrapper(raw_state):
+        state_data = raw_state.model_dump() if isinstance(raw_state, RefactorState) else raw_state
+        state = RefactorState(**state_data)
+        updates = fn(state)
+        merged = state.copy(update=updates)
+        merged = RefactorState(**merged.model_dump())
+        return {k: v for k, v in merged.model_dump().items() if state_data.get(k) != v}
+
+    return wrapper
+
+
+def node(state):
+    return {"temp_path": state.filename + ".refactored"}
+
+
+def per_call_us(wrapped, state) -> float:
+    start = time.perf_counter()
+    for _ in range(CALLS):
+        wrapped(state)
+    return (time.perf_counter() - start) / CALLS * 1e6
+
+
+def main():
+    print(f"{'file size':>10} | {'legacy (us)':>12} | {'incremental (us)':>16}")
+    for size in FILE_SIZES:
+        code = "x = 1\n" * (size // 6)
+        state = RefactorState(filename="demo.py", task="refactor", original_code=code,
+                              refactored_raw=code, refactored_code=code)
+        legacy = per_call_us(legacy_validated_node(node), state)
+        incremental = per_call_us(validated_node(node), state)
+        print(f"{size:>10} | {legacy:>12.1f} | {incremental:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,10 @@
 """Refer to https://langchain-ai.github.io/langgraph/concepts/why-langgraph/#learn-langgraph-basics"""
 
-from langchain_community.tools.tavily_search import TavilySearchResults
+import functools
+
 from dotenv import load_dotenv
 from typing import Annotated
 
-from langchain.chat_models import init_chat_model
 from typing_extensions import TypedDict
 
 from langgraph.graph import StateGraph, START, END
@@ -13,22 +13,40 @@ from langgraph.graph.message import add_messages
 import utils
 import utils as ut
 from conf.configs import Cfg
+from langgraph_project.agents_nodes.agent_factory import registered_graph
+from langgraph_project.agents_nodes.message_window import MessageWindow, attach_message_window
+from langgraph_project.checkpoints.retention import LockedMemorySaver, get_compactor
+from langgraph_project.checkpoints.sqlite_saver import get_sqlite_checkpointer
 
 load_dotenv()
 # **************** Global Configurations ****************
 use_memory = True
+# Persist threads in SQLite (CheckpointConfigs.sqlite_path) instead of keeping them in RAM
+use_durable_memory = True
+# Keep long threads within a token budget by folding old messages into a rolling summary
+use_message_window = True
+# Bound the checkpointer of a long-running chat: last N checkpoints per thread, thread TTL and LRU caps
+use_checkpoint_retention = True
 
 # **************** Global Configurations ****************
 
-tool_search = TavilySearchResults(max_results=5)
+@functools.lru_cache(maxsize=None)
+def get_tool_search():
+    from langchain_community.tools.tavily_search import TavilySearchResults
+
+    return TavilySearchResults(max_results=5)
 # tools = [tool]
 
+
 cfg_instance = Cfg()
 
 cfg_instance.llm_configs.llm_deployment = "gpt-app"  # "langchain_model"
 cfg_instance.llm_configs.openai_api_version = "2024-02-15-preview"  # Use this version for gpt4 # "2023-07-01-preview"
 
-llm = utils.get_llm_instance(configs=cfg_instance.llm_configs)
+
+@functools.lru_cache(maxsize=None)
+def get_llm():
+    return utils.get_llm_instance(configs=cfg_instance.llm_configs)
 
 
 # ---------------
@@ -39,14 +57,11 @@ class State(TypedDict):
     messages: Annotated[list, add_messages]
 
 
-graph_builder = StateGraph(State)
-
-
 # llm = init_chat_model("anthropic:claude-3-5-sonnet-latest")
 
 
 def chatbot(state: State):
-    return {"messages": [llm.invoke(state["messages"])]}
+    return {"messages": [get_llm().invoke(state["messages"])]}
 
 
 # -----------------------
@@ -57,9 +72,10 @@ def chatbot(state: State):
 ## The second argument is the function or object that will be called whenever
 ## the node is used.
 
-graph_builder.add_node("chatbot", chatbot)
-graph_builder.add_edge(START, "chatbot")
-# graph = graph_builder.compile()
+def add_chatbot(graph_builder: StateGraph) -> None:
+    graph_builder.add_node("chatbot", chatbot)
+    graph_builder.add_edge(START, "chatbot")
+    # graph = graph_builder.compile()
 
 
 # # -----------------
@@ -109,8 +125,9 @@ class BasicToolNode:
         return {"messages": outputs}
 
 
-tool_node = BasicToolNode(tools=[tool_search])
-graph_builder.add_node("tools", tool_node)
+def add_tools(graph_builder: StateGraph) -> None:
+    tool_node = BasicToolNode(tools=[get_tool_search()])
+    graph_builder.add_node("tools", tool_node)
 
 
 # ------------------------
@@ -135,34 +152,54 @@ def route_tools(
     return END
 
 
-# The `tools_condition` function returns "tools" if the chatbot asks to use a tool, and "END" if
-# it is fine directly responding. This conditional routing defines the main agent loop.
-graph_builder.add_conditional_edges(
-    "chatbot",
-    route_tools,
-    # The following dictionary lets you tell the graph to interpret the condition's outputs as a specific node
-    # It defaults to the identity function, but if you
-    # want to use a node named something else apart from "tools",
-    # You can update the value of the dictionary to something else
-    # e.g., "tools": "my_tools"
-    {"tools": "tools", END: END},
-)
-# Any time a tool is called, we return to the chatbot to decide the next step
-graph_builder.add_edge("tools", "chatbot")
-graph_builder.add_edge(START, "chatbot")
-
-# graph = graph_builder.compile()
+def add_tool_edges(graph_builder: StateGraph) -> None:
+    # The `tools_condition` function returns "tools" if the chatbot asks to use a tool, and "END" if
+    # it is fine directly responding. This conditional routing defines the main agent loop.
+    graph_builder.add_conditional_edges(
+        "chatbot",
+        route_tools,
+        # The following dictionary lets you tell the graph to interpret the condition's outputs as a specific node
+        # It defaults to the identity function, but if you
+        # want to use a node named something else apart from "tools",
+        # You can update the value of the dictionary to something else
+        # e.g., "tools": "my_tools"
+        {"tools": "tools", END: END},
+    )
+    # Any time a tool is called, we return to the chatbot to decide the next step
+    graph_builder.add_edge("tools", "chatbot")
+    graph_builder.add_edge(START, "chatbot")
+
+    # graph = graph_builder.compile()
+
 
 # -----------
 # ADD MEMORY 1
 # -----------
 
 
-from langgraph.checkpoint.memory import MemorySaver
+@functools.lru_cache(maxsize=None)
+def get_checkpointer():
+    """The checkpointer shared by the chat graphs of this module, compacted by one background compactor."""
+    memory = get_sqlite_checkpointer() if use_durable_memory else LockedMemorySaver()
+    if use_checkpoint_retention:
+        get_compactor(memory)
+    return memory
+
+
+@registered_graph
+def build_graph1():
+    """The chatbot graph with tools and memory, built on first use (importing this module builds nothing)."""
+    graph_builder = StateGraph(State)
+    add_chatbot(graph_builder)
+    add_tools(graph_builder)
+    add_tool_edges(graph_builder)
+
+    memory = get_checkpointer()
 
-memory = MemorySaver()
+    if use_message_window:
+        attach_message_window(graph_builder, MessageWindow(get_llm()), before="chatbot")
 
-graph1 = graph_builder.compile(checkpointer=memory) if use_memory else graph_builder.compile()
+    return graph_builder.compile(checkpointer=memory) if use_memory else graph_builder.compile()
 
 
 # -------------
@@ -193,12 +230,12 @@ def stream_graph_updates(user_input_: str, graph_, use_memory=False):
 #             if user_input.lower() in ["quit", "exit", "q"]:
 #                 print("Goodbye!")
 #                 break
-#             stream_graph_updates(user_input, graph1, use_memory)
+#             stream_graph_updates(user_input, build_graph1(), use_memory)
 #         except:
 #             # fallback if input() is not available
 #             user_input = "What do you know about LangGraph?"
 #             print("User: " + user_input)
-#             stream_graph_updates(user_input, graph1, use_memory)
+#             stream_graph_updates(user_input, build_graph1(), use_memory)
 #             break
 
 # run_command()
@@ -214,7 +251,7 @@ def base_agent(llm):
 
     graph_builder = StateGraph(State)
 
-    tools = [tool_search]
+    tools = [get_tool_search()]
     llm_with_tools = llm.bind_tools(tools)
 
     def chatbot(state: State):
@@ -224,7 +261,7 @@ def base_agent(llm):
 
     graph_builder.add_edge(START, "chatbot")
 
-    tool_node = BasicToolNode(tools=[tool_search])
+    tool_node = BasicToolNode(tools=tools)
     graph_builder.add_node("tools", tool_node)
 
     # The `tools_condition` function returns "tools" if the chatbot asks to use a tool, and "END" if
@@ -243,7 +280,10 @@ def base_agent(llm):
     graph_builder.add_edge("tools", "chatbot")
     graph_builder.add_edge(START, "chatbot")
 
-    memory = MemorySaver()
+    if use_message_window:
+        attach_message_window(graph_builder, MessageWindow(llm), before="chatbot")
+
+    memory = get_checkpointer()
     graph = graph_builder.compile(checkpointer=memory) if use_memory else graph_builder.compile()
 
     def execute_command():
@@ -264,3 +304,6 @@ def base_agent(llm):
 
     execute_command()
 
+
+if __name__ == "__main__":
+    base_agent(get_llm())
@@ -1,13 +1,15 @@
 """
 Note: Avoid having local imports here to avoid circular imports.
 """
+import uuid
 from typing import Annotated, Literal, Optional, Any, Dict
 
 from pydantic import BaseModel, Field, field_validator
 from typing_extensions import TypedDict
 from typing import List
 
-from langgraph.graph.message import AnyMessage, add_messages
+from langchain_core.messages import RemoveMessage, convert_to_messages
+from langgraph.graph.message import AnyMessage, Messages, add_messages
 
 
 def update_dialog_stack(left: list[str], right: Optional[str]) -> list[str]:
@@ -19,12 +21,64 @@ def update_dialog_stack(left: list[str], right: Optional[str]) -> list[str]:
     return left + [right]
 
 
+class MessageLog(list):
+    """
+    A list of messages with an id -> position index.
+
+    The index is shared, append-only, by every MessageLog derived from the same history, so it may
+    also hold ids of sibling branches; `position()` only trusts entries that point at the right message.
+    """
+
+    def __init__(self, messages=(), positions: Optional[Dict[str, int]] = None):
+        super().__init__(messages)
+        self.positions = positions if positions is not None else {m.id: i for i, m in enumerate(self)}
+
+    def position(self, message_id: str) -> Optional[int]:
+        i = self.positions.get(message_id)
+        if i is None:
+            return None
+        if i < len(self) and self[i].id == message_id:
+            return i
+        # Added by a sibling branch of this history (rare): look it up the slow way
+        return next((j for j, m in enumerate(self) if m.id == message_id), None)
+
+
+def append_messages(left: Messages, right: Messages) -> List[AnyMessage]:
+    """
+    Drop-in replacement for `add_messages` for nodes that return only their *new* messages.
+
+    `add_messages` converts and re-indexes the whole history on every update, so each step costs
+    O(history) Python work even for a single new message. Here the id index travels with the list
+    and merging k messages only does O(k) Python work, plus a C-level copy of the list (earlier
+    snapshots of the state are never modified). Messages with a known id replace the existing one,
+    like `add_messages`, so nodes returning the full history still work.
+    RemoveMessage updates fall back to `add_messages`.
+    """
+    if not isinstance(right, list):
+        right = [right]
+    right = convert_to_messages(right)
+    left = left if isinstance(left, MessageLog) else MessageLog(convert_to_messages(left or []))
+    if any(isinstance(m, RemoveMessage) for m in right):
+        return MessageLog(add_messages(list(left), right))
+
+    merged = MessageLog(left, left.positions)
+    for m in right:
+        if m.id is None:
+            m.id = str(uuid.uuid4())
+        elif (i := merged.position(m.id)) is not None:
+            merged[i] = m
+            continue
+        merged.positions[m.id] = len(merged)
+        merged.append(m)
+    return merged
+
+
 # ----------------
 # STATE TEMPLATES
 # ----------------
 # These are templates
 class State(TypedDict):
-    messages: Annotated[list[AnyMessage], add_messages]
+    messages: Annotated[list[AnyMessage], append_messages]
     dialog_state: Annotated[
         list[
             Literal[
@@ -61,7 +115,7 @@ class MultiState(TypedDict, total=False):
       - topic: the article topic extracted or provided
       - research_results: list of summaries from the research agent
     """
-    messages: Annotated[List[AnyMessage], add_messages]
+    messages: Annotated[List[AnyMessage], append_messages]
     dialog_state: Annotated[
         List[
             Literal[
@@ -82,6 +136,20 @@ class ResearchResult(TypedDict):
     summaries: List[str]
 
 
+def merge_research_results(
+        left: Optional[List[ResearchResult]], right: Optional[List[ResearchResult]]
+) -> List[ResearchResult]:
+    """
+    Merge research results written by parallel research branches.
+
+    A result replaces an earlier one for the same subgoal, so writing back the full list is harmless.
+    """
+    merged = {r["subgoal"]: r for r in left or []}
+    for result in right or []:
+        merged[result["subgoal"]] = result
+    return list(merged.values())
+
+
 class MultiState2(TypedDict, total=False):
     """
     Conversation state for the meta-planning → research → writing pipeline.
@@ -91,10 +159,10 @@ class MultiState2(TypedDict, total=False):
       - dialog_state: your existing dialog-stack tracking
       - goal: the user’s high-level objective
       - subgoals: list of sub-tasks produced by planning_node
-      - research_results: for each subgoal, the summaries
+      - research_results: for each subgoal, the summaries (merged across parallel research branches)
       - article: final markdown string from writing_node
     """
-    messages: Annotated[List[AnyMessage], add_messages]
+    messages: Annotated[List[AnyMessage], append_messages]
     dialog_state: Annotated[
         List[
             Literal["assistant", "get_info", "appointment_info"]
@@ -103,7 +171,7 @@ class MultiState2(TypedDict, total=False):
     ]
     goal: str
     subgoals: List[str]
-    research_results: List[ResearchResult]
+    research_results: Annotated[List[ResearchResult], merge_research_results]
     article: str
 
 
@@ -11,23 +11,23 @@ from langgraph_project.multi_agents.AgentState import MultiState  # Using a cust
 import langgraph_project.tools.tools as tools
 import langgraph_project.multi_agents.helpers as ut
 
-from langgraph_project.agents_nodes.agent_factory import make_agent
+from langgraph_project.agents_nodes.agent_factory import make_agent, registered_graph
+from langgraph_project.agents_nodes.node_cache import get_node_cache, node_cache_policy
 
 import prompts.multiagents_prompts as prompts
-from utils import llm
+from utils import get_llm
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# -------------
-# LLM SETTINGS
-# -------------
-research_llm = llm
-writing_llm = llm
-
-research_llm.temperature = 0.8  # higher temp for exploration
-writing_llm.temperature = 0  # lower temp for focused writing
+# **************** Global Configurations ****************
+# Summarize all URLs of a research step concurrently with batch_fetch_and_summarize
+use_batch_summarize = False
+# Memoize successful nodes on disk: rerunning the same topic after a failure resumes at the failed node
+use_node_cache = True
+# Nodes whose cached results are dropped before this run (e.g. after changing their prompt)
+invalidate_nodes = []
 
 
 # ----------------
@@ -39,7 +39,9 @@ def create_tracker(tool_fn, min_calls: int = 1, max_calls: int = 10):
 
 
 search_tracker = create_tracker(tools.web_search)
-summarize_tracker = create_tracker(tools.safe_fetch_and_summarize)
+summarize_tracker = create_tracker(
+    tools.batch_fetch_and_summarize if use_batch_summarize else tools.safe_fetch_and_summarize
+)
 
 
 # ----------------
@@ -61,50 +63,75 @@ summarize_tracker = create_tracker(tools.safe_fetch_and_summarize)
 #     )
 # )
 
-research_agent = make_agent(
-    model=research_llm,
-    tool_list=[search_tracker.wrapped_tool, summarize_tracker.wrapped_tool],
-    system_prompt=prompts.research_system_org,
-)
-
-writing_agent = make_agent(
-    model=writing_llm,
-    tool_list=[tools.generate_article],
-    system_prompt=prompts.writing_system_org,
-)
-
-# ----------------
-# NODE DEFINITIONS
-# ----------------
-
-research_node = make_research_node(
-    search_tool=search_tracker,
-    summarize_tool=summarize_tracker,
-    research_agent=research_agent,
-)
-writing_node = make_writing_node(
-    writing_agent=writing_agent,
-    article_tool=tools.generate_article
-)
+# -------------------------------
+# AGENTS, NODES AND GRAPH (lazy)
+# -------------------------------
+
+@registered_graph
+def build_graph():
+    """Agents, nodes and the compiled graph, built on first use (importing this module builds nothing)."""
+    # -------------
+    # LLM SETTINGS
+    # -------------
+    # One model per role (LLMConfigs.llm_roles): research explores at a higher temperature than writing
+    research_llm = get_llm("research")
+    writing_llm = get_llm("writing")
+
+    research_agent = make_agent(
+        model=research_llm,
+        tool_list=[search_tracker.wrapped_tool, summarize_tracker.wrapped_tool],
+        system_prompt=prompts.research_system_batch if use_batch_summarize else prompts.research_system_org,
+    )
+
+    writing_agent = make_agent(
+        model=writing_llm,
+        tool_list=[tools.generate_article],
+        system_prompt=prompts.writing_system_org,
+    )
+
+    # ----------------
+    # NODE DEFINITIONS
+    # ----------------
+
+    research_node = make_research_node(
+        search_tool=search_tracker,
+        summarize_tool=summarize_tracker,
+        research_agent=research_agent,
+    )
+    writing_node = make_writing_node(
+        writing_agent=writing_agent,
+        article_tool=tools.generate_article
+    )
+
+    # --------------------------
+    # STATE GRAPH CONSTRUCTION
+    # --------------------------
+    builder = StateGraph(MultiState)
+    builder.add_edge(START, "research_node")
+
+    builder.add_node("research_node", research_node,
+                     cache_policy=node_cache_policy("topic", "messages") if use_node_cache else None)
+    builder.add_node("writing_node", writing_node)
+    graph = builder.compile(cache=get_node_cache() if use_node_cache else None)
+    if use_node_cache and invalidate_nodes:
+        graph.clear_cache(invalidate_nodes)
+    return graph
 
-# --------------------------
-# STATE GRAPH CONSTRUCTION
-# --------------------------
-builder = StateGraph(MultiState)
-builder.add_edge(START, "research_node")
-
-builder.add_node("research_node", research_node)
-builder.add_node("writing_node", writing_node)
-graph = builder.compile()
 
 # -------
 # INVOKE
 # -------
 
-initial_state = {
-    "messages": [HumanMessage(content="Write me an article on the future of AI.")],
-    "topic": "X",
-}
-answer = graph.invoke(input=initial_state)
+def main():
+    initial_state = {
+        "messages": [HumanMessage(content="Write me an article on the future of AI.")],
+        "topic": "X",
+    }
+    answer = build_graph().invoke(input=initial_state)
+
+    # print('***DEBUG***: answer from graph.invoke', answer)
+    return answer
+
 
-# print('***DEBUG***: answer from graph.invoke', answer)
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,7 @@
 import langgraph_project.tools.tools as tools
 
 from langgraph_project.multi_agents.AgentState import State
-from utils import llm
+from utils import get_llm
 
 from langgraph.graph import StateGraph, START, END
 
@@ -12,10 +12,19 @@ import json
 import langgraph_project.multi_agents.helpers as ut
 from pydantic import BaseModel, Field
 from langchain.output_parsers import PydanticOutputParser
-from langchain.prompts.chat import ChatPromptTemplate
-from langgraph.prebuilt import create_react_agent
 from langgraph.types import Command
 from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+
+from langgraph_project.agents_nodes.agent_factory import make_agent, registered_graph
+from langgraph_project.agents_nodes.llm_hedging import with_hedging
+from langgraph_project.agents_nodes.llm_router import routed_llm
+
+# **************** Global Configurations ****************
+# Max planned queries researched at the same time (each runs search -> fetch -> summarize)
+max_query_workers = 4
+# Hedge slow QueryPlan planning calls with a duplicate request (hedging policy "query_plan")
+use_hedging = True
 
 # Guarantee tool invocation
 # original tools
@@ -43,14 +52,16 @@ plan_parser = PydanticOutputParser(pydantic_object=QueryPlan)
 plan_instructions = plan_parser.get_format_instructions().replace('{', '{{').replace('}', '}}')
 
 # --- 3) Build a dedicated planning agent ---
-planning_prompt = ChatPromptTemplate.from_messages([
-    ("system", (
-        "You’re a planning agent. Your job is to break the user’s topic into specific search queries (max 2).\n"
-        "Output **only** valid JSON matching this schema:\n"
-        f"{plan_instructions}")),
-    ("placeholder", "{messages}")
-])
-planning_agent = create_react_agent(model=llm, tools=[], prompt=planning_prompt)
+planning_system = (
+    "You’re a planning agent. Your job is to break the user’s topic into specific search queries (max 2).\n"
+    "Output **only** valid JSON matching this schema:\n"
+    f"{plan_instructions}"
+)
+
+
+def get_planning_agent():
+    model = with_hedging(routed_llm("plan"), "query_plan") if use_hedging else routed_llm("plan")
+    return make_agent(model=model, tool_list=[], system_prompt=planning_system)
 
 
 # ------------
@@ -58,12 +69,7 @@ planning_agent = create_react_agent(model=llm, tools=[], prompt=planning_prompt)
 # ------------
 
 # Note: Observe that with create_react_agent you cant guarantee the model must pick one of your registered tools.
-def make_agent(llm, tools, system_prompt):
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", system_prompt),
-        ("placeholder", "{messages}"),
-    ])
-    return create_react_agent(model=llm, tools=tools, prompt=prompt)
+# Agents are shared through the agent registry of agent_factory: calling the getters again does not rebuild them.
 
 
 # -----------
@@ -73,13 +79,29 @@ def make_agent(llm, tools, system_prompt):
 
 # Plan‐and‐execute (Tree‐of‐Thought)
 
+def research_query(query: str):
+    """Search one planned query and summarize its top URL (None if the search found nothing)."""
+    print('query', query)
+    # NOTE: use the wrapped versions here!
+    search_results = search_tracker.wrapped_tool(query)
+    print('search_results', search_results)
+
+    if not search_results:
+        return None
+    top_url = search_results[0]["url"]
+
+    return summarize_tracker.wrapped_tool(top_url)
+
+
 def research_node(state):
-    # Reset trackers before each run
-    search_tracker.call_count = 0
-    summarize_tracker.call_count = 0
+    # The trackers are shared by concurrent runs of the graph: count the calls of this run only
+    with ut.tracked_run():
+        return _research(state)
 
+
+def _research(state):
     # Phase 1: ask for a query plan
-    plan_response = planning_agent.invoke({"messages": state["messages"]})
+    plan_response = get_planning_agent().invoke({"messages": state["messages"]})
     plan_json = next(
         msg.content for msg in plan_response["messages"]
         if isinstance(msg, AIMessage)
@@ -88,21 +110,10 @@ def research_node(state):
     plan = plan_parser.parse(plan_json)
     queries = plan.queries
 
-    # Phase 2: execute each planned query using the *wrapped* tools
-    research_summaries = []
-
-    for query in queries:
-        print('query', query)
-        # NOTE: use the wrapped versions here!
-        search_results = search_tracker.wrapped_tool(query)
-        print('search_results', search_results)
-
-        if not search_results:
-            continue
-        top_url = search_results[0]["url"]
-
-        summary = summarize_tracker.wrapped_tool(top_url)
-        research_summaries.append(summary)
+    # Phase 2: execute the planned queries concurrently using the *wrapped* tools
+    # (summaries keep the order of the plan; the threads count in this run's trackers)
+    with ContextThreadPoolExecutor(max_workers=max(1, min(max_query_workers, len(queries)))) as pool:
+        research_summaries = [s for s in pool.map(research_query, queries) if s is not None]
 
     # Enforce that we did exactly the right number of calls
     search_tracker.assert_counts()
@@ -112,7 +123,7 @@ def research_node(state):
     return Command(
         update={
             "research_results": research_summaries,
-            "messages": state["messages"] + [
+            "messages": [
                 AIMessage(content="Research complete.", name="research_node")
             ]
         },
@@ -120,18 +131,19 @@ def research_node(state):
     )
 
 
-writing_agent = make_agent(
-    llm=llm,
-    tools=[tools.generate_article],
-    system_prompt=(
-        "You’re a writing agent. Your job is to take research summaries\n"
-        "and craft a Medium-ready article, with headings, intro, conclusion,\n"
-        "and a friendly yet authoritative tone.\n\n"
-        "When you respond, **you must** call the `generate_article` tool exactly once\n"
-        "with the arguments `topic` (string) and `research_summaries` (list of strings),\n"
-        "and then return its result as your final output. Do not write any free-form text."
+def get_writing_agent():
+    return make_agent(
+        model=get_llm(),
+        tool_list=[tools.generate_article],
+        system_prompt=(
+            "You’re a writing agent. Your job is to take research summaries\n"
+            "and craft a Medium-ready article, with headings, intro, conclusion,\n"
+            "and a friendly yet authoritative tone.\n\n"
+            "When you respond, **you must** call the `generate_article` tool exactly once\n"
+            "with the arguments `topic` (string) and `research_summaries` (list of strings),\n"
+            "and then return its result as your final output. Do not write any free-form text."
+        )
     )
-)
 
 
 def writing_node(state):
@@ -146,7 +158,7 @@ def writing_node(state):
         "Please write the article now."
     )
     # you could also use agent.invoke with explicit tool inputs
-    res = writing_agent.invoke(
+    res = get_writing_agent().invoke(
         {"messages": state["messages"] + [HumanMessage(content=prompt)]}
     )
     print('***DEBUG***: res in writing_node', res)
@@ -165,7 +177,7 @@ def writing_node(state):
     return Command(
         update={
             "article": article_text,  # the markdown article from your tool
-            "messages": state["messages"] + [
+            "messages": [
                 AIMessage(content="Article drafted.", name="writing_node")
             ]
         },
@@ -177,20 +189,29 @@ def writing_node(state):
 # Build and compile & add nodes
 # ------------------------------
 
-builder = StateGraph(State)
-builder.add_edge(START, "research_node")
-builder.add_node("research_node", research_node)
-builder.add_node("writing_node", writing_node)
-graph = builder.compile()
+@registered_graph
+def build_graph():
+    builder = StateGraph(State)
+    builder.add_edge(START, "research_node")
+    builder.add_node("research_node", research_node)
+    builder.add_node("writing_node", writing_node)
+    return builder.compile()
+
 
 # -------
 # INVOKE
 # -------
 
-initial_state = {
-    "messages": [HumanMessage(content="Write me an article on the future of AI.")],
-    "topic": "X",
-}
-answer = graph.invoke(input=initial_state)
+def main():
+    initial_state = {
+        "messages": [HumanMessage(content="Write me an article on the future of AI.")],
+        "topic": "X",
+    }
+    answer = build_graph().invoke(input=initial_state)
+
+    print('***DEBUG***: answer from graph.invoke', answer)
+    return answer
+
 
-print('***DEBUG***: answer from graph.invoke', answer)
+if __name__ == "__main__":
+    main()
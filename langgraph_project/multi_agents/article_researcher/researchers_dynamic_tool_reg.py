@@ -9,20 +9,16 @@ import os
 import re
 import logging
 
-from git import Repo  # GitPython for cloning repos
-
 from langchain_core.messages import AIMessage
 from langgraph.types import Command
 from langgraph.graph import StateGraph, START, END
-from utils import llm
+from utils import get_llm
 import prompts.multiagents_prompts as prompts
 
 from langchain_core.messages import HumanMessage
-from langchain_core.prompts.chat import ChatPromptTemplate
-
-from langgraph.prebuilt import create_react_agent
 from langgraph.graph import StateGraph, START
 
+from langgraph_project.agents_nodes.agent_factory import make_agent, registered_graph
 from langgraph_project.agents_nodes.custom_nodes import make_writing_node, make_research_node
 from langgraph_project.multi_agents.AgentState import MultiState  # Using a custom state class
 import langgraph_project.tools.tools as tools
@@ -30,13 +26,6 @@ import langgraph_project.multi_agents.helpers as ut
 
 logger = logging.getLogger(__name__)
 
-# -------------
-# LLM SETTINGS
-# -------------
-research_llm = llm
-writing_llm = llm
-
-
 # ------------------
 # Helper functions
 # ------------------
@@ -57,6 +46,8 @@ def crawl_repo(repo_url: str, root_dir: str = None) -> list[str]:
     if not os.path.isdir(os.path.join(clone_dir, '.git')):
         os.makedirs(clone_dir, exist_ok=True)
         logger.info(f"Cloning {repo_url} into {clone_dir}")
+        from git import Repo  # GitPython for cloning repos
+
         Repo.clone_from(repo_url, clone_dir)
 
     # Walk to collect .py files
@@ -145,14 +136,6 @@ def registration_node(state):
     return Command(update=update, goto='research_node')
 
 
-def make_agent(model, tool_list, system_prompt: str):
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", system_prompt),
-        ("placeholder", "{messages}"),
-    ])
-    return create_react_agent(model=model, tools=tool_list, prompt=prompt)
-
-
 def create_tracker(tool_fn, min_calls: int = 1, max_calls: int = 10):
     return ut.ToolInvocationTracker(tool_fn, min_calls=min_calls, max_calls=max_calls)
 
@@ -160,56 +143,72 @@ def create_tracker(tool_fn, min_calls: int = 1, max_calls: int = 10):
 search_tracker = create_tracker(tools.web_search)
 summarize_tracker = create_tracker(tools.safe_fetch_and_summarize)
 
-research_agent = make_agent(
-    model=research_llm,
-    tool_list=[search_tracker.wrapped_tool, summarize_tracker.wrapped_tool],
-    system_prompt=prompts.research_system_org,
-)
-
-writing_agent = make_agent(
-    model=writing_llm,
-    tool_list=[tools.generate_article],
-    system_prompt=prompts.writing_system_org,
-)
-
-# ----------------
-# NODE DEFINITIONS
-# ----------------
-
-
-research_node = make_research_node(
-    search_tool=search_tracker,
-    summarize_tool=summarize_tracker,
-    research_agent=research_agent,
-)
-writing_node = make_writing_node(
-    writing_agent=writing_agent,
-    article_tool=tools.generate_article
-)
-
-# --------------------------
-# Integrate into your graph
-# --------------------------
-
-builder = StateGraph(MultiState)
-# Start with registration
-builder.add_edge(START, 'registration_node')
-builder.add_node('registration_node', registration_node)
-builder.add_node('research_node', research_node)  # existing from your code
-builder.add_node('writing_node', writing_node)  # existing from your code
-builder.add_edge('registration_node', 'research_node')
-builder.add_edge('research_node', 'writing_node')
-builder.add_edge('writing_node', END)
-
-# Compile and invoke as usual
-graph = builder.compile()
-
-initial_state = {
-    'messages': [HumanMessage(content="Write me an article on the future of AI.")],
-    'topic': 'future of AI',
-    # initialize empty registry
-    'tools_registry': {}
-}
-
-answer = graph.invoke(input=initial_state)
-print(answer)
+
+@registered_graph
+def build_graph():
+    """Agents, nodes and the compiled graph, built on first use (importing this module builds nothing)."""
+    # -------------
+    # LLM SETTINGS
+    # -------------
+    research_llm = get_llm("research")
+    writing_llm = get_llm("writing")
+
+    research_agent = make_agent(
+        model=research_llm,
+        tool_list=[search_tracker.wrapped_tool, summarize_tracker.wrapped_tool],
+        system_prompt=prompts.research_system_org,
+    )
+
+    writing_agent = make_agent(
+        model=writing_llm,
+        tool_list=[tools.generate_article],
+        system_prompt=prompts.writing_system_org,
+    )
+
+    # ----------------
+    # NODE DEFINITIONS
+    # ----------------
+
+    research_node = make_research_node(
+        search_tool=search_tracker,
+        summarize_tool=summarize_tracker,
+        research_agent=research_agent,
+    )
+    writing_node = make_writing_node(
+        writing_agent=writing_agent,
+        article_tool=tools.generate_article
+    )
+
+    # --------------------------
+    # Integrate into your graph
+    # --------------------------
+
+    builder = StateGraph(MultiState)
+    # Start with registration
+    builder.add_edge(START, 'registration_node')
+    builder.add_node('registration_node', registration_node)
+    builder.add_node('research_node', research_node)  # existing from your code
+    builder.add_node('writing_node', writing_node)  # existing from your code
+    builder.add_edge('registration_node', 'research_node')
+    builder.add_edge('research_node', 'writing_node')
+    builder.add_edge('writing_node', END)
+
+    return builder.compile()
+
+
+def main():
+    initial_state = {
+        'messages': [HumanMessage(content="Write me an article on the future of AI.")],
+        'topic': 'future of AI',
+        # initialize empty registry
+        'tools_registry': {}
+    }
+
+    # Compile and invoke as usual
+    answer = build_graph().invoke(input=initial_state)
+    print(answer)
+    return answer
+
+
+if __name__ == "__main__":
+    main()
@@ -2,33 +2,62 @@
 
 import json
 import logging
+import sys
 
 from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
-from langchain_core.prompts.chat import ChatPromptTemplate
 
-from langgraph.prebuilt import create_react_agent
-from langgraph.types import Command
+from langgraph.types import Command, Send
 from langgraph.graph import StateGraph, START, END
 
 from langgraph_project.multi_agents.AgentState import MultiState2  # Using a custom state class
 import langgraph_project.tools.tools as tools
 import langgraph_project.multi_agents.helpers as ut
+from langgraph_project.agents_nodes.agent_factory import make_agent, registered_graph
+from langgraph_project.agents_nodes.llm_hedging import with_hedging
+from langgraph_project.agents_nodes.llm_router import routed_llm
+from langgraph_project.agents_nodes.node_cache import get_node_cache, node_cache_policy
+from langgraph_project.agents_nodes.semantic_cache import get_semantic_cache, semantic_llm
+from langgraph_project.agents_nodes.token_stream import stream_to_sink
 
 import prompts.multiagents_prompts as prompts
-from utils import llm
+from utils import get_llm
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# **************** Global Configurations ****************
+# Summarize all URLs of a research step concurrently with batch_fetch_and_summarize
+use_batch_summarize = True
+# Max subgoals researched at the same time (each subgoal runs in its own research branch)
+max_research_concurrency = 4
+# Memoize successful nodes on disk: rerunning the same goal after a failure resumes at the failed node
+use_node_cache = True
+# Nodes whose cached results are dropped before this run (e.g. after changing their prompt)
+invalidate_nodes = []
+# Reuse the plan of a similar goal (semantic cache scope "planning")
+use_semantic_cache = True
+# Hedge slow sub-goal planning calls with a duplicate request (hedging policy "planning")
+use_hedging = True
+# Print the article tokens as they are generated (the final state still holds the whole article). The
+# writing node then calls generate_article itself, so the tokens do not wait for a writing agent completion
+stream_article = True
+
 # -------------
 # LLM SETTINGS
 # -------------
-research_llm = llm
-writing_llm = llm
+# One model per role (LLMConfigs.llm_roles): research explores at a higher temperature than writing.
+# Planning and writing go through the model router (LLMConfigs.llm_routes, call sites "plan" and "write")
+def get_research_llm():
+    return get_llm("research")
+
+
+def get_planning_llm():
+    return routed_llm("plan")
 
-research_llm.temperature = 0.8  # higher temp for exploration
-writing_llm.temperature = 0  # lower temp for focused writing
+
+def get_writing_llm():
+    return routed_llm("write")
 
 
 # ----------------
@@ -39,8 +68,7 @@ def create_tracker(tool_fn, min_calls: int = 1, max_calls: int = 10):
     return ut.ToolInvocationTracker(tool_fn, min_calls=min_calls, max_calls=max_calls)
 
 
-search_tracker = create_tracker(tools.web_search)
-summarize_tracker = create_tracker(tools.safe_fetch_and_summarize)
+summarize_tool = tools.batch_fetch_and_summarize if use_batch_summarize else tools.safe_fetch_and_summarize
 
 
 # ----------------
@@ -48,37 +76,45 @@ summarize_tracker = create_tracker(tools.safe_fetch_and_summarize)
 # ----------------
 
 # Note: Observe that with create_react_agent you cant guarantee the model must pick one of your registered tools.
-
-def make_agent(model, tool_list, system_prompt: str):
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", system_prompt),
-        ("placeholder", "{messages}"),
-    ])
-    return create_react_agent(model=model, tools=tool_list, prompt=prompt)
-
+# Agents are shared through the agent registry of agent_factory: calling the getters again does not rebuild them.
 
 # TEST
 # --- Meta-Planning Agent ---
-planning_agent = make_agent(
-    model=research_llm,
-    tool_list=[],
-    system_prompt=(
-        "You're a planning agent.\n"
-        "1) Break down the user's high-level objective into a list of independent subgoals.\n"
-        "2) Return JSON: {{\"subgoals\": [string]}}."
+def get_planning_agent():
+    model = semantic_llm("planning", site="plan") if use_semantic_cache else get_planning_llm()
+    return make_agent(
+        model=with_hedging(model, "planning") if use_hedging else model,
+        tool_list=[],
+        system_prompt=(
+            "You're a planning agent.\n"
+            "1) Break down the user's high-level objective into a list of independent subgoals.\n"
+            "2) Return JSON: {{\"subgoals\": [string]}}."
+        )
+    )
+
+
+def make_research_agent():
+    """
+    Research agent with its own tool trackers, so that parallel research branches
+    check their tool call counts independently.
+    """
+    search_tracker = create_tracker(tools.web_search)
+    summarize_tracker = create_tracker(summarize_tool)
+    agent = make_agent(
+        model=get_research_llm(),
+        tool_list=[search_tracker.wrapped_tool, summarize_tracker.wrapped_tool],
+        system_prompt=prompts.research_system_batch if use_batch_summarize else prompts.research_system_org,
+        cache=False,  # the trackers are per branch, so this agent is never reused
     )
-)
-research_agent = make_agent(
-    model=research_llm,
-    tool_list=[search_tracker.wrapped_tool, summarize_tracker.wrapped_tool],
-    system_prompt=prompts.research_system_org,
-)
+    return agent, search_tracker, summarize_tracker
 
-writing_agent = make_agent(
-    model=writing_llm,
-    tool_list=[tools.generate_article],
-    system_prompt=prompts.writing_system_org,
-)
+
+def get_writing_agent():
+    return make_agent(
+        model=get_writing_llm(),
+        tool_list=[tools.generate_article],
+        system_prompt=prompts.writing_system_org,
+    )
 
 
 # ----------------
@@ -92,91 +128,52 @@ def planning_node(state):
     """
     user_goal = state.get("goal")
     llm_input = [HumanMessage(content=user_goal)]
-    res = planning_agent.invoke({"messages": llm_input})
+    res = get_planning_agent().invoke({"messages": llm_input})
     # Extract JSON list of subgoals
-    text = next((m.content for m in res["messages"]
-                 if isinstance(m, AIMessage)), None)
-    data = json.loads(text)
+    plan = next((m for m in res["messages"] if isinstance(m, AIMessage)), None)
+    try:
+        data = json.loads(plan.content)
+    except (AttributeError, json.JSONDecodeError):
+        if use_semantic_cache and plan is not None:
+            get_semantic_cache("planning").report_false_hit(plan)
+        raise
     subgoals = data.get("subgoals", [])
-    # Update state
-    new_msgs = state["messages"] + [AIMessage(content="Planning complete.", name="planning_node")]
+    print("DEBUG: subgoals in planning_node", subgoals)
+
+    # Fan out: one research branch per subgoal, all running in the same step
+    # (research_node -> writing_node only runs once every branch has finished)
     return Command(
-        update={"subgoals": subgoals, "messages": new_msgs},
-        goto="research_node"
+        update={"subgoals": subgoals, "messages": [AIMessage(content="Planning complete.", name="planning_node")]},
+        goto=[Send("research_node", {"subgoal": s, "messages": state["messages"]}) for s in subgoals]
+             or "writing_node",
     )
 
 
+def research_node(task):
+    """
+    Research a single subgoal (one parallel branch).
 
-# TEST
-def research_node(state):
-    "Perform research on the current subgoal"
-    # Pop next subgoal
-    subgoals = state["subgoals"]
-    results = state.get("research_results", [])
-
-    # 1) If there’s nothing left to research, go write
-    if not subgoals:
-        print('DEBUG: No subgoals left, transitioning to writing_node')
-        return Command(update=state, goto="writing_node")
-
-    # 2) Otherwise, pull the next subgoal and do your work
-    current = subgoals.pop(0)
-
-    print("DEBUG: subgoals in research_node", subgoals)
-
-
-    # Reset trackers
-    for tracker in (search_tracker, summarize_tracker):
-        tracker.call_count = 0
+    Receives {"subgoal", "messages"} from planning_node and only writes its own result;
+    the merge_research_results reducer of MultiState2 fans the branches back in.
+    """
+    current = task["subgoal"]
+    research_agent, search_tracker, summarize_tracker = make_research_agent()
 
     # inject subgoal prompt
     prompt = f"Research this specific task: {current}"
     print("DEBUG: prompt in research_node", prompt)
 
-    msgs = state["messages"] + [HumanMessage(content=prompt)]
-    res = research_agent.invoke({"messages": msgs})
-    # Invoke agent for research
+    res = research_agent.invoke({"messages": task["messages"] + [HumanMessage(content=prompt)]})
     search_tracker.assert_counts()
     summarize_tracker.assert_counts()
 
     # Extract summaries
-    research_summaries = [
-        msg.content
-        for msg in res["messages"]
-        # Note: It is important to match the name
-        if isinstance(msg, ToolMessage) and msg.name == 'safe_fetch_and_summarize'
-    ]
-
-    # Update state with results
-    new_messages = state["messages"] + [
-        AIMessage(content="Research complete.", name="research_node")
-    ]
-
-    # 3) Accumulate this subgoal’s results
-    results.append({
-        "subgoal": current,
-        "summaries": research_summaries
-    })
-
-    update = {
-        "subgoals": subgoals,  # ⚡️ propagate the shortened list
-        "research_results": results,  # ⚡️ accumulate
-        "messages": new_messages
-    }
-
-    # 4) If this one “failed”, re-enqueue it for refinement
-    # if len(research_summaries) < 2:
-    #     subgoals.insert(0, current)
-    #     update["messages"].append(
-    #         AIMessage("Refining my queries…", name="research_node")
-    #     )
-
-    # 5) Always loop back here until subgoals is empty
-    print("DEBUG: loop back in research node")
-    return Command(update=update, goto="research_node")
-
-
+    research_summaries = ut.tool_results(res["messages"], summarize_tracker.name)
 
+    return {
+        "research_results": [{"subgoal": current, "summaries": research_summaries}],
+        "messages": [AIMessage(content=f"Research complete: {current}", name="research_node")],
+    }
 
 
 def writing_node(state):
@@ -192,22 +189,27 @@ def writing_node(state):
     # if len(summaries) < 2:
     #     raise ValueError("Insufficient research summaries to proceed to writing stage.")
 
-    # Construct prompt for article generation
-    payload = json.dumps({"topic": state.get("topic"), "summaries": summaries})
-    human_msg = HumanMessage(content=f"Write an article with this data: {payload}")
-
-    response = writing_agent.invoke({"messages": state["messages"] + [human_msg]})
-
-    # Find generated article
-    article = next(
-        (msg.content for msg in response["messages"]
-         if isinstance(msg, ToolMessage) and msg.name == tools.generate_article.name),
-        None
-    )
+    if stream_article:
+        research_summaries = [s for result in summaries for s in result["summaries"]]
+        article = tools.generate_article.invoke({"topic": state.get("topic") or state.get("goal"),
+                                                 "research_summaries": research_summaries})
+    else:
+        # Construct prompt for article generation
+        payload = json.dumps({"topic": state.get("topic"), "summaries": summaries})
+        human_msg = HumanMessage(content=f"Write an article with this data: {payload}")
+
+        response = get_writing_agent().invoke({"messages": state["messages"] + [human_msg]})
+
+        # Find generated article
+        article = next(
+            (msg.content for msg in response["messages"]
+             if isinstance(msg, ToolMessage) and msg.name == tools.generate_article.name),
+            None
+        )
     if not article:
         raise RuntimeError("generate_article tool did not return a result.")
 
-    final_msgs = state["messages"] + [AIMessage(content="Article drafted.", name="writing_node")]
+    final_msgs = [AIMessage(content="Article drafted.", name="writing_node")]
     print("DEBUG: 2. writing_node: final article text form writing node", article)
 
     return Command(update={"article": article, "messages": final_msgs}, goto=END)
@@ -220,26 +222,42 @@ def writing_node(state):
 
 # --- Build StateGraph ---
 
-builder = StateGraph(MultiState2)
-builder.add_node("planning_node", planning_node)
-builder.add_node("research_node",  research_node)
-builder.add_node("writing_node",   writing_node)
-
-builder.add_edge(START,           "planning_node")
-builder.add_edge("planning_node", "research_node")
-builder.add_edge("research_node", "research_node")    # self-loop only
-# <-- no more research_node → writing_node edge
-builder.add_edge("writing_node",  END)
-graph = builder.compile()
+@registered_graph
+def build_graph():
+    builder = StateGraph(MultiState2)
+    builder.add_node("planning_node", planning_node,
+                     cache_policy=node_cache_policy("goal", "messages") if use_node_cache else None)
+    builder.add_node("research_node",  research_node,
+                     cache_policy=node_cache_policy("subgoal", "messages") if use_node_cache else None)
+    builder.add_node("writing_node",   writing_node)
+
+    builder.add_edge(START,           "planning_node")
+    # planning_node fans out to research_node with Send; the branches fan back in at writing_node
+    builder.add_edge("research_node", "writing_node")
+    builder.add_edge("writing_node",  END)
+    graph = builder.compile(cache=get_node_cache() if use_node_cache else None)
+    if use_node_cache and invalidate_nodes:
+        graph.clear_cache(invalidate_nodes)
+    return graph
 
 
 # --- Invoke ---
-initial_state = {
-    "messages": [],
-    "goal": "Learn all techniques, methods and more of agents in LangChain and LangGraph",
-    "subgoals": [],
-    "research_results": []
-}
-
-answer = graph.invoke(input=initial_state)
-print(answer)
\ No newline at end of file
+def main():
+    initial_state = {
+        "messages": [],
+        "goal": "Learn all techniques, methods and more of agents in LangChain and LangGraph",
+        "subgoals": [],
+        "research_results": []
+    }
+
+    config = {"max_concurrency": max_research_concurrency}
+    if stream_article:
+        answer = stream_to_sink(build_graph(), initial_state, sys.stdout, config=config)
+    else:
+        answer = build_graph().invoke(input=initial_state, config=config)
+    print(answer)
+    return answer
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,30 @@
 import functools
-from langchain.tools import Tool, BaseTool
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from langchain.tools import BaseTool
+from langchain_core.messages import AnyMessage, ToolMessage
+from langchain_core.tools import StructuredTool
+
+
+# Call counts of the current tracked run, by tracker id (see tracked_run)
+_run_counts: ContextVar[Optional[Dict[int, int]]] = ContextVar("tool_invocation_counts", default=None)
+
+
+@contextmanager
+def tracked_run():
+    """
+    Count tracker calls per run: inside the block, trackers count (and reset and check) only the calls of
+    this run, including those of the threads and tasks it starts with the context copied (LangChain and
+    LangGraph executors do). Graphs shared between concurrent runs can then use module-level trackers.
+    """
+    token = _run_counts.set({})
+    try:
+        yield
+    finally:
+        _run_counts.reset(token)
 
 
 class ToolInvocationTracker:
@@ -8,21 +33,55 @@ class ToolInvocationTracker:
         self.name = tool.name
         self.min_calls = min_calls
         self.max_calls = max_calls
-        self.call_count = 0
+        self._call_count = 0
+        # the wrapped tool may be called from several threads at once (e.g. parallel research queries)
+        self._lock = threading.Lock()
 
         # wrap the tool's function
         @functools.wraps(tool.func)
         def wrapped(*args, **kwargs):
-            self.call_count += 1
+            self._increment()
             return tool.func(*args, **kwargs)
 
-        # create a new Tool with the wrapped function
-        self.wrapped_tool = Tool.from_function(
+        # async tools (e.g. batch_fetch_and_summarize) are counted the same way
+        awrapped = None
+        if getattr(tool, "coroutine", None) is not None:
+            @functools.wraps(tool.coroutine)
+            async def awrapped(*args, **kwargs):
+                self._increment()
+                return await tool.coroutine(*args, **kwargs)
+
+        # create a new Tool with the wrapped function, keeping the original argument schema
+        # so that multi-argument tools (e.g. a list of URLs) are exposed to the agent as-is
+        self.wrapped_tool = StructuredTool.from_function(
             func=wrapped,
+            coroutine=awrapped,
             name=tool.name,
             description=tool.description,
+            args_schema=tool.args_schema,
         )
 
+    @property
+    def call_count(self) -> int:
+        counts = _run_counts.get()
+        return self._call_count if counts is None else counts.get(id(self), 0)
+
+    @call_count.setter
+    def call_count(self, value: int) -> None:
+        counts = _run_counts.get()
+        if counts is None:
+            self._call_count = value
+        else:
+            counts[id(self)] = value
+
+    def _increment(self):
+        with self._lock:
+            self.call_count += 1
+
+    def reset(self):
+        with self._lock:
+            self.call_count = 0
+
     def assert_counts(self):
         if self.call_count < self.min_calls:
             raise RuntimeError(
@@ -33,3 +92,22 @@ class ToolInvocationTracker:
                 f"Tool '{self.name}' was called {self.call_count} times; expected at most {self.max_calls}."
             )
 
+
+
+def tool_results(messages: List[AnyMessage], tool_name: str) -> List[str]:
+    """
+    Collect the outputs of every call to `tool_name` in an agent's message list.
+
+    Batch tools return a list of strings, which ends up as list content in the ToolMessage;
+    those are flattened so single and batch tools can be used interchangeably.
+    """
+    results = []
+    for msg in messages:
+        # Note: It is important to match the name
+        if not (isinstance(msg, ToolMessage) and msg.name == tool_name):
+            continue
+        if isinstance(msg.content, list):
+            results.extend(c if isinstance(c, str) else c.get("text", "") for c in msg.content)
+        else:
+            results.append(msg.content)
+    return results
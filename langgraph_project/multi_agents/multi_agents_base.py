@@ -6,17 +6,19 @@ This example uses react agent approach which allows the agent to choose tools dy
 
 
 import logging
+import sys
 
 from langgraph.graph import StateGraph, START
 
-from utils import llm
+from utils import get_llm
 
 from langchain_core.messages import HumanMessage
-from langgraph_project.agents_nodes.agent_factory import make_agent
+from langgraph_project.agents_nodes.agent_factory import make_agent, registered_graph
 from langgraph_project.agents_nodes.custom_nodes import (
     make_research_node,
     make_writing_node,
 )
+from langgraph_project.agents_nodes.token_stream import stream_to_sink
 from langgraph_project.multi_agents.AgentState import MultiState
 import langgraph_project.multi_agents.helpers as ut
 import langgraph_project.tools.tools as tools
@@ -27,18 +29,12 @@ import prompts.multiagents_prompts as prompts
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# ----------------
-# 1. LLM SETTINGS
-# ----------------
-research_llm = llm
-writing_llm = llm
-
-research_llm.temperature = 0.8  # higher temp for exploration
-writing_llm.temperature = 0  # lower temp for focused writing
-
+# **************** Global Configurations ****************
+# Print the article tokens as they are generated (the final state still holds the whole article)
+stream_article = True
 
 # ----------------
-# 2. TOOL TRACKERS
+# 1. TOOL TRACKERS
 # ----------------
 # Define tools needed
 # Observe that here we could add nodes with tools
@@ -52,7 +48,7 @@ summarize_tracker = create_tracker(tools.safe_fetch_and_summarize)
 
 
 # ----------------
-# 3. AGENT FACTORY
+# 2. AGENT FACTORY
 # ----------------
 
 # Note: Observe that with create_react_agent you cant guarantee the model must pick one of your registered tools.
@@ -69,51 +65,72 @@ summarize_tracker = create_tracker(tools.safe_fetch_and_summarize)
 #     )
 # )
 
-research_agent = make_agent(
-    model=research_llm,
-    tool_list=[search_tracker.wrapped_tool, summarize_tracker.wrapped_tool],
-    system_prompt=prompts.research_system_org,
-)
-
-writing_agent = make_agent(
-    model=writing_llm,
-    tool_list=[tools.generate_article],
-    system_prompt=prompts.writing_system_org,
-)
-
-# ----------------
-# NODE DEFINITIONS
-# ----------------
-
-research_node = make_research_node(
-    search_tool=search_tracker,
-    summarize_tool=summarize_tracker,
-    research_agent=research_agent,
-)
-writing_node = make_writing_node(
-    writing_agent=writing_agent,
-    article_tool=tools.generate_article
-)
-
-# --------------------------
-# STATE GRAPH CONSTRUCTION
-# --------------------------
-builder = StateGraph(MultiState)
-builder.add_edge(START, "research_node")
 
-builder.add_node("research_node", research_node)
-builder.add_node("writing_node", writing_node)
-graph = builder.compile()
+@registered_graph
+def build_graph():
+    """Agents, nodes and the compiled graph, built on first use (importing this module builds nothing)."""
+    # ----------------
+    # 3. LLM SETTINGS
+    # ----------------
+    # One model per role (LLMConfigs.llm_roles): research explores at a higher temperature than writing
+    research_llm = get_llm("research")
+    writing_llm = get_llm("writing")
+
+    research_agent = make_agent(
+        model=research_llm,
+        tool_list=[search_tracker.wrapped_tool, summarize_tracker.wrapped_tool],
+        system_prompt=prompts.research_system_org,
+    )
+
+    writing_agent = make_agent(
+        model=writing_llm,
+        tool_list=[tools.generate_article],
+        system_prompt=prompts.writing_system_org,
+    )
+
+    # ----------------
+    # NODE DEFINITIONS
+    # ----------------
+
+    research_node = make_research_node(
+        search_tool=search_tracker,
+        summarize_tool=summarize_tracker,
+        research_agent=research_agent,
+    )
+    writing_node = make_writing_node(
+        writing_agent=writing_agent,
+        article_tool=tools.generate_article,
+        direct=stream_article,
+    )
+
+    # --------------------------
+    # STATE GRAPH CONSTRUCTION
+    # --------------------------
+    builder = StateGraph(MultiState)
+    builder.add_edge(START, "research_node")
+
+    builder.add_node("research_node", research_node)
+    builder.add_node("writing_node", writing_node)
+    return builder.compile()
 
 
 # -------
 # INVOKE
 # -------
 
-initial_state = {
-    "messages": [HumanMessage(content="Write me an article on the future of AI.")],
-    "topic": "X",
-}
-answer = graph.invoke(input=initial_state)
+def main():
+    initial_state = {
+        "messages": [HumanMessage(content="Write me an article on the future of AI.")],
+        "topic": "X",
+    }
+    if stream_article:
+        answer = stream_to_sink(build_graph(), initial_state, sys.stdout)
+    else:
+        answer = build_graph().invoke(input=initial_state)
+
+    # print('***DEBUG***: answer from graph.invoke', answer)
+    return answer
+
 
-# print('***DEBUG***: answer from graph.invoke', answer)
+if __name__ == "__main__":
+    main()
@@ -5,21 +5,28 @@ https://github.com/anurag-mishra899/Multi-Agents-Appointment-Booking/blob/main/B
 # load_dotenv(env_path)
 # from dotenv import load_dotenv
 
-from langchain_openai import AzureChatOpenAI
 from langchain_core.messages import HumanMessage, AIMessage
-from langchain_core.prompts.chat import ChatPromptTemplate
 from typing_extensions import TypedDict, Annotated
 from typing import Literal, Dict, Any
 from langgraph.graph import StateGraph, START, END
-from langgraph.prebuilt import create_react_agent
+from langgraph_project.agents_nodes.agent_factory import make_agent, registered_graph
+from langgraph_project.agents_nodes.llm_hedging import with_hedging
+from langgraph_project.agents_nodes.llm_router import routed_llm
+from langgraph_project.agents_nodes.semantic_cache import get_semantic_cache, semantic_llm
 from langgraph_project.multi_agents.AgentState import State
 from langgraph.types import Command
 
 from langgraph_project.tools.tools import book_hotel, book_flight
-from helpers import llm
+from utils import get_llm
 
 import json
 
+# **************** Global Configurations ****************
+# Route rephrasings of a previous query like it (semantic cache scope "supervisor")
+use_semantic_cache = True
+# Hedge slow routing calls with a duplicate request (hedging policy "supervisor", see llm_hedging.py)
+use_hedging = True
+
 # cfg_instance = Cfg()
 #
 # cfg_instance.llm_configs.llm_deployment = "gpt-app"  # "langchain_model"
@@ -39,38 +46,28 @@ import json
 # Step-2: Define Agents Layer
 # ------------
 
-def create_agent(llm: AzureChatOpenAI, tools: list, system_prompt: str):
-    system_prompt = ChatPromptTemplate.from_messages(
-        [
-            (
-                "system",
-                system_prompt
-            ),
-            ("placeholder", "{messages}"),
-        ]
+# Agents are shared through the agent registry of agent_factory: calling the getters again does not rebuild them.
+def get_information_agent():
+    return make_agent(
+        model=get_llm(),
+        tool_list=[book_flight],
+        system_prompt="You are specialized agent to provide information related to availbility of doctors or any FAQs related to hospital based on the query. You have access to the tool.\n Make sure to ask user politely if you need any further information to execute the tool.\n For your information, Always consider current year is 2024."
     )
-    agent = create_react_agent(model=llm, tools=tools, prompt=system_prompt)
-    return agent
-
 
-information_agent = create_agent(
-    llm=llm,
-    tools=[book_flight],
-    system_prompt="You are specialized agent to provide information related to availbility of doctors or any FAQs related to hospital based on the query. You have access to the tool.\n Make sure to ask user politely if you need any further information to execute the tool.\n For your information, Always consider current year is 2024."
-)
 
-booking_agent = create_agent(
-    llm=llm,
-    tools=[book_hotel],
-    system_prompt="You are specialized agent to set, cancel or reschedule appointment based on the query. You have access to the tool.\n Make sure to ask user politely if you need any further information to execute the tool.\n For your information, Always consider current year is 2024."
-)
+def get_booking_agent():
+    return make_agent(
+        model=get_llm(),
+        tool_list=[book_hotel],
+        system_prompt="You are specialized agent to set, cancel or reschedule appointment based on the query. You have access to the tool.\n Make sure to ask user politely if you need any further information to execute the tool.\n For your information, Always consider current year is 2024."
+    )
 
 
 def information_node(state: State):
-    result = information_agent.invoke(state)
+    result = get_information_agent().invoke(state)
     return Command(
         update={
-            "messages": state["messages"] + [
+            "messages": [
                 AIMessage(content=result["messages"][-1].content, name="information_node")
             ]
         },
@@ -79,10 +76,10 @@ def information_node(state: State):
 
 
 def booking_node(state: State):
-    result = booking_agent.invoke(state)
+    result = get_booking_agent().invoke(state)
     return Command(
         update={
-            "messages": state["messages"] + [
+            "messages": [
                 AIMessage(content=result["messages"][-1].content, name="booking_node")
             ]
         },
@@ -132,7 +129,10 @@ def supervisor_node(state: State) -> Command:
                    {"role": "system", "content": system_prompt},
                ] + [state["messages"][-1]]
 
-    result = llm.invoke(
+    model = semantic_llm("supervisor", site="route") if use_semantic_cache else routed_llm("route")
+    if use_hedging:
+        model = with_hedging(model, "supervisor")
+    result = model.invoke(
         messages,
         response_format={"type": "json_object"})
     # llm.invoke(...) returns an AIMessage, so grab its .content directly
@@ -145,11 +145,16 @@ def supervisor_node(state: State) -> Command:
         # If parsing fails, default to FINISH
         worker = "FINISH"
         reasoning = "Failed to parse JSON from supervisor; defaulting to FINISH."
+        unusable = True
     else:
         worker = parsed.get("next", "FINISH")
-        if worker not in ("information_node", "booking_node", "FINISH"):
+        unusable = worker not in ("information_node", "booking_node", "FINISH")
+        if unusable:
             worker = "FINISH"
         reasoning = parsed.get("reasoning", "")
+    if unusable and use_semantic_cache:
+        # A cached answer that cannot be used is a false hit: it is dropped and not served again
+        get_semantic_cache("supervisor").report_false_hit(result)
 
     goto = END if worker == "FINISH" else worker
 
@@ -168,20 +173,29 @@ def supervisor_node(state: State) -> Command:
 # Step-4: Connect All Nodes and Build Graph
 # -----------------------------------------
 
-builder = StateGraph(State)
-builder.add_edge(START, "supervisor")
-builder.add_node("supervisor", supervisor_node)
-builder.add_node("information_node", information_node)
-builder.add_node("booking_node", booking_node)
-graph = builder.compile()
+@registered_graph
+def build_graph():
+    builder = StateGraph(State)
+    builder.add_edge(START, "supervisor")
+    builder.add_node("supervisor", supervisor_node)
+    builder.add_node("information_node", information_node)
+    builder.add_node("booking_node", booking_node)
+    return builder.compile()
+
+
+def main():
+    inputs = [
+        HumanMessage(content='can you check and make a booking if any cosmetic dentist available on 8 August 2024 at 9 AM?')
+    ]
+
+    config = {"configurable": {"thread_id": "1", "recursion_limit": 10}}
 
-inputs = [
-    HumanMessage(content='can you check and make a booking if any cosmetic dentist available on 8 August 2024 at 9 AM?')
-]
+    state = {'messages': inputs, 'id_number': 10232303}
+    answer = build_graph().invoke(input=state, config=config)
 
-config = {"configurable": {"thread_id": "1", "recursion_limit": 10}}
+    print(answer)
+    return answer
 
-state = {'messages': inputs, 'id_number': 10232303}
-answer = graph.invoke(input=state, config=config)
 
-print(answer)
+if __name__ == "__main__":
+    main()
@@ -8,9 +8,10 @@ from typing import Tuple
 from langgraph.graph import StateGraph, START, END
 from langgraph.types import Command
 
+from langgraph_project.agents_nodes.agent_factory import registered_graph
 from langgraph_project.agents_nodes.custom_nodes import validated_node
 from langgraph_project.multi_agents.AgentState import RefactorState
-from utils import llm
+from langgraph_project.agents_nodes.llm_router import routed_llm
 
 # # Send all LangGraph debug logs to the console
 # logging.basicConfig(
@@ -80,7 +81,7 @@ def refactor_llm_node(state: RefactorState) -> Dict[str, Any]:
         f"{state.original_code}\n```"
 
     )
-    raw = llm.predict(prompt)
+    raw = routed_llm("refactor").predict(prompt)
     return {"refactored_raw": raw}
 
 
@@ -170,14 +171,16 @@ builder.add_edge("write_temp", "execute_module")
 builder.add_edge("execute_module", "write_original")
 builder.add_edge("write_original", END)
 
-# 10. Compile the graph
-refactor_graph = builder.compile()
+# 10. Compile the graph (on first use)
+@registered_graph
+def get_refactor_graph():
+    return builder.compile()
 
 
 # Usage helper
 def refactor_file(filepath: str, task: str) -> Tuple[str, str]:
     initial = {"filename": filepath, "task": task}
-    out = refactor_graph.invoke(initial)
+    out = get_refactor_graph().invoke(initial)
     # If exec_stderr in state, return stderr
     stderr = out.get("exec_stderr", "")
     stdout = out.get("exec_stdout", "")
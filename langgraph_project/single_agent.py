@@ -4,10 +4,10 @@ from typing import Annotated
 
 from langchain_core.tools import tool
 from langgraph.prebuilt import InjectedState, create_react_agent
-from langchain_community.tools.tavily_search import TavilySearchResults
 
 import utils
 from conf.configs import Cfg
+from langgraph_project.agents_nodes.agent_factory import registered_graph
 
 import utils as ut
 
@@ -15,7 +15,6 @@ import utils as ut
 
 # Initialize your LLM
 
-tool_search = TavilySearchResults(max_results=5)
 # tools = [tool]
 
 cfg_instance = Cfg()
@@ -23,8 +22,6 @@ cfg_instance = Cfg()
 cfg_instance.llm_configs.llm_deployment = "gpt-app"  # "langchain_model"
 cfg_instance.llm_configs.openai_api_version = "2024-02-15-preview"  # Use this version for gpt4 # "2023-07-01-preview"
 
-llm = utils.get_llm_instance(configs=cfg_instance.llm_configs)
-
 
 # 2. Define your “tool” agents
 
@@ -59,41 +56,51 @@ def fallback_agent(state: Annotated[dict, InjectedState]) -> str:
 
 
 # 2) Build the supervisor
-agent = create_react_agent(
-    model=llm,
-    tools=[web_search, square_number, fallback_agent],
-    prompt="You are a helpful assistant that can search the web and do math.",
-    debug=True,
-    name="agent"
-)
-
-query = "Please use your square_number tool to square 4."
-
-# 3) Invoke it properly
-result = agent.invoke(
-    {
-        "messages": [
-            {"role": "user", "content": query}
-        ]
-    }
-)
-
-# 2) Check for any ToolMessage
-from langchain_core.messages.tool import ToolMessage
-
-called = any(isinstance(m, ToolMessage) for m in result["messages"])
-print("Tools were called!" if called else "No tools called.")
-
-# 4) Extract reasoning vs. final answer
-all_messages = result["messages"]  # List of BaseMessage
-final_answer_msg = all_messages[-1]  # the last AIMessage
-reasoning_msgs = all_messages[:-1]  # everything before it
-
-print("=== REASONING TRACE ===")
-for msg in reasoning_msgs:
-    pass
-    # this will include system prompt (if any), tool calls, function outputs, etc.
-    # print(f"{msg.role}: {msg.content!r}")
-
-print("\n=== FINAL ANSWER ===")
-print(final_answer_msg.content)
+@registered_graph
+def build_agent():
+    llm = utils.get_llm_instance(configs=cfg_instance.llm_configs)
+    return create_react_agent(
+        model=llm,
+        tools=[web_search, square_number, fallback_agent],
+        prompt="You are a helpful assistant that can search the web and do math.",
+        debug=True,
+        name="agent"
+    )
+
+
+def main():
+    query = "Please use your square_number tool to square 4."
+
+    # 3) Invoke it properly
+    result = build_agent().invoke(
+        {
+            "messages": [
+                {"role": "user", "content": query}
+            ]
+        }
+    )
+
+    # 2) Check for any ToolMessage
+    from langchain_core.messages.tool import ToolMessage
+
+    called = any(isinstance(m, ToolMessage) for m in result["messages"])
+    print("Tools were called!" if called else "No tools called.")
+
+    # 4) Extract reasoning vs. final answer
+    all_messages = result["messages"]  # List of BaseMessage
+    final_answer_msg = all_messages[-1]  # the last AIMessage
+    reasoning_msgs = all_messages[:-1]  # everything before it
+
+    print("=== REASONING TRACE ===")
+    for msg in reasoning_msgs:
+        pass
+        # this will include system prompt (if any), tool calls, function outputs, etc.
+        # print(f"{msg.role}: {msg.content!r}")
+
+    print("\n=== FINAL ANSWER ===")
+    print(final_answer_msg.content)
+    return result
+
+
+if __name__ == "__main__":
+    main()
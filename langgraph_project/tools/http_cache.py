@@ -0,0 +1,262 @@
+"""
+Persistent, content-addressed HTTP response cache for page fetches.
+
+Bodies are stored zlib-compressed under `<cache_dir>/bodies/<sha256[:2]>/<sha256>.z`, so identical
+pages served under different URLs are kept once. A small SQLite index maps each URL to its body
+and to the validators sent by the origin (ETag / Last-Modified). Entries younger than
+`fresh_seconds` are served without touching the network; older ones are revalidated with a
+conditional GET, so unchanged pages only cost a 304. When the origin is unreachable or fails
+(5xx), the cached copy is served instead. The total size of the stored bodies is bounded by
+`max_bytes` and the least recently used entries are evicted first.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+from conf.configs import Cfg
+from langgraph_project.tools.http_client import get_async_http_client, get_http_client
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    url           TEXT PRIMARY KEY,
+    body_hash     TEXT NOT NULL,
+    size          INTEGER NOT NULL,
+    etag          TEXT,
+    last_modified TEXT,
+    encoding      TEXT,
+    validated_at  REAL NOT NULL,
+    accessed_at   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at);
+CREATE INDEX IF NOT EXISTS idx_responses_body ON responses (body_hash);
+"""
+
+
+_UNCONDITIONAL = {"Cache-Control": "no-cache"}
+
+
+@dataclass
+class CachedPage:
+    url: str
+    content: bytes
+    encoding: Optional[str] = None
+    from_cache: bool = False  # True when no body was downloaded (fresh hit or 304)
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+
+class HttpResponseCache:
+    def __init__(self, cache_dir: str, max_bytes: int = 256 * 1024 * 1024, fresh_seconds: float = 0):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.fresh_seconds = fresh_seconds
+        self.stats: Dict[str, int] = {"hits": 0, "revalidated": 0, "misses": 0, "stale_served": 0, "evicted": 0}
+
+        os.makedirs(os.path.join(cache_dir, "bodies"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(cache_dir, "index.sqlite"), timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    # ----------------
+    # STORAGE HELPERS
+    # ----------------
+    def _body_path(self, body_hash: str) -> str:
+        return os.path.join(self.cache_dir, "bodies", body_hash[:2], body_hash + ".z")
+
+    def _read_body(self, body_hash: str) -> Optional[bytes]:
+        try:
+            with open(self._body_path(body_hash), "rb") as f:
+                return zlib.decompress(f.read())
+        except (OSError, zlib.error):
+            return None
+
+    def _write_body(self, content: bytes) -> Tuple[str, int]:
+        body_hash = hashlib.sha256(content).hexdigest()
+        path = self._body_path(body_hash)
+        if os.path.exists(path):
+            return body_hash, os.path.getsize(path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        compressed = zlib.compress(content, 6)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(compressed)
+        os.replace(tmp, path)
+        return body_hash, len(compressed)
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._total_bytes()
+
+    def _total_bytes(self) -> int:
+        row = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT MAX(size) AS size FROM responses GROUP BY body_hash)"
+        ).fetchone()
+        return row[0]
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the stored bodies fit in `max_bytes`."""
+        total = self._total_bytes()
+        while total > self.max_bytes:
+            row = self._db.execute(
+                "SELECT url, body_hash, size FROM responses ORDER BY accessed_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                break
+            url, body_hash, size = row
+            self._db.execute("DELETE FROM responses WHERE url = ?", (url,))
+            still_used = self._db.execute(
+                "SELECT 1 FROM responses WHERE body_hash = ? LIMIT 1", (body_hash,)
+            ).fetchone()
+            if not still_used:
+                try:
+                    os.remove(self._body_path(body_hash))
+                except OSError:
+                    pass
+                total -= size
+            self.stats["evicted"] += 1
+        self._db.commit()
+
+    # --------------------
+    # REQUEST / RESPONSE
+    # --------------------
+    def _lookup(self, url: str) -> Tuple[Optional[tuple], Optional[bytes], Dict[str, str], bool]:
+        """Return (row, cached body, conditional headers, is_fresh) for `url`."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body_hash, etag, last_modified, encoding, validated_at FROM responses WHERE url = ?",
+                (url,),
+            ).fetchone()
+        body = self._read_body(row[0]) if row else None
+        if body is None:
+            return None, None, {}, False
+
+        headers = {}
+        if row[1]:
+            headers["If-None-Match"] = row[1]
+        if row[2]:
+            headers["If-Modified-Since"] = row[2]
+        is_fresh = time.time() - row[4] < self.fresh_seconds
+        return row, body, headers, is_fresh
+
+    def _touch(self, url: str, validated: bool, resp: Optional[httpx.Response] = None) -> None:
+        now = time.time()
+        with self._lock:
+            if validated:
+                # A 304 may carry new validators: keep them for the next conditional GET
+                etag = resp.headers.get("ETag") if resp is not None else None
+                last_modified = resp.headers.get("Last-Modified") if resp is not None else None
+                self._db.execute(
+                    "UPDATE responses SET accessed_at = ?, validated_at = ?, etag = COALESCE(?, etag), "
+                    "last_modified = COALESCE(?, last_modified) WHERE url = ?",
+                    (now, now, etag, last_modified, url),
+                )
+            else:
+                self._db.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (now, url))
+            self._db.commit()
+
+    def _store(self, url: str, resp: httpx.Response) -> CachedPage:
+        content = resp.content
+        body_hash, size = self._write_body(content)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(url, body_hash, size, etag, last_modified, encoding, validated_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, body_hash, size, resp.headers.get("ETag"), resp.headers.get("Last-Modified"),
+                 resp.encoding, now, now),
+            )
+            self._evict()
+        return CachedPage(url=url, content=content, encoding=resp.encoding)
+
+    def _handle(self, url: str, row: Optional[tuple], body: Optional[bytes], resp: httpx.Response) -> CachedPage:
+        if resp.status_code == 304 and body is not None:
+            self.stats["revalidated"] += 1
+            self._touch(url, validated=True, resp=resp)
+            return CachedPage(url=url, content=body, encoding=row[3], from_cache=True)
+        resp.raise_for_status()
+        self.stats["misses"] += 1
+        return self._store(url, resp)
+
+    def _serve_stale(self, url: str, row: Optional[tuple], body: Optional[bytes], error: Exception) -> CachedPage:
+        # Only for network errors and server failures: a 4xx is the origin's answer, not an outage
+        if body is None or (isinstance(error, httpx.HTTPStatusError) and error.response.status_code < 500):
+            raise error
+        logger.warning("Serving stale cached copy of %s after fetch error: %s", url, error)
+        self.stats["stale_served"] += 1
+        self._touch(url, validated=False)
+        return CachedPage(url=url, content=body, encoding=row[3], from_cache=True)
+
+    def fetch(self, url: str, client: Optional[httpx.Client] = None) -> CachedPage:
+        """GET `url`, serving it from the cache when it is fresh or unchanged on the origin."""
+        row, body, headers, is_fresh = self._lookup(url)
+        if is_fresh:
+            self.stats["hits"] += 1
+            self._touch(url, validated=False)
+            return CachedPage(url=url, content=body, encoding=row[3], from_cache=True)
+        client = client or get_http_client()
+        try:
+            resp = client.get(url, headers=headers)
+            if resp.status_code == 304 and body is None:
+                # Nothing cached to revalidate (e.g. a 304 from an intermediary): fetch the page itself
+                resp = client.get(url, headers=_UNCONDITIONAL)
+            return self._handle(url, row, body, resp)
+        except httpx.HTTPError as e:
+            return self._serve_stale(url, row, body, e)
+
+    async def afetch(self, url: str, client: Optional[httpx.AsyncClient] = None) -> CachedPage:
+        """Async version of `fetch` (uses the shared async client unless one is given; disk I/O runs in a thread)."""
+        row, body, headers, is_fresh = await asyncio.to_thread(self._lookup, url)
+        if is_fresh:
+            self.stats["hits"] += 1
+            await asyncio.to_thread(self._touch, url, False)
+            return CachedPage(url=url, content=body, encoding=row[3], from_cache=True)
+        client = client or get_async_http_client()
+        try:
+            resp = await client.get(url, headers=headers)
+            if resp.status_code == 304 and body is None:
+                resp = await client.get(url, headers=_UNCONDITIONAL)
+            return await asyncio.to_thread(self._handle, url, row, body, resp)
+        except httpx.HTTPError as e:
+            return await asyncio.to_thread(self._serve_stale, url, row, body, e)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+            self._evict()
+        for root, _, files in os.walk(os.path.join(self.cache_dir, "bodies")):
+            for fn in files:
+                os.remove(os.path.join(root, fn))
+
+
+_cache: Optional[HttpResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> HttpResponseCache:
+    """Return the process-wide response cache configured by `ToolsConfigs`."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            configs = Cfg().tools_configs
+            _cache = HttpResponseCache(
+                cache_dir=os.path.join(configs.cache_dir, "http"),
+                max_bytes=configs.http_cache_max_bytes,
+                fresh_seconds=configs.http_cache_fresh_seconds,
+            )
+        return _cache
@@ -0,0 +1,98 @@
+"""
+Shared HTTP clients for the tools layer.
+
+Every page fetch goes through one keep-alive connection pool instead of opening a new
+connection per URL. The async client lives on a dedicated background event loop, so sync
+callers (LangGraph runs sync tools in worker threads) and async callers share the same pool.
+"""
+import asyncio
+import threading
+from typing import Awaitable, Optional, TypeVar
+
+import httpx
+
+from conf.configs import Cfg
+
+T = TypeVar("T")
+
+_lock = threading.Lock()
+_sync_client: Optional[httpx.Client] = None
+_async_client: Optional[httpx.AsyncClient] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _client_kwargs(configs=None) -> dict:
+    configs = configs or Cfg().tools_configs
+    return dict(
+        timeout=configs.http_timeout,
+        limits=httpx.Limits(
+            max_connections=configs.http_max_connections,
+            max_keepalive_connections=configs.http_max_keepalive_connections,
+        ),
+        follow_redirects=True,
+    )
+
+
+def get_http_client() -> httpx.Client:
+    """Return the process-wide sync client (created on first use)."""
+    global _sync_client
+    with _lock:
+        if _sync_client is None:
+            _sync_client = httpx.Client(**_client_kwargs())
+        return _sync_client
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="tools-http-loop", daemon=True).start()
+        return _loop
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """
+    Return the process-wide async client.
+
+    The client is bound to the background loop, so it must only be awaited from coroutines
+    scheduled through `run_coroutine` / `arun_coroutine`.
+    """
+    global _async_client
+    if asyncio.get_running_loop() is not _get_loop():
+        raise RuntimeError("The shared async client can only be used on the tools background loop.")
+    if _async_client is None:
+        _async_client = httpx.AsyncClient(**_client_kwargs())
+    return _async_client
+
+
+def run_coroutine(coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+    """Run `coro` on the background loop and block until it finishes."""
+    loop = _get_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        raise RuntimeError("run_coroutine would deadlock when called from the background loop; await it instead.")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+
+async def arun_coroutine(coro: Awaitable[T]) -> T:
+    """Await `coro` on the background loop from any other event loop."""
+    loop = _get_loop()
+    if asyncio.get_running_loop() is loop:
+        return await coro
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+
+def close_clients() -> None:
+    """Close the pooled clients (mainly for tests and long-running services that reload configs)."""
+    global _sync_client, _async_client
+    with _lock:
+        if _sync_client is not None:
+            _sync_client.close()
+            _sync_client = None
+        if _async_client is not None and _loop is not None:
+            asyncio.run_coroutine_threadsafe(_async_client.aclose(), _loop).result()
+            _async_client = None
@@ -0,0 +1,145 @@
+"""
+Cached, coalesced web search.
+
+The research agents issue many near-identical queries ("History of AI", "the history of AI ",
+"history of the AI") across sub-goals and topics. `SearchCache` keys results by a normalized query
+(case, whitespace and stop words ignored), keeps them for `ttl_seconds`, and makes concurrent
+callers of the same query wait for the one request already in flight instead of sending their own.
+The DuckDuckGo backend reuses a long-lived `DDGS` session per thread instead of opening one per query.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+
+from duckduckgo_search import DDGS
+
+from conf.configs import Cfg
+
+SearchResults = List[Dict[str, str]]
+
+STOP_WORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in", "is", "it", "of", "on",
+    "or", "that", "the", "to", "was", "what", "when", "where", "which", "who", "why", "with",
+})
+
+_WORD = re.compile(r"\w+(?:[-'.+#]\w+)*[+#]*")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Cache key of a search query: lower case, punctuation and repeated whitespace removed, stop words
+    dropped (so their presence and position do not matter). The order of the remaining words is kept.
+    """
+    words = _WORD.findall(query.lower())
+    content = [w for w in words if w not in STOP_WORDS]
+    return " ".join(content or words)
+
+
+class SearchCache:
+    def __init__(
+            self,
+            search_fn: Callable[[str, int], SearchResults],
+            ttl_seconds: float = 3600,
+            max_entries: int = 1024,
+    ):
+        self.search_fn = search_fn
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # hits: served from the cache, coalesced: waited on an identical in-flight search,
+        # misses: outbound searches actually sent
+        self.stats: Dict[str, int] = {"hits": 0, "coalesced": 0, "misses": 0, "errors": 0}
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, int], Tuple[float, SearchResults]]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, int], Future] = {}
+
+    def search(self, query: str, num_results: int = 5) -> SearchResults:
+        key = (normalize_query(query), num_results)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] <= self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return [dict(r) for r in entry[1]]
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+                self.stats["misses"] += 1
+            else:
+                self.stats["coalesced"] += 1
+
+        if not owner:
+            return [dict(r) for r in future.result()]
+
+        try:
+            results = self.search_fn(query, num_results)
+        except BaseException as e:
+            # Failures are not cached; waiting callers get the same error
+            with self._lock:
+                del self._inflight[key]
+                self.stats["errors"] += 1
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._entries[key] = (time.monotonic(), results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            del self._inflight[key]
+        future.set_result(results)
+        return [dict(r) for r in results]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# ----------------------
+# DUCKDUCKGO BACKEND
+# ----------------------
+# DDGS is not documented as thread-safe: each thread keeps its own session, so searches run in parallel
+_ddgs = threading.local()
+
+
+def ddgs_search(query: str, num_results: int = 5) -> SearchResults:
+    """Run a DuckDuckGo text search over the session of the calling thread and return [{'title', 'url'}, ...]."""
+    session = getattr(_ddgs, "session", None)
+    if session is None:
+        session = _ddgs.session = DDGS(timeout=int(Cfg().tools_configs.search_timeout))
+    try:
+        hits = session.text(query, max_results=num_results)
+    except Exception:
+        _ddgs.session = None  # start over with a fresh session next time
+        raise
+    # DDGS.text returns dicts with 'title' and 'href'
+    return [
+        {"title": hit.get("title", "No title").strip(), "url": hit.get("href", hit.get("url", "")).strip()}
+        for hit in hits
+    ]
+
+
+_cache: Optional[SearchCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> SearchCache:
+    """Return the process-wide search cache configured by `ToolsConfigs`."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            configs = Cfg().tools_configs
+            _cache = SearchCache(
+                ddgs_search,
+                ttl_seconds=configs.search_cache_ttl_seconds,
+                max_entries=configs.search_cache_max_entries,
+            )
+        return _cache
@@ -0,0 +1,123 @@
+"""
+Map-reduce summarization of long page text.
+
+Instead of truncating a page to its first few thousand characters, the text is split into
+token-bounded chunks, every chunk is summarized in one parallel wave with `llm.batch` /
+`llm.abatch` (map), and the partial summaries are merged by a single final call (reduce).
+The number of chunks and the total number of tokens sent are capped, so the cost of a huge page
+stays bounded while the latency is roughly that of two LLM calls.
+"""
+import logging
+from typing import Callable, List, Optional
+
+import tiktoken
+from langchain_core.messages import HumanMessage
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+logger = logging.getLogger(__name__)
+
+MAP_TEMPLATE = (
+    "You are an AI assistant that summarizes web articles.\n"
+    "The following text is part {index} of {total} of a longer article.\n"
+    "Please produce a concise summary (max {max_length} tokens) of this part:\n\n"
+    "{content}\n\n"
+    "Return only the summary, without commentary."
+)
+
+REDUCE_TEMPLATE = (
+    "You are an AI assistant that summarizes web articles.\n"
+    "Below are summaries of consecutive parts of one article.\n"
+    "Please combine them into a single concise summary (max {max_length} tokens) of the whole article:\n\n"
+    "{content}\n\n"
+    "Return only the summary, without commentary."
+)
+
+
+def token_counter(encoding_name: str = "o200k_base") -> Callable[[str], int]:
+    encoding = tiktoken.get_encoding(encoding_name)
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+def split_into_chunks(
+        text: str,
+        chunk_tokens: int,
+        max_chunks: int,
+        max_total_tokens: int,
+        length_function: Callable[[str], int],
+) -> List[str]:
+    """
+    Split `text` into chunks of at most `chunk_tokens` tokens, keeping at most `max_chunks` chunks
+    and `max_total_tokens` tokens in total (the tail of the text is dropped beyond that).
+    """
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_tokens, chunk_overlap=0, length_function=length_function
+    )
+    chunks, total = [], 0
+    for chunk in splitter.split_text(text):
+        tokens = length_function(chunk)
+        if len(chunks) >= max_chunks or total + tokens > max_total_tokens:
+            logger.info("Map-reduce summary truncated to %d chunks / %d tokens", len(chunks), total)
+            break
+        chunks.append(chunk)
+        total += tokens
+    return chunks
+
+
+def _map_messages(chunks: List[str], max_length: int) -> List[List[HumanMessage]]:
+    per_chunk = max(max_length // 2, 50) if len(chunks) > 1 else max_length
+    return [
+        [HumanMessage(content=MAP_TEMPLATE.format(
+            index=i + 1, total=len(chunks), max_length=per_chunk, content=chunk))]
+        for i, chunk in enumerate(chunks)
+    ]
+
+
+def _reduce_messages(partials: List[str], max_length: int) -> List[HumanMessage]:
+    content = "\n\n".join(f"Part {i + 1}: {p}" for i, p in enumerate(partials))
+    return [HumanMessage(content=REDUCE_TEMPLATE.format(max_length=max_length, content=content))]
+
+
+def map_reduce_summarize(
+        llm,
+        text: str,
+        max_length: int,
+        chunk_tokens: int = 2000,
+        max_chunks: int = 8,
+        max_total_tokens: int = 16000,
+        max_concurrency: Optional[int] = None,
+        length_function: Optional[Callable[[str], int]] = None,
+) -> str:
+    """Summarize `text` with one parallel wave of chunk summaries followed by a single reduce call."""
+    chunks = split_into_chunks(
+        text, chunk_tokens, max_chunks, max_total_tokens, length_function or token_counter()
+    )
+    if not chunks:
+        return ""
+    partials = [m.content for m in llm.batch(
+        _map_messages(chunks, max_length), config={"max_concurrency": max_concurrency})]
+    if len(partials) == 1:
+        return partials[0]
+    return llm.invoke(_reduce_messages(partials, max_length)).content
+
+
+async def amap_reduce_summarize(
+        llm,
+        text: str,
+        max_length: int,
+        chunk_tokens: int = 2000,
+        max_chunks: int = 8,
+        max_total_tokens: int = 16000,
+        max_concurrency: Optional[int] = None,
+        length_function: Optional[Callable[[str], int]] = None,
+) -> str:
+    """Async version of `map_reduce_summarize`."""
+    chunks = split_into_chunks(
+        text, chunk_tokens, max_chunks, max_total_tokens, length_function or token_counter()
+    )
+    if not chunks:
+        return ""
+    partials = [m.content for m in await llm.abatch(
+        _map_messages(chunks, max_length), config={"max_concurrency": max_concurrency})]
+    if len(partials) == 1:
+        return partials[0]
+    return (await llm.ainvoke(_reduce_messages(partials, max_length))).content
@@ -0,0 +1,113 @@
+"""
+Memoized LLM page summaries.
+
+The expensive step of `fetch_and_summarize` is the LLM call, not the fetch. Summaries are stored
+in SQLite under a key made of (sha256 of the extracted text, max_length, model deployment, prompt
+version), so byte-identical pages are only summarized once across runs, sub-goals and processes.
+Entries expire after `ttl_seconds`, and the least recently used ones are evicted above
+`max_entries`.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from conf.configs import Cfg
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS summaries (
+    key         TEXT PRIMARY KEY,
+    summary     TEXT NOT NULL,
+    created_at  REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_summaries_accessed ON summaries (accessed_at);
+"""
+
+
+class SummaryCache:
+    def __init__(self, path: str, ttl_seconds: Optional[float] = None, max_entries: int = 50_000):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "expired": 0, "evicted": 0}
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    @staticmethod
+    def make_key(text: str, max_length: int, deployment: str, prompt_version) -> str:
+        text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return hashlib.sha256(f"{text_hash}|{max_length}|{deployment}|{prompt_version}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT summary, created_at FROM summaries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            if self.ttl_seconds is not None and now - row[1] > self.ttl_seconds:
+                self._db.execute("DELETE FROM summaries WHERE key = ?", (key,))
+                self._db.commit()
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._db.execute("UPDATE summaries SET accessed_at = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            self.stats["hits"] += 1
+            return row[0]
+
+    def put(self, key: str, summary: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO summaries (key, summary, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, summary, now, now),
+            )
+            self._evict(now)
+            self._db.commit()
+
+    def _evict(self, now: float) -> None:
+        if self.ttl_seconds is not None:
+            cur = self._db.execute("DELETE FROM summaries WHERE created_at < ?", (now - self.ttl_seconds,))
+            self.stats["expired"] += cur.rowcount
+        overflow = self._db.execute("SELECT COUNT(*) FROM summaries").fetchone()[0] - self.max_entries
+        if overflow > 0:
+            cur = self._db.execute(
+                "DELETE FROM summaries WHERE key IN (SELECT key FROM summaries ORDER BY accessed_at LIMIT ?)",
+                (overflow,),
+            )
+            self.stats["evicted"] += cur.rowcount
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM summaries")
+            self._db.commit()
+
+
+_cache: Optional[SummaryCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_summary_cache() -> SummaryCache:
+    """Return the process-wide summary cache configured by `ToolsConfigs`."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            configs = Cfg().tools_configs
+            _cache = SummaryCache(
+                path=os.path.join(configs.cache_dir, "summaries.sqlite"),
+                ttl_seconds=configs.summary_cache_ttl_seconds,
+                max_entries=configs.summary_cache_max_entries,
+            )
+        return _cache
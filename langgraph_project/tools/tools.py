@@ -1,20 +1,50 @@
-from langchain_community.tools import TavilySearchResults
 from conf.configs import Cfg
-from duckduckgo_search import DDGS
 
-import requests
-from bs4 import BeautifulSoup
+import asyncio
+import functools
+import logging
+
 from langchain_core.messages import HumanMessage
 from langchain_core.prompts.chat import ChatPromptTemplate
-from typing import List, Dict
+from langchain_core.tools import StructuredTool
+from typing import AsyncIterator, List, Dict, Optional, Tuple
 
 from langchain.tools import tool
-from utils import llm
+from langgraph_project.tools.extraction import (
+    ExtractionStats,
+    aextract_paragraph_text_stream,
+    astream_page_text,
+    extract_paragraph_text,
+    extract_paragraph_text_stream,
+    iter_chunks,
+    stream_page_text,
+)
+from langgraph_project.agents_nodes.llm_router import routed_llm
+from langgraph_project.agents_nodes.semantic_cache import semantic_llm
+from langgraph_project.agents_nodes.token_stream import TokenStreamHandler, get_token_writer, with_callback
+from langgraph_project.tools.http_cache import get_http_cache
+from langgraph_project.tools.http_client import (
+    arun_coroutine,
+    get_http_client,
+    run_coroutine,
+)
+from langgraph_project.tools.search_cache import ddgs_search, get_search_cache
+from langgraph_project.tools.summarization import amap_reduce_summarize, map_reduce_summarize, token_counter
+from langgraph_project.tools.summary_cache import SummaryCache, get_summary_cache
+
+logger = logging.getLogger(__name__)
 
 configs_ = Cfg()
 connection_string = configs_.database_configs.pg_connection_string
 
-tool_search = TavilySearchResults(max_results=5)
+
+
+@functools.lru_cache(maxsize=None)
+def get_tool_search():
+    """Tavily search tool, built on first use (langchain_community is slow to import)."""
+    from langchain_community.tools import TavilySearchResults
+
+    return TavilySearchResults(max_results=5)
 
 
 @tool
@@ -33,49 +63,84 @@ def book_flight(from_airport: str, to_airport: str):
 def web_search(query: str, num_results: int = 5) -> list[str]:  # Use 1 for testing , 5 default
     """Run a web search using DuckDuckGo (v8+ API) and return a list of Title - URL strings."""
     print('***DEBUG***: Running websearch with query:', query)
-    # results = []
-    results: List[Dict[str, str]] = []  # TEST
-    # DDGS.text yields dicts with 'title' and 'href'
-    with DDGS() as ddgs:
-        for hit in ddgs.text(query, max_results=num_results):
-            # title = hit.get("title", "No title")
-            # url = hit.get("href", hit.get("url", ""))
-            # results.append(f"{title} - {url}")
-            # ---------------------------------------------
-            # TEST
-            title = hit.get("title", "No title").strip()
-            url = hit.get("href", hit.get("url", "")).strip()
-            results.append({"title": title, "url": url})
-            # ---------------------------------------------
+    # Identical (normalized) queries are served from the cache or share the request in flight
+    if configs_.tools_configs.use_search_cache:
+        results: List[Dict[str, str]] = get_search_cache().search(query, num_results)
+    else:
+        results = ddgs_search(query, num_results)
 
     #print('***DEBUG***: Web search results:', results)
     return results
 
 
+def _fetch_page_text(url: str) -> str:
+    """GET `url` through the response cache (or the pooled client when caching is off)."""
+    if configs_.tools_configs.use_http_cache:
+        return get_http_cache().fetch(url).text
+    resp = get_http_client().get(url)
+    resp.raise_for_status()
+    return resp.text
+
+
 @tool
-def fetch_and_summarize(url: str, max_length: int = 300) -> str:
+def fetch_html(url: str) -> str:
     """
-    Fetch the content of a URL and return a concise summary using an LLM.
+    Fetch the raw HTML of a URL.
 
-    Returns:
-        str: The generated summary as a string.
+    Unchanged pages are served from the local response cache.
     """
+    return _fetch_page_text(url)
 
-    print("***DEBUG***: Running fetch_and_summarize", fetch_and_summarize)
 
-    try:
-        resp = requests.get(url, timeout=10)
-        resp.raise_for_status()
-    except Exception as e:
-        return f"Error fetching URL {url}: {e}"
+def _log_extraction(url: str, stats: ExtractionStats) -> None:
+    logger.info(
+        "Extracted %d chars from %s: read %d of %s body bytes, discarded %d chars%s",
+        stats.text_chars, url, stats.bytes_read,
+        stats.bytes_total if stats.bytes_total is not None else "?",
+        stats.chars_discarded, " (stopped early)" if stats.stopped_early else "",
+    )
 
-    # Extract visible text from paragraphs
-    soup = BeautifulSoup(resp.text, 'html.parser')
-    paragraphs = [p.get_text(separator=' ', strip=True) for p in soup.find_all('p')]
-    text = ' '.join(paragraphs)
-    if not text:
-        return f"No extractable text found at {url}."
 
+def _extract_page_text(url: str, char_limit: int) -> str:
+    """
+    Stream the paragraph text of `url`, stopping once `char_limit` characters are collected.
+
+    With the response cache on, the body comes from the cache (a miss downloads the full body so
+    it can be stored) and only the parsing stops early; without it the download stops early too.
+    """
+    if configs_.tools_configs.use_http_cache:
+        page = get_http_cache().fetch(url)
+        text, stats = extract_paragraph_text_stream(
+            iter_chunks(page.content), page.encoding, char_limit, len(page.content)
+        )
+    else:
+        text, stats = stream_page_text(url, char_limit)
+    _log_extraction(url, stats)
+    return text
+
+
+async def _aextract_page_text(url: str, char_limit: int) -> str:
+    if configs_.tools_configs.use_http_cache:
+        page = await get_http_cache().afetch(url)
+
+        async def _chunks():
+            for chunk in iter_chunks(page.content):
+                yield chunk
+
+        text, stats = await aextract_paragraph_text_stream(
+            _chunks(), page.encoding, char_limit, len(page.content)
+        )
+    else:
+        text, stats = await astream_page_text(url, char_limit)
+    _log_extraction(url, stats)
+    return text
+
+
+# Bump whenever the summary prompt changes so that cached summaries are not reused
+SUMMARY_PROMPT_VERSION = 1
+
+
+def _build_summary_messages(text: str, max_length: int) -> list[HumanMessage]:
     # Truncate to a reasonable character limit for the LLM
     excerpt = text[:max_length * 10]
 
@@ -89,16 +154,195 @@ def fetch_and_summarize(url: str, max_length: int = 300) -> str:
     prompt = ChatPromptTemplate.from_messages([
         ("system", template)
     ])
-    # Format and invoke
-    messages = [HumanMessage(content=prompt.format(content=excerpt, max_length=max_length))]
-    summary = llm.invoke(messages).content
-   #print('***DEBUG***: Summary of fetch_and_summarize', summary)
+    return [HumanMessage(content=prompt.format(content=excerpt, max_length=max_length))]
+
+
+def _use_map_reduce() -> bool:
+    return configs_.tools_configs.summarize_mode == 'map_reduce'
+
+
+def _text_char_limit(max_length: int) -> int:
+    """How much paragraph text to extract for one summary."""
+    if _use_map_reduce():
+        # Generous upper bound (tokens rarely exceed 6 chars); the splitter enforces the token caps
+        return configs_.tools_configs.map_reduce_max_total_tokens * 6
+    return max_length * 10
+
+
+def _map_reduce_kwargs() -> dict:
+    c = configs_.tools_configs
+    return dict(
+        chunk_tokens=c.map_reduce_chunk_tokens,
+        max_chunks=c.map_reduce_max_chunks,
+        max_total_tokens=c.map_reduce_max_total_tokens,
+        max_concurrency=c.map_reduce_max_concurrency,
+        length_function=token_counter(c.token_encoding),
+    )
+
+
+def _summary_cache_key(text: str, max_length: int) -> Optional[str]:
+    if not configs_.tools_configs.use_summary_cache:
+        return None
+    llm = routed_llm("summarize")
+    deployment = getattr(llm, "deployment_name", None) or getattr(llm, "model_name", "")
+    prompt_version = f"{SUMMARY_PROMPT_VERSION}-{configs_.tools_configs.summarize_mode}"
+    return SummaryCache.make_key(text, max_length, deployment, prompt_version)
 
+
+def _summary_llm():
+    # Near-identical pages (mirrors, syndicated posts) reuse a summary through the semantic cache
+    if configs_.tools_configs.use_semantic_summary_cache:
+        return semantic_llm("summaries", site="summarize")
+    return routed_llm("summarize")
+
+
+def _summarize_text(text: str, max_length: int) -> str:
+    """Summarize extracted page text, reusing the cached summary of identical text."""
+    key = _summary_cache_key(text, max_length)
+    if key is not None and (cached := get_summary_cache().get(key)) is not None:
+        return cached
+
+    if _use_map_reduce():
+        summary = map_reduce_summarize(routed_llm("summarize"), text, max_length, **_map_reduce_kwargs())
+    else:
+        summary = _summary_llm().invoke(_build_summary_messages(text, max_length)).content
+    assert len(summary) > 0, "LLM returned an empty summary"
+    if key is not None:
+        get_summary_cache().put(key, summary)
+    return summary
+
+
+async def _asummarize_text(text: str, max_length: int) -> str:
+    key = _summary_cache_key(text, max_length)
+    if key is not None and (cached := get_summary_cache().get(key)) is not None:
+        return cached
+
+    if _use_map_reduce():
+        summary = await amap_reduce_summarize(routed_llm("summarize"), text, max_length, **_map_reduce_kwargs())
+    else:
+        summary = (await _summary_llm().ainvoke(_build_summary_messages(text, max_length))).content
     assert len(summary) > 0, "LLM returned an empty summary"
+    if key is not None:
+        get_summary_cache().put(key, summary)
+    return summary
+
+
+@tool
+def fetch_and_summarize(url: str, max_length: int = 300) -> str:
+    """
+    Fetch the content of a URL and return a concise summary using an LLM.
+
+    Returns:
+        str: The generated summary as a string.
+    """
+
+    print("***DEBUG***: Running fetch_and_summarize", fetch_and_summarize)
+
+    # Extract visible text from paragraphs, reading only as much as the summary will use
+    try:
+        text = _extract_page_text(url, char_limit=_text_char_limit(max_length))
+    except Exception as e:
+        return f"Error fetching URL {url}: {e}"
+
+    if not text:
+        return f"No extractable text found at {url}."
+
+    # Format and invoke (or reuse the summary of identical text)
+    summary = _summarize_text(text, max_length)
+   #print('***DEBUG***: Summary of fetch_and_summarize', summary)
 
     return summary
 
 
+# -------------------------
+# BATCH FETCH & SUMMARIZE
+# -------------------------
+
+async def _afetch_and_summarize_one(url: str, max_length: int, semaphore: asyncio.Semaphore) -> str:
+    """Fetch one page over the pooled async client and summarize it as soon as it arrives."""
+    async with semaphore:
+        try:
+            text = await _aextract_page_text(url, char_limit=_text_char_limit(max_length))
+        except Exception as e:
+            return f"Error fetching URL {url}: {e}"
+
+        if not text:
+            return f"No extractable text found at {url}."
+
+        try:
+            return await _asummarize_text(text, max_length)
+        except Exception as e:
+            print(f"[Warning] summarizer failed for {url}: {e}")
+            return simple_text_summarizer(text)
+
+
+async def aiter_fetch_and_summarize(
+        urls: List[str],
+        max_length: int = 300,
+        max_concurrency: Optional[int] = None,
+) -> AsyncIterator[Tuple[str, str]]:
+    """
+    Fetch and summarize `urls` concurrently, yielding (url, summary) pairs in completion order.
+
+    At most `max_concurrency` pages (default: `ToolsConfigs.fetch_max_concurrency`) are in flight
+    at once, and every page is summarized as soon as its body has been downloaded, so the total
+    latency is bounded by the slowest page rather than the sum of all pages.
+    Must run on the tools background loop (see `arun_coroutine`).
+    """
+    semaphore = asyncio.Semaphore(max_concurrency or configs_.tools_configs.fetch_max_concurrency)
+
+    async def _run(u: str) -> Tuple[str, str]:
+        return u, await _afetch_and_summarize_one(u, max_length, semaphore)
+
+    for next_done in asyncio.as_completed([_run(u) for u in dict.fromkeys(urls)]):
+        yield await next_done
+
+
+async def _abatch_collect(urls: List[str], max_length: int, max_concurrency: Optional[int]) -> List[str]:
+    summaries = {}
+    async for url, summary in aiter_fetch_and_summarize(urls, max_length, max_concurrency):
+        summaries[url] = summary
+    # Keep the caller's order regardless of completion order
+    return [summaries[u] for u in urls]
+
+
+async def abatch_fetch_and_summarize(
+        urls: List[str],
+        max_length: int = 300,
+        max_concurrency: Optional[int] = None,
+) -> List[str]:
+    """
+    Fetch and summarize several URLs concurrently over one pooled keep-alive client.
+
+    Returns:
+        List[str]: One summary (or error message) per URL, in the same order as `urls`.
+    """
+    return await arun_coroutine(_abatch_collect(urls, max_length, max_concurrency))
+
+
+def _batch_fetch_and_summarize(
+        urls: List[str],
+        max_length: int = 300,
+        max_concurrency: Optional[int] = None,
+) -> List[str]:
+    """
+    Fetch several URLs concurrently and return a concise LLM summary for each one.
+    Pass all the URLs you want summarized in a single call.
+
+    Returns:
+        List[str]: One summary (or error message) per URL, in the same order as `urls`.
+    """
+    print('***DEBUG***: Running batch_fetch_and_summarize with urls:', urls)
+    return run_coroutine(_abatch_collect(urls, max_length, max_concurrency))
+
+
+batch_fetch_and_summarize = StructuredTool.from_function(
+    func=_batch_fetch_and_summarize,
+    coroutine=abatch_fetch_and_summarize,
+    name="batch_fetch_and_summarize",
+)
+
+
 def _build_article_prompt(topic: str, research_summaries: list[str], audience: str, tone: str) -> str:
     """
     Construct a prompt for the LLM that asks for a markdown-formatted article.
@@ -140,11 +384,18 @@ def generate_article(
     Returns:
         A single string containing the full article in markdown, with headings,
         embedded links in the text, and a References section at the end.
+
+    Inside a graph run, the tokens are also emitted as they are generated (custom stream events, see
+    token_stream.py).
     """
     print('***DEBUG***: Running generate_article with topic:', topic)
     article_prompt = _build_article_prompt(topic, research_summaries, audience, tone)
-    # Call the LLM and return its output
-    response = llm.invoke(article_prompt).content
+    write = get_token_writer()
+    handler = TokenStreamHandler(write or (lambda token: None))
+    # Always streamed, so the LLM cache key is the same with and without a token consumer
+    response = routed_llm("write").invoke(article_prompt, with_callback(handler), stream=True).content
+    if write is not None and handler.tokens == 0 and response:
+        write(response)  # served from the LLM cache: emitted at once
     return response
 
 
@@ -165,10 +416,8 @@ def safe_fetch_and_summarize(url: str) -> str:
     except Exception as e1:
         print(f"[Warning] fetch_and_summarize failed for {url}: {e1}")
         try:
-            # suppose you have a low-level fetch_html tool:
-            from langgraph_project.tools.tools import fetch_html
-            raw = fetch_html(url)
-            return simple_text_summarizer(raw)
+            raw = fetch_html.invoke(url)
+            return simple_text_summarizer(extract_paragraph_text(raw) or raw)
         except Exception as e2:
             print(f"[Error] fallback summarizer also failed for {url}: {e2}")
             return f"[Failed to fetch or summarize {url}: {e2}]"
@@ -5,6 +5,13 @@ research_system_org = """You’re a research agent. Your job is to:
 Ask follow-ups if the topic is ambiguous."""
 
 
+research_system_batch = """You’re a research agent. Your job is to:
+1) Break the user’s topic into specific search queries,
+2) Use the web_search tool (exactly 2 times),
+3) Summarize the top results by calling batch_fetch_and_summarize ONCE with the list of all their URLs.
+Ask follow-ups if the topic is ambiguous."""
+
+
 research_system_test = """
 You’re a research agent. Given a user topic, you will:
 1) Break the user’s topic into specific search queries.
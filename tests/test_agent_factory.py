@@ -0,0 +1,79 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.tools import tool
+
+from langgraph_project.agents_nodes.agent_factory import AgentRegistry, make_agent, model_key, tools_key
+
+
+@tool
+def lookup(query: str) -> str:
+    """Look something up."""
+    return query
+
+
+def test_agents_are_shared_by_model_config_tools_and_prompt():
+    registry = AgentRegistry()
+    agent = registry.agent(FakeListChatModel(responses=["hi"]), [], "You are a writer.")
+
+    # A new model object with the same configuration reuses the compiled agent
+    assert registry.agent(FakeListChatModel(responses=["hi"]), [], "You are a writer.") is agent
+    assert registry.agent(FakeListChatModel(responses=["hi"]), [], "You are a planner.") is not agent
+    assert registry.agent(FakeListChatModel(responses=["bye"]), [], "You are a writer.") is not agent
+    assert registry.stats["builds"] == 3 and registry.stats["hits"] == 1
+    assert registry.stats["build_seconds"] > 0 and len(registry.build_times) == 3
+
+    assert agent.invoke({"messages": [("user", "hello")]})["messages"][-1].content == "hi"
+
+
+def test_keys():
+    assert model_key(FakeListChatModel(responses=["a"])) == model_key(FakeListChatModel(responses=["a"]))
+    assert tools_key([lookup]) == tools_key([lookup])
+    # A tracker-wrapped tool has the same name but is another tool
+    @tool("lookup")
+    def wrapped_lookup(query: str) -> str:
+        """Look something up."""
+        return query
+
+    assert tools_key([lookup]) != tools_key([wrapped_lookup])
+
+
+def test_concurrent_requests_build_once():
+    registry = AgentRegistry()
+    builds = []
+
+    def build():
+        builds.append(threading.get_ident())
+        time.sleep(0.05)
+        return object()
+
+    with ThreadPoolExecutor(8) as pool:
+        graphs = list(pool.map(lambda _: registry.graph("graph", build), range(8)))
+
+    assert len(builds) == 1
+    assert all(g is graphs[0] for g in graphs)
+    assert registry.stats["builds"] == 1 and registry.stats["hits"] + registry.stats["coalesced"] == 7
+
+
+def test_failed_builds_are_not_cached():
+    registry = AgentRegistry()
+
+    def fail():
+        raise RuntimeError("missing credentials")
+
+    with pytest.raises(RuntimeError):
+        registry.graph("graph", fail)
+    assert registry.graph("graph", lambda: "compiled") == "compiled"
+
+
+def test_lru_bound_and_uncached_agents():
+    registry = AgentRegistry(max_entries=2)
+    for name in "abc":
+        registry.graph(name, object)
+    assert len(registry) == 2
+
+    model = FakeListChatModel(responses=["hi"])
+    assert make_agent(model, [], "prompt", cache=False) is not make_agent(model, [], "prompt", cache=False)
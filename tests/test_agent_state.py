@@ -0,0 +1,43 @@
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage
+from langgraph.graph.message import add_messages
+
+from langgraph_project.multi_agents.AgentState import append_messages, merge_research_results
+
+
+def test_merge_research_results_appends_and_replaces_by_subgoal():
+    left = [{"subgoal": "a", "summaries": ["A1"]}]
+
+    merged = merge_research_results(left, [{"subgoal": "b", "summaries": ["B1"]}])
+    merged = merge_research_results(merged, [{"subgoal": "a", "summaries": ["A2"]}])
+
+    assert merged == [{"subgoal": "a", "summaries": ["A2"]}, {"subgoal": "b", "summaries": ["B1"]}]
+    assert merge_research_results(None, None) == []
+    # Writing back the full list does not duplicate entries
+    assert merge_research_results(merged, merged) == merged
+
+
+def test_append_messages_matches_add_messages():
+    history = append_messages([], [HumanMessage(content="hi"), ("ai", "hello")])
+    step = append_messages(history, AIMessage(content="delta", name="node"))
+    full = append_messages(step, list(step) + [AIMessage(content="full", name="node")])
+
+    assert [m.content for m in history] == ["hi", "hello"]  # earlier snapshots are not modified
+    assert [m.content for m in full] == ["hi", "hello", "delta", "full"]
+    assert [m.content for m in full] == [m.content for m in add_messages(list(step), list(step) + [full[-1]])]
+
+    edited = append_messages(full, AIMessage(content="edited", id=full[1].id))
+    assert [m.content for m in edited] == ["hi", "edited", "delta", "full"]
+
+    removed = append_messages(edited, RemoveMessage(id=edited[0].id))
+    assert [m.content for m in removed] == ["edited", "delta", "full"]
+
+
+def test_append_messages_on_sibling_branches():
+    base = append_messages([], [HumanMessage(content="base")])
+    left = append_messages(base, AIMessage(content="left", id="x"))
+    right = append_messages(base, AIMessage(content="right", id="y"))
+
+    assert [m.content for m in append_messages(right, AIMessage(content="left again", id="x"))] == \
+        ["base", "right", "left again"]
+    assert [m.content for m in append_messages(left, AIMessage(content="left edited", id="x"))] == \
+        ["base", "left edited"]
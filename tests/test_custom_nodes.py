@@ -0,0 +1,72 @@
+import pytest
+from langgraph.graph import END
+from langgraph.types import Command
+from pydantic import ValidationError
+
+from langchain_core.messages import AIMessage, RemoveMessage
+
+from langgraph_project.agents_nodes.custom_nodes import validated_command_node, validated_node
+from langgraph_project.multi_agents.AgentState import MultiState, RefactorState
+
+
+@pytest.fixture
+def state():
+    code = "x = 1\n" * 10_000
+    return RefactorState(filename="demo.py", task="refactor", original_code=code, refactored_code=code)
+
+
+def test_validated_node_returns_only_changed_fields(state):
+    @validated_node
+    def node(s):
+        return {"refactored_code": s.original_code, "temp_path": "demo.py.refactored"}
+
+    assert node(state) == {"temp_path": "demo.py.refactored"}
+    assert node(state.model_dump())["temp_path"] == "demo.py.refactored"
+    assert state.temp_path == ""  # the input state is not modified
+
+
+def test_validated_node_runs_field_validators_on_updates(state):
+    @validated_node
+    def node(s):
+        return {"original_code": "   "}
+
+    with pytest.raises(ValidationError):
+        node(state)
+
+
+def test_validated_node_validates_command_updates(state):
+    @validated_node
+    def node(s):
+        return Command(update={"exec_stderr": "boom", "task": s.task}, goto=END)
+
+    result = node(state)
+    assert isinstance(result, Command) and result.goto == END
+    assert result.update == {"exec_stderr": "boom"}
+
+
+def test_validated_command_node_checks_update_keys_of_typed_dict_state():
+    @validated_command_node(MultiState)
+    def node(s):
+        return Command(update=s["update"], goto=END)
+
+    # Reducer channels (messages) accept any of their delta formats
+    ok = {"research_results": ["a", "b"], "messages": [RemoveMessage(id="x"), AIMessage(content="done")]}
+    assert node({"update": ok}).update == ok
+    with pytest.raises(ValidationError):
+        node({"update": {"research_results": "not a list"}})
+    with pytest.raises(ValueError, match="unknown state field"):
+        node({"update": {"reserch_results": []}})
+
+
+def test_validated_command_node_samples_pydantic_updates(state):
+    @validated_command_node(RefactorState, sample_every=3)
+    def node(s):
+        return Command(update={"original_code": "   "}, goto=END)
+
+    with pytest.raises(ValidationError):
+        node(state)  # the first call is always validated
+    node(state)
+    node(state)
+    with pytest.raises(ValidationError):
+        node(state)
+    assert node.validation_stats["calls"] == 4 and node.validation_stats["validated"] == 2
@@ -0,0 +1,53 @@
+import pathlib
+
+import pytest
+
+from langgraph_project.tools.extraction import (
+    extract_paragraph_text,
+    extract_paragraph_text_stream,
+    iter_chunks,
+)
+
+FIXTURES = sorted((pathlib.Path(__file__).parent / "fixtures" / "html").glob("*.html"))
+
+
+def reference_text(html: str) -> str:
+    """The BeautifulSoup extraction fetch_and_summarize used before the streaming parser."""
+    bs4 = pytest.importorskip("bs4")
+    soup = bs4.BeautifulSoup(html, "html.parser")
+    return " ".join(p.get_text(separator=" ", strip=True) for p in soup.find_all("p"))
+
+
+@pytest.mark.parametrize("fixture", FIXTURES, ids=lambda p: p.name)
+def test_matches_beautifulsoup_on_fixture_corpus(fixture):
+    html = fixture.read_text(encoding="utf-8")
+    expected = reference_text(html)
+
+    assert extract_paragraph_text(html) == expected
+    for chunk_size in (1, 7, 64, 4096):
+        for limit in (1, 40, 200, None):
+            text, _ = extract_paragraph_text_stream(iter_chunks(html.encode("utf-8"), chunk_size), "utf-8", limit)
+            assert text == (expected if limit is None else expected[:limit])
+
+
+def test_stops_reading_once_enough_text_is_collected():
+    paragraph = b"<div><p>Lorem ipsum <b>dolor</b> sit amet &amp; more.</p><span>menu</span></div>\n"
+    body = b"<html><body>" + paragraph * 20_000 + b"</body></html>"
+
+    text, stats = extract_paragraph_text_stream(iter_chunks(body), "utf-8", char_limit=3000, bytes_total=len(body))
+
+    assert len(text) == 3000
+    assert text.startswith("Lorem ipsum dolor sit amet & more. Lorem ipsum")
+    assert stats.stopped_early
+    assert stats.bytes_read < len(body) // 50
+    assert stats.bytes_skipped == len(body) - stats.bytes_read
+    assert stats.chars_discarded == stats.text_chars - 3000
+
+
+def test_multibyte_characters_split_across_chunks():
+    body = "<p>Ünïcödé — “quotes” 🤖</p>".encode("utf-8")
+
+    text, stats = extract_paragraph_text_stream(iter_chunks(body, 1), "utf-8")
+
+    assert text == "Ünïcödé — “quotes” 🤖"
+    assert not stats.stopped_early and stats.bytes_read == len(body)
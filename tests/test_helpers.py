@@ -0,0 +1,75 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.messages import ToolMessage
+from langchain_core.runnables import RunnableLambda
+from langchain_core.tools import StructuredTool
+
+import langgraph_project.multi_agents.helpers as ut
+
+
+def _summarize_all(urls: list[str]) -> list[str]:
+    """Summarize every URL."""
+    return [f"summary of {u}" for u in urls]
+
+
+async def _asummarize_all(urls: list[str]) -> list[str]:
+    return _summarize_all(urls)
+
+
+batch_tool = StructuredTool.from_function(
+    func=_summarize_all, coroutine=_asummarize_all, name="batch_summarize"
+)
+
+
+def test_tracker_counts_sync_and_async_calls_of_batch_tool():
+    tracker = ut.ToolInvocationTracker(batch_tool, min_calls=1, max_calls=2)
+
+    assert tracker.wrapped_tool.invoke({"urls": ["a", "b"]}) == ["summary of a", "summary of b"]
+    assert asyncio.run(tracker.wrapped_tool.ainvoke({"urls": ["c"]})) == ["summary of c"]
+
+    assert tracker.call_count == 2
+    assert "urls" in tracker.wrapped_tool.args
+    tracker.assert_counts()
+
+
+def test_tracker_counts_concurrent_calls():
+    tracker = ut.ToolInvocationTracker(batch_tool, min_calls=1, max_calls=200)
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        list(pool.map(lambda i: tracker.wrapped_tool.invoke({"urls": [str(i)]}), range(200)))
+
+    assert tracker.call_count == 200
+    tracker.assert_counts()
+    tracker.reset()
+    assert tracker.call_count == 0
+
+
+def test_concurrent_tracked_runs_count_their_own_calls():
+    tracker = ut.ToolInvocationTracker(batch_tool, min_calls=1, max_calls=2)
+    agent = RunnableLambda(lambda n: [tracker.wrapped_tool.invoke({"urls": [str(i)]}) for i in range(n)])
+    barrier = threading.Barrier(8)
+
+    def run(n):
+        with ut.tracked_run():
+            tracker.reset()
+            agent.invoke(n)
+            barrier.wait()  # every run has made its calls before any run checks its count
+            count = tracker.call_count
+            tracker.assert_counts()
+            return count
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert list(pool.map(run, [1, 2] * 4)) == [1, 2] * 4
+    assert tracker.call_count == 0  # outside of a run
+
+
+def test_tool_results_flattens_batch_outputs():
+    messages = [
+        ToolMessage(content=["S1", "S2"], name="batch_summarize", tool_call_id="1"),
+        ToolMessage(content="ignored", name="web_search", tool_call_id="2"),
+        ToolMessage(content="S3", name="batch_summarize", tool_call_id="3"),
+    ]
+
+    assert ut.tool_results(messages, "batch_summarize") == ["S1", "S2", "S3"]
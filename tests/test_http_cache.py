@@ -0,0 +1,131 @@
+import asyncio
+import os
+
+import httpx
+import pytest
+
+from langgraph_project.tools.http_cache import HttpResponseCache
+
+
+class FakeOrigin:
+    """Serves one page per URL, honouring If-None-Match like a real origin would."""
+
+    def __init__(self):
+        self.pages = {}
+        self.requests = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        body = self.pages[str(request.url)]
+        etag = f'"{hash(body)}"'
+        if request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304, headers={"ETag": etag})
+        return httpx.Response(200, content=body, headers={"ETag": etag, "Content-Type": "text/html; charset=utf-8"})
+
+
+@pytest.fixture
+def origin():
+    return FakeOrigin()
+
+
+@pytest.fixture
+def client(origin):
+    with httpx.Client(transport=httpx.MockTransport(origin)) as c:
+        yield c
+
+
+def test_fresh_entries_skip_the_network(tmp_path, origin, client):
+    cache = HttpResponseCache(str(tmp_path), fresh_seconds=60)
+    origin.pages["https://a.test/"] = b"<p>Hello</p>"
+
+    first = cache.fetch("https://a.test/", client=client)
+    second = cache.fetch("https://a.test/", client=client)
+
+    assert first.text == second.text == "<p>Hello</p>"
+    assert not first.from_cache and second.from_cache
+    assert len(origin.requests) == 1
+    assert cache.stats["hits"] == 1 and cache.stats["misses"] == 1
+
+
+def test_stale_entries_are_revalidated_with_conditional_get(tmp_path, origin, client):
+    cache = HttpResponseCache(str(tmp_path), fresh_seconds=0)
+    origin.pages["https://a.test/"] = b"<p>v1</p>"
+
+    cache.fetch("https://a.test/", client=client)
+    unchanged = cache.fetch("https://a.test/", client=client)
+    assert unchanged.from_cache and unchanged.text == "<p>v1</p>"
+    assert "If-None-Match" in origin.requests[-1].headers
+
+    origin.pages["https://a.test/"] = b"<p>v2</p>"
+    changed = cache.fetch("https://a.test/", client=client)
+    assert not changed.from_cache and changed.text == "<p>v2</p>"
+    assert cache.stats["revalidated"] == 1 and cache.stats["misses"] == 2
+
+
+def test_identical_bodies_are_stored_once_and_lru_is_bounded(tmp_path, origin, client):
+    origin.pages["https://a.test/"] = b"same body"
+    origin.pages["https://b.test/"] = b"same body"
+    origin.pages["https://c.test/"] = os.urandom(16 * 1024)  # does not compress below max_bytes
+
+    cache = HttpResponseCache(str(tmp_path), max_bytes=4096)
+    cache.fetch("https://a.test/", client=client)
+    cache.fetch("https://b.test/", client=client)
+    assert len(list((tmp_path / "bodies").rglob("*.z"))) == 1
+
+    cache.fetch("https://c.test/", client=client)
+    assert cache.total_bytes() <= 4096
+    assert cache.stats["evicted"] >= 2
+
+
+def test_async_fetch_shares_the_index(tmp_path, origin):
+    cache = HttpResponseCache(str(tmp_path), fresh_seconds=60)
+    origin.pages["https://a.test/"] = b"<p>async</p>"
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(origin)) as c:
+            return await cache.afetch("https://a.test/", client=c)
+
+    assert asyncio.run(run()).text == "<p>async</p>"
+    assert cache.fetch("https://a.test/").from_cache
+
+
+def test_stale_copy_is_served_on_server_errors_only(tmp_path, origin, client):
+    cache = HttpResponseCache(str(tmp_path))
+    origin.pages["https://a.test/"] = b"<p>cached</p>"
+    cache.fetch("https://a.test/", client=client)
+
+    def failing(status):
+        return httpx.Client(transport=httpx.MockTransport(lambda request: httpx.Response(status)))
+
+    assert cache.fetch("https://a.test/", client=failing(503)).text == "<p>cached</p>"
+    with pytest.raises(httpx.HTTPStatusError):
+        cache.fetch("https://a.test/", client=failing(404))
+    assert cache.stats["stale_served"] == 1
+
+
+def test_not_modified_updates_the_validators(tmp_path):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if len(requests) == 1:
+            return httpx.Response(200, content=b"page", headers={"ETag": '"v1"'})
+        return httpx.Response(304, headers={"ETag": '"v2"'})
+
+    cache = HttpResponseCache(str(tmp_path))
+    with httpx.Client(transport=httpx.MockTransport(handler)) as c:
+        for _ in range(3):
+            assert cache.fetch("https://a.test/", client=c).text == "page"
+    assert [r.headers.get("If-None-Match") for r in requests] == [None, '"v1"', '"v2"']
+
+
+def test_not_modified_without_a_cached_body_fetches_the_page(tmp_path):
+    def handler(request):
+        if "Cache-Control" not in request.headers:
+            return httpx.Response(304)
+        return httpx.Response(200, content=b"page")
+
+    cache = HttpResponseCache(str(tmp_path))
+    with httpx.Client(transport=httpx.MockTransport(handler)) as c:
+        page = cache.fetch("https://a.test/", client=c)
+    assert page.text == "page" and not page.from_cache
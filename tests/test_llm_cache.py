@@ -0,0 +1,50 @@
+import pytest
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.load import dumps
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from langgraph_project.agents_nodes.llm_cache import LLMCacheMissError, SqliteLLMCache
+
+
+def conversation(question):
+    # New message ids on every run, as LangGraph assigns them
+    return [SystemMessage(content="You're a writing agent."), HumanMessage(content=question)]
+
+
+def test_hits_ignore_message_ids(tmp_path):
+    cache = SqliteLLMCache(str(tmp_path / "llm.sqlite"))
+    model = FakeListChatModel(responses=["first", "second", "third"], cache=cache)
+
+    assert model.invoke(conversation("agents")).content == "first"
+    assert model.invoke(conversation("agents")).content == "first"
+    assert model.invoke(conversation("graphs")).content == "second"
+    assert cache.stats == {"hits": 1, "misses": 2, "evicted": 0}
+
+    # Tool calls are part of the key, their ids are not
+    history = conversation("agents") + [AIMessage(content="", tool_calls=[{"name": "web_search", "args": {"q": "a"}, "id": "1"}])]
+    other = history[:-1] + [AIMessage(content="", tool_calls=[{"name": "web_search", "args": {"q": "a"}, "id": "2"}])]
+    key = cache.make_key
+    assert key(dumps(history), "llm") == key(dumps(other), "llm") != key(dumps(history), "other llm")
+
+
+def test_replay_serves_recorded_calls_and_fails_on_misses(tmp_path):
+    path = str(tmp_path / "llm.sqlite")
+    FakeListChatModel(responses=["recorded"], cache=SqliteLLMCache(path)).invoke(conversation("agents"))
+
+    replay = FakeListChatModel(responses=["recorded"], cache=SqliteLLMCache(path, mode="replay"))
+    assert replay.invoke(conversation("agents")).content == "recorded"
+    assert replay.i == 0  # the model was not called
+    with pytest.raises(LLMCacheMissError):
+        replay.invoke(conversation("graphs"))
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = SqliteLLMCache(str(tmp_path / "llm.sqlite"), max_entries=2)
+    model = FakeListChatModel(responses=["a", "b", "c"], cache=cache)
+    model.invoke(conversation("1"))
+    model.invoke(conversation("2"))
+    model.invoke(conversation("1"))  # hit: "2" is now the least recently used
+    model.invoke(conversation("3"))
+
+    assert len(cache) == 2 and cache.stats["evicted"] == 1
+    assert model.invoke(conversation("1")).content == "a"
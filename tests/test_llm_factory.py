@@ -0,0 +1,48 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+import utils
+
+
+@pytest.fixture
+def azure_env(monkeypatch):
+    monkeypatch.setenv("AZURE_OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("AZURE_OPENAI_ENDPOINT", "https://example.openai.azure.com")
+    monkeypatch.setattr(utils.cfg_instance.llm_configs, "llm_cache_mode", "off")
+    utils._role_llm.cache_clear()
+    yield
+    utils._role_llm.cache_clear()
+
+
+def test_roles_have_their_own_settings_over_one_pool(azure_env):
+    with ThreadPoolExecutor(8) as pool:
+        research = list(pool.map(lambda _: utils.get_llm("research"), range(8)))
+    writing = utils.get_llm("writing")
+
+    assert all(m is research[0] for m in research)
+    assert research[0].temperature == 0.8 and writing.temperature == 0
+    assert research[0].http_client is writing.http_client is utils.get_llm_http_clients()[0]
+    assert research[0].http_async_client is writing.http_async_client
+
+    with pytest.raises(ValueError):
+        utils.get_llm("reviewer")
+
+
+def test_async_pool_is_per_event_loop():
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, text="ok"))
+    client = utils._loop_local_async_client(transport=transport)
+
+    async def get():
+        resp = await client.get("https://example.com")
+        return resp.text, client._clients[asyncio.get_running_loop()]
+
+    (text1, pool1), (text2, pool2) = asyncio.run(get()), asyncio.run(get())
+    assert text1 == text2 == "ok"
+    assert pool1 is not pool2
+
+    for _ in range(5):
+        asyncio.run(get())
+    assert len(client._clients) == 1  # only the client of the last (closed) loop is left
@@ -0,0 +1,178 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+from langgraph_project.agents_nodes.llm_gateway import (
+    AIMDLimiter,
+    AsyncGatewayTransport,
+    CircuitOpenError,
+    GatewayTransport,
+    LLMGateway,
+)
+
+URL = "https://example.openai.azure.com/openai/deployments/gpt-app/chat/completions"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def client(gateway, handler):
+    return httpx.Client(transport=GatewayTransport(httpx.MockTransport(handler), gateway))
+
+
+def test_retries_honor_retry_after_and_decrease_the_limit():
+    clock = Clock()
+    gateway = LLMGateway(initial_concurrency=8, clock=clock, sleep=clock.sleep)
+    responses = iter([httpx.Response(429, headers={"retry-after-ms": "1500"}), httpx.Response(200, json={})])
+
+    assert client(gateway, lambda request: next(responses)).post(URL, json={"x": 1}).status_code == 200
+    assert 1.5 <= clock.sleeps[0] <= 1.65
+    metrics = gateway.metrics()["gpt-app"]
+    assert metrics["limit"] == pytest.approx(4 + 1 / 4)  # halved by the 429, +1/limit for the success
+    assert metrics["throttled"] == 1 and metrics["retries"] == 1 and metrics["succeeded"] == 1
+
+
+def test_aimd_limiter():
+    clock = Clock()
+    limiter = AIMDLimiter(initial=4, min_limit=1, max_limit=6, cooldown_seconds=1.0, clock=clock)
+    for _ in range(40):
+        limiter.on_success()
+    assert limiter.limit == 6
+
+    assert limiter.on_overload() and limiter.limit == 3
+    assert not limiter.on_overload()  # same burst of 429s
+    clock.now += 1
+    limiter.on_overload()
+    limiter.on_overload()
+    clock.now += 1
+    limiter.on_overload()
+    assert limiter.limit == 1
+
+
+def test_circuit_breaker_fails_fast_then_probes():
+    clock = Clock()
+    gateway = LLMGateway(max_retries=0, breaker_failures=3, breaker_reset_seconds=30, clock=clock,
+                         sleep=clock.sleep)
+    calls = []
+    healthy = threading.Event()
+
+    def handler(request):
+        calls.append(request)
+        if healthy.is_set():
+            return httpx.Response(200, json={})
+        raise httpx.ConnectError("connection refused")
+
+    c = client(gateway, handler)
+    for _ in range(3):
+        with pytest.raises(httpx.ConnectError):
+            c.post(URL)
+    with pytest.raises(CircuitOpenError):
+        c.post(URL)
+    assert len(calls) == 3 and gateway.metrics()["gpt-app"]["breaker"] == "open"
+
+    clock.now += 30
+    healthy.set()
+    assert c.post(URL).status_code == 200
+    assert gateway.metrics()["gpt-app"]["breaker"] == "closed"
+
+
+def test_requests_above_the_limit_wait_in_the_queue():
+    gateway = LLMGateway(initial_concurrency=2, max_concurrency=2)
+    lock = threading.Lock()
+    active, peak, depth = [0], [0], []
+
+    def handler(request):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        depth.append(gateway.metrics()["gpt-app"]["queue_depth"])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        return httpx.Response(200, json={})
+
+    c = client(gateway, handler)
+    with ThreadPoolExecutor(8) as pool:
+        assert all(r.status_code == 200 for r in pool.map(lambda _: c.post(URL), range(8)))
+    assert peak[0] == 2 and max(depth) > 0
+
+
+def test_async_requests_go_through_the_gateway():
+    gateway = LLMGateway(backoff_base_seconds=0.001)
+    responses = iter([httpx.Response(503), httpx.Response(200, json={})])
+    transport = AsyncGatewayTransport(httpx.MockTransport(lambda request: next(responses)), gateway)
+
+    async def post():
+        async with httpx.AsyncClient(transport=transport) as c:
+            return await c.post(URL)
+
+    assert asyncio.run(post()).status_code == 200
+    assert gateway.metrics()["gpt-app"]["retries"] == 1
+
+
+def test_cancelled_queued_request_does_not_hold_a_slot():
+    gateway = LLMGateway(initial_concurrency=1, max_concurrency=1, queue_timeout_seconds=1)
+
+    async def handler(request):
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={})
+
+    transport = AsyncGatewayTransport(httpx.MockTransport(handler), gateway)
+
+    async def run():
+        async with httpx.AsyncClient(transport=transport) as c:
+            first = asyncio.ensure_future(c.post(URL))
+            await asyncio.sleep(0.01)
+            queued = asyncio.ensure_future(c.post(URL))
+            await asyncio.sleep(0.01)
+            assert gateway.metrics()["gpt-app"]["queue_depth"] == 1
+            queued.cancel()
+            await asyncio.gather(first, queued, return_exceptions=True)
+            return await c.post(URL)
+
+    assert asyncio.run(run()).status_code == 200
+    metrics = gateway.metrics()["gpt-app"]
+    assert metrics["in_flight"] == 0 and metrics["queue_depth"] == 0
+
+
+def test_cancelled_probe_lets_the_next_request_probe():
+    clock = Clock()
+    gateway = LLMGateway(max_retries=0, breaker_failures=1, breaker_reset_seconds=30, clock=clock)
+    healthy = []
+
+    async def handler(request):
+        if not healthy:
+            raise httpx.ConnectError("connection refused")
+        await asyncio.sleep(healthy.pop(0))
+        return httpx.Response(200, json={})
+
+    transport = AsyncGatewayTransport(httpx.MockTransport(handler), gateway)
+
+    async def run():
+        async with httpx.AsyncClient(transport=transport) as c:
+            with pytest.raises(httpx.ConnectError):
+                await c.post(URL)
+            clock.now += 30
+            healthy.extend([5, 0])
+            probe = asyncio.ensure_future(c.post(URL))
+            await asyncio.sleep(0.01)
+            probe.cancel()
+            await asyncio.gather(probe, return_exceptions=True)
+            return await c.post(URL)
+
+    assert asyncio.run(run()).status_code == 200
+    assert gateway.metrics()["gpt-app"]["breaker"] == "closed"
@@ -0,0 +1,97 @@
+import asyncio
+import threading
+import time
+
+import httpx
+
+from langgraph_project.agents_nodes import llm_hedging
+from langgraph_project.agents_nodes.llm_hedging import (
+    CALL_SITE_HEADER,
+    AsyncHedgingTransport,
+    HedgePolicy,
+    HedgingTransport,
+)
+
+URL = "https://example.openai.azure.com/openai/deployments/gpt-app/chat/completions"
+
+
+def warm_policy(monkeypatch, site, budget=1.0):
+    policy = HedgePolicy(percentile=0.95, budget=budget, min_samples=5)
+    for _ in range(5):
+        policy.record(0.01)
+    monkeypatch.setitem(llm_hedging._policies, site, policy)
+    return policy
+
+
+def test_policy_waits_for_samples_and_spends_its_budget():
+    policy = HedgePolicy(percentile=0.5, budget=0.5, min_samples=3)
+    assert policy.start() is None
+    for latency in (0.1, 0.3, 0.2):
+        policy.record(latency)
+    assert policy.start() == 0.2
+    assert policy.try_hedge()  # 1.0 token after two calls
+    assert not policy.try_hedge()
+    assert policy.stats == {"calls": 2, "hedged": 1, "hedge_wins": 0, "budget_exhausted": 1}
+
+
+def test_slow_request_is_hedged_and_the_hedge_wins(monkeypatch):
+    policy = warm_policy(monkeypatch, "supervisor")
+    calls, lock = [], threading.Lock()
+
+    def handler(request):
+        assert CALL_SITE_HEADER not in request.headers
+        with lock:
+            calls.append(request.content)
+            first = len(calls) == 1
+        time.sleep(0.5 if first else 0)
+        return httpx.Response(200, json={"answer": "slow" if first else "fast"})
+
+    client = httpx.Client(transport=HedgingTransport(httpx.MockTransport(handler)))
+    start = time.monotonic()
+    response = client.post(URL, json={"x": 1}, headers={CALL_SITE_HEADER: "supervisor"})
+    assert response.json() == {"answer": "fast"} and time.monotonic() - start < 0.4
+    assert calls == [b'{"x":1}', b'{"x":1}']
+    assert policy.stats["hedged"] == 1 and policy.stats["hedge_wins"] == 1
+    assert policy._latencies[-1] >= 0.01  # the caller waited for the hedge delay as well
+
+    # Calls without a call site are never hedged
+    assert client.post(URL).status_code == 200 and len(calls) == 3
+
+
+def test_no_hedge_without_budget(monkeypatch):
+    policy = warm_policy(monkeypatch, "planning", budget=0.0)
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        time.sleep(0.05)
+        return httpx.Response(200, json={})
+
+    client = httpx.Client(transport=HedgingTransport(httpx.MockTransport(handler)))
+    assert client.post(URL, headers={CALL_SITE_HEADER: "planning"}).status_code == 200
+    assert len(calls) == 1 and policy.stats["budget_exhausted"] == 1
+
+
+def test_async_hedge_cancels_the_slow_request(monkeypatch):
+    policy = warm_policy(monkeypatch, "query_plan")
+    cancelled = []
+
+    async def handler(request):
+        if not hasattr(handler, "seen"):
+            handler.seen = True
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+        return httpx.Response(200, json={"answer": "fast"})
+
+    async def post():
+        transport = AsyncHedgingTransport(httpx.MockTransport(handler))
+        async with httpx.AsyncClient(transport=transport) as client:
+            response = await client.post(URL, headers={CALL_SITE_HEADER: "query_plan"})
+            await asyncio.sleep(0)
+            return response
+
+    assert asyncio.run(post()).json() == {"answer": "fast"}
+    assert cancelled and policy.stats["hedge_wins"] == 1
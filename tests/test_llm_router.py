@@ -0,0 +1,63 @@
+import random
+
+from langchain_core.language_models import FakeListChatModel
+
+from langgraph_project.agents_nodes.llm_router import LLMRouter
+
+ROUTES = {"summarize": {"role": "default", "deployments": ["mini", "large"]}}
+
+
+def make_router(**kwargs):
+    kwargs.setdefault("explore", 0.0)
+    return LLMRouter(ROUTES, alpha=1.0, rng=random.Random(0), **kwargs)
+
+
+def test_prefers_the_cheapest_deployment_unless_it_is_slower():
+    router = make_router(latency_tolerance=0.25)
+    assert router.rank("summarize") == ["mini", "large"]  # never observed: configured order
+
+    router.record("summarize", "mini", 1.1, ok=True)
+    router.record("summarize", "large", 1.0, ok=True)
+    assert router.rank("summarize") == ["mini", "large"]  # within the tolerance of the best
+
+    router.record("summarize", "mini", 3.0, ok=True)
+    assert router.rank("summarize") == ["large", "mini"]
+
+    router.record("summarize", "mini", 0.5, ok=True)
+    router.record("summarize", "mini", None, ok=False)  # errors count against a fast deployment
+    assert router.rank("summarize") == ["large", "mini"]
+    assert router.metrics()["summarize"]["mini"]["errors"] == 1
+
+
+def test_failed_calls_fall_back_to_the_next_deployment():
+    router = make_router()
+    models = {"mini": FakeListChatModel(responses=[]), "large": FakeListChatModel(responses=["summary"])}
+    model = router.model("summarize", load=lambda role, deployment: models[deployment])
+
+    assert model.invoke("summarize this page").content == "summary"
+    metrics = router.metrics()["summarize"]
+    assert metrics["mini"]["errors"] == 1 and metrics["large"]["calls"] == 1
+    assert router.rank("summarize") == ["large", "mini"]
+
+
+def test_streams_fall_back_before_the_first_chunk():
+    router = make_router()
+    models = {"mini": FakeListChatModel(responses=[]), "large": FakeListChatModel(responses=["streamed"])}
+    model = router.model("summarize", load=lambda role, deployment: models[deployment])
+
+    assert "".join(chunk.content for chunk in model.stream("hi")) == "streamed"
+    assert router.metrics()["summarize"]["large"]["latency"] is not None
+
+
+def test_failing_deployments_rank_behind_slow_healthy_ones():
+    router = make_router()
+    for _ in range(3):
+        router.record("summarize", "mini", None, ok=False)
+        router.record("summarize", "large", 40.0, ok=True)
+    assert router.rank("summarize") == ["large", "mini"]
+
+
+def test_sites_without_deployments_use_the_default_deployment():
+    router = LLMRouter({"write": {"role": "writing"}}, default_deployment="gpt-app")
+    assert router.rank("write") == ["gpt-app"]
+    assert router.model("write").deployments == ("gpt-app",)
@@ -0,0 +1,56 @@
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, START, StateGraph
+
+from langgraph_project.agents_nodes.message_window import SUMMARY_ID, MessageWindow, attach_message_window
+from langgraph_project.multi_agents.AgentState import State
+
+
+def word_count(text: str) -> int:
+    return len(text.split())
+
+
+def build_graph(window, seen):
+    def chatbot(state):
+        seen.append(list(state["messages"]))
+        return {"messages": [AIMessage(content="reply " * 10)]}
+
+    builder = StateGraph(State)
+    builder.add_node("chatbot", chatbot)
+    builder.add_edge(START, "chatbot")
+    builder.add_edge("chatbot", END)
+    attach_message_window(builder, window, before="chatbot")
+    return builder.compile(checkpointer=MemorySaver())
+
+
+def test_long_thread_is_folded_into_rolling_summary():
+    summarizer = FakeListChatModel(responses=[f"summary {i}" for i in range(1, 10)])
+    window = MessageWindow(summarizer, max_tokens=60, target_tokens=30, length_function=word_count)
+    seen = []
+    graph = build_graph(window, seen)
+    config = {"configurable": {"thread_id": "t"}}
+
+    for i in range(6):
+        graph.invoke({"messages": [HumanMessage(content=f"question {i} " * 5)]}, config)
+
+    messages = graph.get_state(config).values["messages"]
+    assert messages[0].id == SUMMARY_ID and isinstance(messages[0], SystemMessage)
+    assert messages[0].content.endswith("summary 4")  # folded on turns 3 to 6
+    assert messages[-1].content.startswith("reply")
+    # The prompt of the chatbot stays within the budget, and the last turn saved tokens
+    assert all(sum(window.count(m) for m in prompt) <= 60 for prompt in seen)
+    assert window.turn_stats[-1]["tokens_saved"] > 0
+    assert window.turn_stats[-1]["full_tokens"] == 6 * (14 + 14) - 14
+
+
+def test_tool_results_stay_with_their_tool_call():
+    window = MessageWindow(FakeListChatModel(responses=["summary"]), max_tokens=20, target_tokens=10,
+                           length_function=word_count)
+    call = AIMessage(content="", tool_calls=[{"name": "search", "args": {"q": "x"}, "id": "c1"}], id="a1")
+    messages = [HumanMessage(content="old " * 30, id="h1"), call,
+                ToolMessage(content="result " * 5, tool_call_id="c1", id="t1")]
+
+    update = window({"messages": messages})
+
+    assert [m.id for m in update["messages"][1:]] == [SUMMARY_ID, "a1", "t1"]
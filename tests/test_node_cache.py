@@ -0,0 +1,66 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import END, START, StateGraph
+from langgraph.types import Command, Send
+
+from langgraph_project.agents_nodes.node_cache import SqliteNodeCache, node_cache_policy, state_cache_key
+from langgraph_project.multi_agents.AgentState import MultiState2
+
+
+def build_graph(cache, calls, fail_writing):
+    def planning_node(state):
+        calls.append("planning")
+        return Command(update={"subgoals": ["a", "b"]},
+                       goto=[Send("research_node", {"subgoal": s, "messages": state["messages"]}) for s in "ab"])
+
+    def research_node(task):
+        calls.append(f"research {task['subgoal']}")
+        return {"research_results": [{"subgoal": task["subgoal"], "summaries": [task["subgoal"] * 3]}]}
+
+    def writing_node(state):
+        calls.append("writing")
+        if fail_writing:
+            raise RuntimeError("generate_article tool did not return a result.")
+        return {"article": " ".join(r["summaries"][0] for r in state["research_results"]),
+                "messages": [AIMessage(content="Article drafted.")]}
+
+    builder = StateGraph(MultiState2)
+    builder.add_node("planning_node", planning_node, cache_policy=node_cache_policy("goal", "messages"))
+    builder.add_node("research_node", research_node, cache_policy=node_cache_policy("subgoal", "messages"))
+    builder.add_node("writing_node", writing_node)
+    builder.add_edge(START, "planning_node")
+    builder.add_edge("research_node", "writing_node")
+    builder.add_edge("writing_node", END)
+    return builder.compile(cache=cache)
+
+
+def run(graph):
+    return graph.invoke({"messages": [HumanMessage(content="write about agents")], "goal": "agents"})
+
+
+def test_rerun_resumes_at_failed_node(tmp_path):
+    path = str(tmp_path / "nodes.sqlite")
+    calls = []
+    with pytest.raises(RuntimeError):
+        run(build_graph(SqliteNodeCache(path), calls, fail_writing=True))
+    assert sorted(calls) == ["planning", "research a", "research b", "writing"]
+
+    calls.clear()
+    cache = SqliteNodeCache(path)  # new process
+    graph = build_graph(cache, calls, fail_writing=False)
+    assert run(graph)["article"] == "aaa bbb"
+    assert calls == ["writing"] and cache.stats["hits"] == 3
+
+    calls.clear()
+    graph.clear_cache(["research_node"])
+    run(graph)
+    assert sorted(calls) == ["research a", "research b", "writing"]
+
+
+def test_state_cache_key_ignores_message_ids_and_unused_fields():
+    key = state_cache_key("goal", "messages")
+    state = {"goal": "g", "messages": [HumanMessage(content="hi", id="1")], "article": "x"}
+
+    assert key(state) == key({**state, "messages": [HumanMessage(content="hi", id="2")], "article": "y"})
+    assert key(state) != key({**state, "goal": "other"})
+    assert key(state) != state_cache_key("goal", "messages", version=2)(state)
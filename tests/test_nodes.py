@@ -1,18 +1,22 @@
 import pytest
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 from langchain_core.messages import ToolMessage, AIMessage, HumanMessage
 from langgraph.types import Command
 from langgraph.graph import END
 
 # Import your helpers and the nodes/agents under test
 import langgraph_project.multi_agents.helpers as ut
+import langgraph_project.tools.tools as tools
 from langgraph_project.multi_agents.article_researcher.researchers_agent_base import (
     search_tracker,
     summarize_tracker,
-    research_agent,
-    writing_agent,
 )
-from langgraph_project.agents_nodes.custom_nodes import research_node, writing_node
+from langgraph_project.agents_nodes.custom_nodes import make_research_node, make_writing_node
+
+# The agents are mocked in every test, so the nodes are built without an LLM
+research_agent, writing_agent = MagicMock(), MagicMock()
+research_node = make_research_node(search_tracker, summarize_tracker, research_agent)
+writing_node = make_writing_node(writing_agent, tools.generate_article)
 
 
 class DummyResponse:
@@ -36,8 +40,7 @@ def reset_trackers():
     # optional teardown
 
 
-@patch.object(summarize_tracker, 'assert_counts', new=lambda self: None)
-@patch.object(search_tracker, 'assert_counts', new=lambda self: None)
+@patch.object(ut.ToolInvocationTracker, 'assert_counts', new=lambda self: None)
 @patch.object(research_agent, 'invoke')
 def test_research_node_succeeds(mock_invoke):
     # Arrange: fake state and fake agent response with two summaries
@@ -0,0 +1,90 @@
+import threading
+import time
+
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+import pytest
+
+from langgraph_project.checkpoints.retention import (
+    CheckpointCompactor,
+    LockedMemorySaver,
+    RetentionPolicy,
+    prune_memory_saver,
+)
+from langgraph_project.checkpoints.sqlite_saver import SqliteCheckpointSaver
+from tests.test_sqlite_saver import build_chat_graph
+
+
+def chat(graph, thread_id, turns):
+    config = {"configurable": {"thread_id": thread_id}}
+    for i in range(turns):
+        graph.invoke({"messages": [HumanMessage(content=f"question {i}")]}, config)
+    return config
+
+
+def test_sqlite_keeps_last_checkpoints_and_resumes(tmp_path):
+    with SqliteCheckpointSaver(str(tmp_path / "c.sqlite"), snapshot_every=4) as saver:
+        graph = build_chat_graph(saver)
+        config = chat(graph, "t", 10)
+        before = saver.conn.execute("SELECT SUM(bytes) FROM threads").fetchone()[0]
+
+        stats = CheckpointCompactor(saver, RetentionPolicy(keep_last=3)).run_once()
+
+        assert stats["checkpoints"] == 30 - 3 and stats["threads"] == 0
+        assert len(list(saver.list(config))) == 3
+        after = saver.conn.execute("SELECT SUM(bytes) FROM threads").fetchone()[0]
+        assert before - after == stats["bytes_reclaimed"] > 0
+        # The delta chains of the kept checkpoints survived: the thread still has its whole history
+        assert len(graph.get_state(config).values["messages"]) == 20
+        graph.invoke({"messages": [HumanMessage(content="again")]}, config)
+        assert len(graph.get_state(config).values["messages"]) == 22
+
+
+def test_sqlite_evicts_expired_and_least_recent_threads(tmp_path):
+    with SqliteCheckpointSaver(str(tmp_path / "c.sqlite")) as saver:
+        graph = build_chat_graph(saver)
+        for thread_id in ("a", "b", "c", "d"):
+            chat(graph, thread_id, 1)
+        saver.conn.execute("UPDATE threads SET updated_at = updated_at - 7200 WHERE thread_id = 'a'")
+
+        stats = saver.prune(RetentionPolicy(ttl_seconds=3600, max_threads=2))
+
+        assert stats["threads"] == 2
+        remaining = {c.config["configurable"]["thread_id"] for c in saver.list(None)}
+        assert remaining == {"c", "d"}
+        saver.vacuum()
+
+
+def test_memory_saver_is_pruned():
+    saver = MemorySaver()
+    graph = build_chat_graph(saver)
+    config = chat(graph, "old", 5)
+    chat(graph, "new", 1)
+
+    stats = prune_memory_saver(saver, RetentionPolicy(keep_last=2, max_threads=1), now=time.time())
+
+    assert stats["threads"] == 1 and "old" not in saver.storage
+    assert len(graph.get_state(config).values) == 0
+    assert len(graph.get_state({"configurable": {"thread_id": "new"}}).values["messages"]) == 2
+
+
+def test_locked_memory_saver_is_compacted_while_graphs_run():
+    with pytest.raises(TypeError):
+        CheckpointCompactor(MemorySaver(), RetentionPolicy(keep_last=2)).start()
+
+    saver = LockedMemorySaver()
+    graph = build_chat_graph(saver)
+    compactor = CheckpointCompactor(saver, RetentionPolicy(keep_last=2), interval_seconds=0.001).start()
+    try:
+        runs = [threading.Thread(target=chat, args=(graph, f"t{i}", 10)) for i in range(4)]
+        for run in runs:
+            run.start()
+        for run in runs:
+            run.join()
+    finally:
+        compactor.stop()
+
+    assert compactor.stats["runs"] > 0
+    for i in range(4):
+        assert len(graph.get_state({"configurable": {"thread_id": f"t{i}"}}).values["messages"]) == 20
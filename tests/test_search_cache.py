@@ -0,0 +1,109 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from langgraph_project.tools.search_cache import SearchCache, normalize_query
+
+
+class FakeSearch:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, query, num_results):
+        with self._lock:
+            self.calls.append(query)
+        time.sleep(self.delay)
+        return [{"title": f"{query} #{i}", "url": f"https://example.com/{i}"} for i in range(num_results)]
+
+
+def test_normalize_query():
+    assert normalize_query("History of AI") == "history ai"
+    assert normalize_query("  the   history of the AI? ") == "history ai"
+    assert normalize_query("C++ vs C# performance") == "c++ vs c# performance"
+    assert normalize_query("the who") == "the who"  # only stop words: keep them
+    assert normalize_query("ai history") != normalize_query("history ai")
+
+
+def test_near_identical_queries_share_one_search():
+    search = FakeSearch()
+    cache = SearchCache(search)
+
+    first = cache.search("Impact of AI on healthcare", 3)
+    assert cache.search("impact  of the AI on Healthcare ", 3) == first
+    cache.search("Impact of AI on healthcare", 5)  # different result count
+
+    assert len(search.calls) == 2
+    assert cache.stats["hits"] == 1
+
+    # Returned lists are copies
+    first[0]["title"] = "changed"
+    assert cache.search("Impact of AI on healthcare", 3)[0]["title"] != "changed"
+
+
+def test_ttl_and_lru():
+    search = FakeSearch()
+    cache = SearchCache(search, ttl_seconds=0.05, max_entries=2)
+
+    cache.search("a query", 1)
+    time.sleep(0.1)
+    cache.search("a query", 1)
+    assert len(search.calls) == 2
+
+    cache.search("b query", 1)
+    cache.search("c query", 1)
+    assert len(cache) == 2
+    cache.search("a query", 1)
+    assert len(search.calls) == 5
+
+
+def test_concurrent_identical_queries_are_coalesced():
+    search = FakeSearch(delay=0.2)
+    cache = SearchCache(search)
+    topics = [f"topic {i % 5}" for i in range(50)]
+
+    with ThreadPoolExecutor(max_workers=50) as pool:
+        results = list(pool.map(lambda t: cache.search(f"The {t.upper()}", 2), topics))
+
+    assert len(search.calls) == 5
+    assert cache.stats["misses"] == 5
+    assert cache.stats["coalesced"] + cache.stats["hits"] == 45
+    assert results[0] == results[5]
+
+
+def test_errors_are_not_cached():
+    attempts = []
+
+    def flaky(query, num_results):
+        attempts.append(query)
+        if len(attempts) == 1:
+            raise RuntimeError("rate limited")
+        return [{"title": "ok", "url": "https://example.com"}]
+
+    cache = SearchCache(flaky)
+    with pytest.raises(RuntimeError):
+        cache.search("query", 1)
+    assert cache.search("query", 1) == [{"title": "ok", "url": "https://example.com"}]
+
+
+def test_ddgs_searches_run_in_parallel(monkeypatch):
+    from langgraph_project.tools import search_cache
+
+    class SlowDDGS:
+        def __init__(self, timeout):
+            pass
+
+        def text(self, query, max_results):
+            time.sleep(0.2)
+            return [{"title": query, "href": "https://example.com"}]
+
+    monkeypatch.setattr(search_cache, "DDGS", SlowDDGS)
+    monkeypatch.setattr(search_cache, "_ddgs", threading.local())
+    start = time.monotonic()
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(lambda q: search_cache.ddgs_search(q, 1), ["a", "b", "c", "d"]))
+    assert time.monotonic() - start < 0.6
+    assert [r[0]["title"] for r in results] == ["a", "b", "c", "d"]
@@ -0,0 +1,92 @@
+import hashlib
+import re
+
+import numpy as np
+import pytest
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from langgraph_project.agents_nodes.llm_cache import LLMCacheMissError, SqliteLLMCache
+from langgraph_project.agents_nodes.semantic_cache import ChainedLLMCache, SemanticLLMCache
+
+
+def bag_of_words(texts):
+    """Deterministic stand-in for an embeddings model: hashed word counts."""
+    vectors = np.zeros((len(texts), 64), dtype=np.float32)
+    for i, text in enumerate(texts):
+        for word in re.findall(r"\w+", text.lower()):
+            vectors[i, int(hashlib.md5(word.encode()).hexdigest(), 16) % 64] += 1
+    return vectors
+
+
+def route(question):
+    return [SystemMessage(content="Route the user to information_node or booking_node."),
+            HumanMessage(content=question)]
+
+
+def make_cache(tmp_path, **kwargs):
+    return SemanticLLMCache(str(tmp_path), "supervisor", embed=bag_of_words, threshold=0.9, **kwargs)
+
+
+def test_near_duplicate_prompts_share_a_response(tmp_path):
+    cache = make_cache(tmp_path)
+    model = FakeListChatModel(responses=["booking_node", "information_node"], cache=cache)
+
+    assert model.invoke(route("Book a dentist appointment for Monday at 9")).content == "booking_node"
+    hit = model.invoke(route("book a dentist appointment for monday at 9 please"))
+    assert hit.content == "booking_node"
+    assert hit.response_metadata["semantic_cache"]["similarity"] >= 0.9
+    assert model.invoke(route("Which doctors work at the hospital on weekends?")).content == "information_node"
+
+    # Another model configuration never matches
+    other = FakeListChatModel(responses=["other"], cache=cache)
+    assert other.invoke(route("Book a dentist appointment for Monday at 9")).content == "other"
+
+    assert cache.stats["hits"] == 1 and cache.stats["misses"] == 3
+    assert cache.hit_rate == 0.25
+
+
+def test_index_persists_and_evicts_least_recently_used(tmp_path):
+    cache = make_cache(tmp_path, max_entries=2)
+    model = FakeListChatModel(responses=["a", "b", "c"], cache=cache)
+    model.invoke(route("cancel my flight booking"))
+    model.invoke(route("opening hours of the pharmacy"))
+    model.invoke(route("cancel my flight booking"))  # hit: the pharmacy entry is now the least recently used
+    model.invoke(route("reschedule the eye exam to friday"))
+    assert len(cache) == 2 and cache.stats["evicted"] == 1
+
+    reopened = make_cache(tmp_path, max_entries=2)
+    replay = FakeListChatModel(responses=["a", "b", "c"], cache=reopened)
+    assert replay.invoke(route("cancel my flight booking")).content == "a"
+    assert replay.invoke(route("reschedule the eye exam to friday")).content == "c"
+    assert replay.i == 0  # both served from the reopened index
+    replay.invoke(route("opening hours of the pharmacy"))
+    assert replay.i == 1
+
+
+def test_false_hits_are_dropped_and_counted(tmp_path):
+    cache = make_cache(tmp_path)
+    model = FakeListChatModel(responses=["not json", "booking_node"], cache=cache)
+    model.invoke(route("book a table"))
+    hit = model.invoke(route("book a table please"))
+
+    assert cache.report_false_hit(hit)
+    assert cache.stats["false_hits"] == 1 and cache.false_hit_rate == 1.0
+    assert model.invoke(route("book a table please")).content == "booking_node"
+
+
+def test_chained_cache_records_exact_matches_and_keeps_replay_strict(tmp_path):
+    exact_path = str(tmp_path / "llm_cache.sqlite")
+    record = ChainedLLMCache(SqliteLLMCache(exact_path), make_cache(tmp_path))
+    model = FakeListChatModel(responses=["booking_node", "information_node"], cache=record)
+    model.invoke(route("Book a dentist appointment for Monday at 9"))
+    assert len(record.exact) == 1 and len(record.semantic) == 1
+
+    replay = ChainedLLMCache(SqliteLLMCache(exact_path, mode="replay"), make_cache(tmp_path))
+    model = FakeListChatModel(responses=["booking_node", "information_node"], cache=replay)
+    assert model.invoke(route("Book a dentist appointment for Monday at 9")).content == "booking_node"
+    near = model.invoke(route("book a dentist appointment for monday at 9 please"))
+    assert "semantic_cache" in near.response_metadata
+    with pytest.raises(LLMCacheMissError):
+        model.invoke(route("Which doctors work at the hospital on weekends?"))
+    assert model.i == 0
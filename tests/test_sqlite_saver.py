@@ -0,0 +1,148 @@
+import asyncio
+import os
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.graph import END, START, StateGraph
+from langgraph.types import Command, Send, interrupt
+
+from langgraph_project.checkpoints.sqlite_saver import _THREAD_BYTES, CompactSerializer, SqliteCheckpointSaver
+from langgraph_project.multi_agents.AgentState import MultiState2
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "checkpoints.sqlite")
+
+
+def build_graph(checkpointer):
+    """Fan-out research branches, then a writing node that waits for approval."""
+    def planning_node(state):
+        subgoals = ["a", "b"]
+        return Command(update={"subgoals": subgoals},
+                       goto=[Send("research_node", {"subgoal": s}) for s in subgoals])
+
+    def research_node(task):
+        return {"research_results": [{"subgoal": task["subgoal"], "summaries": ["x" * 2000]}],
+                "messages": [AIMessage(content=f"researched {task['subgoal']}")]}
+
+    def writing_node(state):
+        approval = interrupt("approve?")
+        return {"article": f"{approval}: {len(state['research_results'])} sections"}
+
+    builder = StateGraph(MultiState2)
+    builder.add_node("planning_node", planning_node)
+    builder.add_node("research_node", research_node)
+    builder.add_node("writing_node", writing_node)
+    builder.add_edge(START, "planning_node")
+    builder.add_edge("research_node", "writing_node")
+    builder.add_edge("writing_node", END)
+    return builder.compile(checkpointer=checkpointer)
+
+
+def test_thread_resumes_after_restart(db_path):
+    config = {"configurable": {"thread_id": "t1"}}
+    with SqliteCheckpointSaver(db_path) as saver:
+        out = build_graph(saver).invoke({"messages": [HumanMessage(content="hi")], "goal": "g"}, config)
+        assert "__interrupt__" in out
+
+    with SqliteCheckpointSaver(db_path) as saver:
+        graph = build_graph(saver)
+        out = graph.invoke(Command(resume="approved"), config)
+
+        assert out["article"] == "approved: 2 sections"
+        assert [m.content for m in out["messages"]] == ["hi", "researched a", "researched b"]
+        history = list(graph.get_state_history(config))
+        assert len(history) == 5
+        assert len(list(saver.list(config, limit=2))) == 2
+        assert len(list(saver.list(config, before=history[1].config))) == 3
+        assert [c.metadata["step"] for c in saver.list(None, filter={"source": "input"})] == [-1]
+
+
+def test_async_graph_and_delete_thread(db_path):
+    config = {"configurable": {"thread_id": "t2"}}
+    with SqliteCheckpointSaver(db_path) as saver:
+        graph = build_graph(saver)
+        asyncio.run(graph.ainvoke({"messages": [], "goal": "g"}, config))
+        asyncio.run(graph.ainvoke(Command(resume="ok"), config))
+        assert graph.get_state(config).values["article"] == "ok: 2 sections"
+
+        saver.delete_thread("t2")
+        assert saver.get_tuple(config) is None
+        for table in ("checkpoints", "blobs", "writes"):
+            assert saver.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] == 0
+
+
+def test_compact_serializer_compresses_large_values():
+    serde = CompactSerializer(compress_min_bytes=64)
+    value = {"messages": [HumanMessage(content="hello " * 100)]}
+
+    type_, data = serde.dumps_typed(value)
+
+    assert type_.endswith("+zlib") and len(data) < 200
+    assert serde.loads_typed((type_, data)) == value
+    assert serde.dumps_typed("short")[0] == "msgpack"
+
+
+def build_chat_graph(checkpointer):
+    def chatbot(state):
+        return {"messages": [AIMessage(content=f"reply {len(state['messages'])} " + os.urandom(300).hex())]}
+
+    builder = StateGraph(MultiState2)
+    builder.add_node("chatbot", chatbot)
+    builder.add_edge(START, "chatbot")
+    builder.add_edge("chatbot", END)
+    return builder.compile(checkpointer=checkpointer)
+
+
+def run_long_thread(path, snapshot_every):
+    config = {"configurable": {"thread_id": "long"}}
+    with SqliteCheckpointSaver(path, snapshot_every=snapshot_every) as saver:
+        graph = build_chat_graph(saver)
+        for i in range(10):
+            graph.invoke({"messages": [HumanMessage(content=f"question {i}")]}, config)
+        blob_bytes = saver.conn.execute("SELECT SUM(LENGTH(blob)) FROM blobs").fetchone()[0]
+
+    with SqliteCheckpointSaver(path, snapshot_every=snapshot_every) as saver:  # cold caches
+        history = list(build_chat_graph(saver).get_state_history(config))
+    return blob_bytes, history
+
+
+def test_delta_encoded_history_is_reconstructed(tmp_path):
+    full_bytes, full_history = run_long_thread(str(tmp_path / "full.sqlite"), snapshot_every=1)
+    delta_bytes, history = run_long_thread(str(tmp_path / "delta.sqlite"), snapshot_every=4)
+
+    # Newest first: every checkpoint has the messages of all the steps before it
+    lengths = [len(h.values.get("messages", [])) for h in history]
+    assert lengths == [len(h.values.get("messages", [])) for h in full_history]
+    assert lengths == sorted(lengths, reverse=True) and lengths[0] == 20
+    assert [m.content.split()[:2] for m in history[0].values["messages"][1::2]] == \
+        [["reply", str(2 * i + 1)] for i in range(10)]
+    assert delta_bytes < full_bytes / 2
+
+
+
+def test_values_changed_in_place_are_checkpointed_as_written(db_path):
+    thread = {"configurable": {"thread_id": "loop", "checkpoint_ns": ""}}
+    subgoals, config = ["a", "b", "c"], thread
+    with SqliteCheckpointSaver(db_path) as saver:
+        for version in ("1", "2", "3", "4"):
+            checkpoint = empty_checkpoint()
+            checkpoint["channel_values"] = {"subgoals": subgoals}
+            checkpoint["channel_versions"] = {"subgoals": version}
+            config = saver.put(config, checkpoint, {}, {"subgoals": version})
+            if subgoals:
+                subgoals.pop(0)  # the next node consumes a sub-goal in place, like the sub-goal loop
+        live = [t.checkpoint["channel_values"]["subgoals"] for t in saver.list(thread)]
+        saver.get_tuple(thread).checkpoint["channel_values"]["subgoals"].append("x")
+        assert saver.get_tuple(thread).checkpoint["channel_values"]["subgoals"] == []
+
+        latest = saver.get_tuple(thread)
+        saver.put(latest.parent_config, latest.checkpoint, latest.metadata, {})  # rewrites the same row
+        stored = saver.conn.execute("SELECT bytes FROM threads WHERE thread_id = 'loop'").fetchone()[0]
+        assert stored == saver.conn.execute(_THREAD_BYTES, {"t": "loop"}).fetchone()[0]
+
+    with SqliteCheckpointSaver(db_path) as saver:
+        reloaded = [t.checkpoint["channel_values"]["subgoals"] for t in saver.list(thread)]
+    assert live == reloaded == [[], ["c"], ["b", "c"], ["a", "b", "c"]]
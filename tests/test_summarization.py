@@ -0,0 +1,45 @@
+import asyncio
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from langgraph_project.tools.summarization import amap_reduce_summarize, map_reduce_summarize, split_into_chunks
+
+
+def word_count(text: str) -> int:
+    return len(text.split())
+
+
+LONG_TEXT = " ".join(f"word{i}" for i in range(1000))
+
+
+def test_split_respects_chunk_and_total_limits():
+    chunks = split_into_chunks(LONG_TEXT, chunk_tokens=100, max_chunks=50, max_total_tokens=1000,
+                               length_function=word_count)
+    assert len(chunks) == 10
+    assert all(word_count(c) <= 100 for c in chunks)
+    assert " ".join(chunks) == LONG_TEXT
+
+    capped = split_into_chunks(LONG_TEXT, 100, max_chunks=3, max_total_tokens=1000, length_function=word_count)
+    assert capped == chunks[:3]
+
+    budget = split_into_chunks(LONG_TEXT, 100, max_chunks=50, max_total_tokens=250, length_function=word_count)
+    assert budget == chunks[:2]
+
+
+def test_map_then_single_reduce_call():
+    llm = FakeListChatModel(responses=["part summary"] * 4 + ["final summary"])
+
+    summary = map_reduce_summarize(llm, LONG_TEXT, max_length=50, chunk_tokens=250, max_chunks=8,
+                                   max_total_tokens=5000, length_function=word_count)
+
+    assert summary == "final summary"
+    assert llm.i == 0  # 4 map calls + 1 reduce call consumed every response
+
+
+def test_short_text_skips_reduce():
+    llm = FakeListChatModel(responses=["only summary", "unused"])
+
+    summary = asyncio.run(amap_reduce_summarize(llm, "a short page", max_length=50, length_function=word_count))
+
+    assert summary == "only summary"
+    assert llm.i == 1
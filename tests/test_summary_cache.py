@@ -0,0 +1,41 @@
+import time
+
+from langgraph_project.tools.summary_cache import SummaryCache
+
+
+def test_key_depends_on_text_length_model_and_prompt_version():
+    base = SummaryCache.make_key("page text", 300, "gpt-app", 1)
+
+    assert base == SummaryCache.make_key("page text", 300, "gpt-app", 1)
+    assert base != SummaryCache.make_key("page text!", 300, "gpt-app", 1)
+    assert base != SummaryCache.make_key("page text", 200, "gpt-app", 1)
+    assert base != SummaryCache.make_key("page text", 300, "gpt-mini", 1)
+    assert base != SummaryCache.make_key("page text", 300, "gpt-app", 2)
+
+
+def test_hits_survive_a_new_process_handle(tmp_path):
+    path = str(tmp_path / "summaries.sqlite")
+    SummaryCache(path).put("k", "cached summary")
+
+    cache = SummaryCache(path)
+    assert cache.get("k") == "cached summary"
+    assert cache.get("missing") is None
+    assert cache.stats["hits"] == 1 and cache.stats["misses"] == 1
+
+
+def test_ttl_and_lru_eviction(tmp_path):
+    cache = SummaryCache(str(tmp_path / "s.sqlite"), ttl_seconds=0.05, max_entries=2)
+    cache.put("old", "x")
+    time.sleep(0.1)
+    assert cache.get("old") is None
+    assert cache.stats["expired"] == 1
+
+    cache.ttl_seconds = None
+    cache.put("a", "1")
+    cache.put("b", "2")
+    cache.get("a")  # b is now the least recently used entry
+    cache.put("c", "3")
+
+    assert len(cache) == 2
+    assert cache.get("b") is None and cache.get("a") == "1"
+    assert cache.stats["evicted"] == 1
@@ -0,0 +1,106 @@
+import io
+
+from langchain_core.caches import InMemoryCache
+from langchain_core.language_models import FakeListChatModel, GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import END, START, StateGraph
+from langgraph.prebuilt import create_react_agent
+from typing_extensions import TypedDict
+
+import langgraph_project.multi_agents.article_researcher.researchers_sub_goals as sub_goals
+import langgraph_project.tools.tools as tools
+from langgraph_project.agents_nodes.custom_nodes import make_writing_node
+from langgraph_project.agents_nodes.token_stream import stream_to_sink
+from langgraph_project.multi_agents.AgentState import MultiState, MultiState2
+
+ARTICLE = "# Agents\nLLM agents plan, act and write."
+
+
+class ArticleState(TypedDict, total=False):
+    topic: str
+    article: str
+
+
+def article_graph():
+    def writing_node(state):
+        article = tools.generate_article.invoke({"topic": state["topic"], "research_summaries": ["S1", "S2"]})
+        return {"article": article}
+
+    builder = StateGraph(ArticleState)
+    builder.add_node("writing_node", writing_node)
+    builder.add_edge(START, "writing_node")
+    builder.add_edge("writing_node", END)
+    return builder.compile()
+
+
+def test_article_tokens_reach_the_sink_as_they_are_generated(monkeypatch):
+    model = FakeListChatModel(responses=[ARTICLE], cache=InMemoryCache())
+    monkeypatch.setattr(tools, "routed_llm", lambda site: model)
+    sink, stats = io.StringIO(), {}
+
+    state = stream_to_sink(article_graph(), {"topic": "agents"}, sink, stats=stats)
+    assert sink.getvalue() == ARTICLE == state["article"]
+    assert stats["tokens"] == len(ARTICLE)  # FakeListChatModel streams one character at a time
+    assert stats["first_token_seconds"] >= 0
+
+    # A cached article is emitted at once
+    tokens = []
+    assert stream_to_sink(article_graph(), {"topic": "agents"}, tokens.append)["article"] == ARTICLE
+    assert tokens == [ARTICLE]
+
+
+def test_generate_article_outside_a_graph(monkeypatch):
+    monkeypatch.setattr(tools, "routed_llm", lambda site: FakeListChatModel(responses=[ARTICLE]))
+    assert tools.generate_article.invoke({"topic": "agents", "research_summaries": ["S1"]}) == ARTICLE
+
+
+class ToolCallingModel(GenericFakeChatModel):
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+class UnusedAgent:
+    def invoke(self, *args, **kwargs):
+        raise AssertionError("the writing agent should not be called")
+
+
+def writing_graph(state_schema, node):
+    builder = StateGraph(state_schema)
+    builder.add_node("writing_node", node)
+    builder.add_edge(START, "writing_node")
+    return builder.compile()
+
+
+def test_writing_node_streams_through_the_agent_or_directly(monkeypatch):
+    monkeypatch.setattr(tools, "routed_llm", lambda site: FakeListChatModel(responses=[ARTICLE]))
+    state = {"messages": [HumanMessage(content="write")], "topic": "agents", "research_results": ["S1", "S2"]}
+
+    call = AIMessage(content="", tool_calls=[{"name": "generate_article", "id": "call-1",
+                                               "args": {"topic": "agents", "research_summaries": ["S1", "S2"]}}])
+    model = ToolCallingModel(messages=iter([call, AIMessage(content="Done.")]))
+    agent = create_react_agent(model, [tools.generate_article])
+    tokens = []
+    stream_to_sink(writing_graph(MultiState, make_writing_node(agent, tools.generate_article)), state, tokens.append)
+    assert "".join(tokens) == ARTICLE
+
+    # Direct: the article tokens do not wait for an agent completion
+    tokens = []
+    node = make_writing_node(UnusedAgent(), tools.generate_article, direct=True)
+    stream_to_sink(writing_graph(MultiState, node), state, tokens.append)
+    assert "".join(tokens) == ARTICLE
+
+
+def test_sub_goal_writing_node_streams_directly(monkeypatch):
+    topics = []
+    monkeypatch.setattr(tools, "routed_llm", lambda site: FakeListChatModel(responses=[ARTICLE]))
+    monkeypatch.setattr(tools, "_build_article_prompt", lambda topic, summaries, *args: topics.append(
+        (topic, summaries)) or "prompt")
+    monkeypatch.setattr(sub_goals, "stream_article", True)
+    monkeypatch.setattr(sub_goals, "get_writing_agent", UnusedAgent)
+
+    sink = io.StringIO()
+    results = [{"subgoal": "a", "summaries": ["S1"]}, {"subgoal": "b", "summaries": ["S2", "S3"]}]
+    state = stream_to_sink(writing_graph(MultiState2, sub_goals.writing_node),
+                           {"messages": [], "goal": "agents", "research_results": results}, sink)
+    assert sink.getvalue() == state["article"] == ARTICLE
+    assert topics == [("agents", ["S1", "S2", "S3"])]
@@ -1,10 +1,129 @@
-"""All utility functions"""
-from langchain_community.llms import AzureOpenAI, HuggingFaceHub
+"""
+All utility functions
+
+Nothing is built at import time: the LLM clients (and their heavy langchain_openai /
+langchain_community imports) are created on first use by `get_llm()`.
+
+`get_llm(role)` returns one chat model per role of `LLMConfigs.llm_roles` (e.g. research at a higher
+temperature than writing). Role models are never mutated, so graph runs can share them concurrently,
+and they all send their requests over one keep-alive connection pool, through the LLM gateway
+(adaptive concurrency, retries and circuit breaker, see langgraph_project/agents_nodes/llm_gateway.py).
+Call sites opted in with `llm_hedging.with_hedging` also get hedged requests (see llm_hedging.py).
+"""
+import asyncio
+import functools
+import threading
+from typing import Optional
 
-from langchain_openai import AzureChatOpenAI
 from conf.configs import Cfg
 
 
+# -------------------------
+# SHARED LLM CONNECTION POOL
+# -------------------------
+
+def _pool_limits(configs):
+    import httpx
+
+    return httpx.Limits(
+        max_connections=configs.llm_max_connections,
+        max_keepalive_connections=configs.llm_max_keepalive_connections,
+        keepalive_expiry=configs.llm_keepalive_expiry,
+    )
+
+
+def _sync_transport(configs):
+    import httpx
+
+    transport = httpx.HTTPTransport(limits=_pool_limits(configs))
+    if configs.use_llm_gateway:
+        from langgraph_project.agents_nodes.llm_gateway import GatewayTransport, get_llm_gateway
+
+        transport = GatewayTransport(transport, get_llm_gateway())
+    if configs.use_llm_hedging:
+        from langgraph_project.agents_nodes.llm_hedging import HedgingTransport
+
+        # A primary request and its hedge per call the gateway lets through
+        transport = HedgingTransport(transport, max_workers=2 * configs.llm_gateway_max_concurrency)
+    return transport
+
+
+def _async_transport(configs):
+    import httpx
+
+    transport = httpx.AsyncHTTPTransport(limits=_pool_limits(configs))
+    if configs.use_llm_gateway:
+        from langgraph_project.agents_nodes.llm_gateway import AsyncGatewayTransport, get_llm_gateway
+
+        transport = AsyncGatewayTransport(transport, get_llm_gateway())
+    if configs.use_llm_hedging:
+        from langgraph_project.agents_nodes.llm_hedging import AsyncHedgingTransport
+
+        transport = AsyncHedgingTransport(transport)
+    return transport
+
+
+def _sdk_max_retries(configs) -> int:
+    # The gateway retries (honoring Retry-After); SDK retries on top would multiply the attempts
+    return 0 if configs.use_llm_gateway else configs.llm_max_retries
+
+
+def _loop_local_async_client(transport_factory=None, **kwargs):
+    """
+    httpx.AsyncClient that sends over one pool per event loop.
+
+    Pooled async connections belong to the loop that opened them, so runs on different loops
+    (e.g. one `asyncio.run` per request thread) must not share them. The client of a closed loop is
+    dropped on the next send (its connections cannot be closed from another loop; dropping them lets
+    the garbage collector close their sockets).
+    """
+    import httpx
+
+    class LoopLocalAsyncClient(httpx.AsyncClient):
+        def __init__(self):
+            super().__init__(**kwargs)
+            self._lock = threading.Lock()
+            # Not a WeakKeyDictionary: the pooled connections of a client reference its loop
+            self._clients = {}
+
+        async def send(self, request, **send_kwargs):
+            loop = asyncio.get_running_loop()
+            with self._lock:
+                for closed in [l for l in self._clients if l.is_closed()]:
+                    del self._clients[closed]
+                client = self._clients.get(loop)
+                if client is None:
+                    transport = {"transport": transport_factory()} if transport_factory else {}
+                    client = self._clients[loop] = httpx.AsyncClient(**kwargs, **transport)
+            return await client.send(request, **send_kwargs)
+
+    return LoopLocalAsyncClient()
+
+
+_pool_lock = threading.Lock()
+_pools = {}
+
+
+def get_llm_http_clients(configs=None):
+    """The (sync, async) HTTP clients shared by every LLM built with the same pool settings."""
+    configs = configs or cfg_instance.llm_configs
+    key = (configs.llm_timeout, configs.llm_max_connections, configs.llm_max_keepalive_connections,
+           configs.llm_keepalive_expiry, configs.use_llm_gateway, configs.use_llm_hedging)
+    with _pool_lock:
+        if key not in _pools:
+            import httpx
+
+            _pools[key] = (
+                httpx.Client(timeout=configs.llm_timeout, transport=_sync_transport(configs)),
+                _loop_local_async_client(lambda: _async_transport(configs), timeout=configs.llm_timeout),
+            )
+        return _pools[key]
+
+
+# -------------
+# LLM FACTORY
+# -------------
+
 def get_llm_instance(configs, *args, **kwargs):
     """
       Obtain the language model type based on the specified configuration.
@@ -26,12 +145,24 @@ def get_llm_instance(configs, *args, **kwargs):
       Usage:
           - For simple applications, using an LLM is suitable.
           - For applications requiring conversational flow, a Chat Model is recommended.
+
+      Chat models use the shared connection pool of `get_llm_http_clients`; keyword arguments
+      (temperature, max_tokens, azure_deployment, ...) override the model settings.
+      Responses are memoized by the LLM cache (see LLMConfigs.llm_cache_mode), unless cache=None is given.
       """
+    from langgraph_project.agents_nodes.llm_cache import get_llm_cache
 
     if configs.llm_type == 'azure_chat_openai':
+        from langchain_openai import AzureChatOpenAI
+
+        http_client, http_async_client = get_llm_http_clients(configs)
+        kwargs.setdefault("azure_deployment", configs.llm_deployment)
+        kwargs.setdefault("max_retries", _sdk_max_retries(configs))
+        kwargs.setdefault("cache", get_llm_cache())
         return AzureChatOpenAI(
-            azure_deployment=configs.llm_deployment,
             openai_api_version=configs.openai_api_version,
+            http_client=http_client,
+            http_async_client=http_async_client,
             # temperature=0,
             # TODO: ADD THIS TO CONFIGS
             # model_name="gpt-3.5-turbo",  # To specify the version name is necessary for CustomConversationBufferMemory
@@ -40,12 +171,17 @@ def get_llm_instance(configs, *args, **kwargs):
         )
 
     elif configs.llm_type == 'azure_openai':
+        from langchain_community.llms import AzureOpenAI
+
         return AzureOpenAI(
             openai_api_type="azure_ad",
-            deployment_name=configs.llm_deployment  # Name of the deployment for identification
+            deployment_name=configs.llm_deployment,  # Name of the deployment for identification
+            cache=kwargs.get("cache", get_llm_cache()),
         )
 
     elif configs.llm_type == 'hugging_face':
+        from langchain_community.llms import HuggingFaceHub
+
         return HuggingFaceHub(repo_id="google/flan-t5-xxl", model_kwargs={"temperature": 0.5, "max_length": 512})
     else:
         raise ValueError('LLM type is not recognized')
@@ -56,4 +192,54 @@ cfg_instance = Cfg()
 cfg_instance.llm_configs.llm_deployment = "gpt-app"  # "langchain_model"
 cfg_instance.llm_configs.openai_api_version = "2024-08-01-preview"  # "2024-02-15-preview"  # Use this version for gpt4 # "2023-07-01-preview"
 
-llm = get_llm_instance(configs=cfg_instance.llm_configs)
+
+
+@functools.lru_cache(maxsize=None)
+def _role_llm(role: str, deployment: Optional[str] = None):
+    roles = cfg_instance.llm_configs.llm_roles
+    if role not in roles:
+        raise ValueError(f"Unknown LLM role {role!r}, expected one of {sorted(roles)}")
+    overrides = dict(roles[role])
+    if "deployment" in overrides:
+        overrides["azure_deployment"] = overrides.pop("deployment")
+    if deployment is not None:
+        overrides["azure_deployment"] = deployment
+    return get_llm_instance(configs=cfg_instance.llm_configs, **overrides)
+
+
+_role_lock = threading.Lock()
+
+
+def get_llm(role: str = "default", deployment: Optional[str] = None):
+    """
+    The shared LLM of `role` (see LLMConfigs.llm_roles), built on first use.
+
+    `deployment` overrides the deployment of the role (the model router uses it to build its candidates).
+    Do not change its settings (e.g. `.temperature`): the model is shared by every caller of the role.
+    Add a role instead.
+    """
+    with _role_lock:  # one model per role, even if the first calls are concurrent
+        return _role_llm(role, deployment)
+
+
+@functools.lru_cache(maxsize=None)
+def get_embeddings():
+    """The shared embeddings model (LLMConfigs.embeddings_deployment), over the LLM connection pool."""
+    from langchain_openai import AzureOpenAIEmbeddings
+
+    configs = cfg_instance.llm_configs
+    http_client, http_async_client = get_llm_http_clients(configs)
+    return AzureOpenAIEmbeddings(
+        azure_deployment=configs.embeddings_deployment,
+        openai_api_version=configs.openai_api_version,
+        max_retries=_sdk_max_retries(configs),
+        http_client=http_client,
+        http_async_client=http_async_client,
+    )
+
+
+def __getattr__(name):
+    # `from utils import llm` keeps working, but builds the LLM only when it is actually imported
+    if name == "llm":
+        return get_llm()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")